@@ -18,16 +18,41 @@ case "$1" in
     echo "Building site for production..."
     uv run pelican content -o docs -s publishconf.py
     ;;
+  reencode-audio)
+    echo "Re-encoding audio from lossless masters..."
+    uv run python src/tts.py reencode "${@:2}"
+    ;;
+  index-audio)
+    echo "Indexing audio durations and waveform peaks..."
+    uv run python src/tts.py index "${@:2}"
+    ;;
+  ingest-words)
+    echo "Ingesting word list into the wordbank..."
+    uv run python src/wordbank_ingest.py "${@:2}"
+    ;;
+  image-duplicates)
+    echo "Reporting near-identical wordbank images..."
+    uv run python src/image_hashes.py report "${@:2}"
+    ;;
+  sharded-build)
+    echo "Running a sharded build node..."
+    uv run python src/sharded_build.py "${@:2}"
+    ;;
   clean)
     echo "Cleaning output..."
     uv run pelican --delete-output
     ;;
   *)
-    echo "Usage: $0 {serve|build|build-prod|clean}"
+    echo "Usage: $0 {serve|build|build-prod|reencode-audio|index-audio|ingest-words|image-duplicates|sharded-build|clean}"
     echo ""
     echo "  serve       Start development server with auto-reload"
     echo "  build       Build the static site (development)"
     echo "  build-prod  Build the static site (production)"
+    echo "  reencode-audio  Re-render audio encodings from lossless masters"
+    echo "  index-audio     Record durations and waveform peaks for existing audio"
+    echo "  ingest-words    Generate wordbank entries from a CSV/TSV/JSONL word list"
+    echo "  image-duplicates  List groups of near-identical wordbank images"
+    echo "  sharded-build     Coordinate or work on a multi-machine build via Redis"
     echo "  clean       Clean the output directory"
     exit 1
     ;;
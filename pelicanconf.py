@@ -1,4 +1,6 @@
 import logging
+import os
+import sys
 
 AUTHOR = "Ted K"
 SITENAME = "Ted's 日本語 Workbook"
@@ -104,7 +106,20 @@ STATIC_PATHS = ["images", "audio"]
 
 # Plugins
 PLUGIN_PATHS = ["plugins"]
+# Pelican imports each plugin on its own; plugins that import others (prefetch,
+# parallel_build) need them importable before their turn
+sys.path.extend(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    for path in PLUGIN_PATHS
+)
 PLUGINS = [
+    # Must come first: skips the plugins below for articles cached by a previous
+    # build (cache in CACHE_PATH/plugin_output; OUTPUT_CACHE = False disables it)
+    "output_cache",
+    # Starts the generation work of all articles up front
+    "prefetch",
+    # Hands articles processed by worker processes to the plugins below
+    "parallel_build",
     "phrasebank",
     "wordbank_flashcards",
     "tts_filter",
@@ -117,5 +132,19 @@ PLUGINS = [
 # Set to False to use cached content only (development mode)
 GENERATE_CONTENT = False
 
+# Pack all inline <tts> snippets of an article into a single audio sprite
+# (one media request per page instead of one per snippet)
+TTS_AUDIO_SPRITES = False
+
+# Run the content plugins of all articles in a process pool (one worker per CPU
+# unless PARALLEL_BUILD_WORKERS is set); uses Redis for the shared LLM cache
+PARALLEL_BUILD = False
+PARALLEL_BUILD_WORKERS = None
+
+# Wordbank storage engine: "jsonl" (data/wordbank.jsonl, checked in) or "sqlite"
+# (data/wordbank.sqlite3, imported from the JSONL file on first use and exported
+# back with `python src/wordbank.py export`)
+WORDBANK_STORAGE = "jsonl"
+
 # Theme
 THEME = "themes/workbook"
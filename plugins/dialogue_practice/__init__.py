@@ -6,6 +6,9 @@ Converts <dialogue_practice> tags into interactive buttons for AI conversation p
 
 import logging
 from pelican import signals
+
+from plugin_chain import is_processed
+
 from .processor import get_processor
 
 _log = logging.getLogger(__name__)
@@ -13,15 +16,13 @@ _log = logging.getLogger(__name__)
 
 def process_dialogue_practice(content_object):
     """Process dialogue practice tags in content."""
-    if not hasattr(content_object, "_content"):
+    if not hasattr(content_object, "_content") or is_processed(content_object):
         return
 
-    # Get SITEURL from settings
-    siteurl = content_object.settings.get("SITEURL", "")
     generate_content = content_object.settings.get("GENERATE_CONTENT", False)
 
     # Get the processor instance
-    processor = get_processor(siteurl, generate_content)
+    processor = get_processor(generate_content)
 
     # Process the content
     try:
@@ -13,20 +13,17 @@ _log = logging.getLogger(__name__)
 
 # Singleton pattern for processor
 _processor = None
-_current_siteurl = None
 
 
 class DialoguePracticeProcessor:
     """Processes dialogue practice sections in Pelican content."""
 
-    def __init__(self, siteurl: str = "", generate_content: bool = False):
+    def __init__(self, generate_content: bool = False):
         """Initialize the processor.
 
         Args:
-            siteurl: The SITEURL from Pelican settings
             generate_content: Whether to generate new content or use cached
         """
-        self.siteurl = siteurl
         self.generate_content = generate_content
 
     def process_content(self, content: str) -> str:
@@ -110,21 +107,19 @@ class DialoguePracticeProcessor:
         return html
 
 
-def get_processor(siteurl: str, generate_content: bool):
+def get_processor(generate_content: bool):
     """
     Get or create the global processor instance.
 
     Args:
-        siteurl: The SITEURL from Pelican settings
         generate_content: Whether to generate new content
 
     Returns:
         DialoguePracticeProcessor instance
     """
-    global _processor, _current_siteurl
+    global _processor
 
-    if _processor is None or _current_siteurl != siteurl:
-        _processor = DialoguePracticeProcessor(siteurl, generate_content)
-        _current_siteurl = siteurl
+    if _processor is None or _processor.generate_content != generate_content:
+        _processor = DialoguePracticeProcessor(generate_content)
 
     return _processor
@@ -2,9 +2,13 @@
 
 import re
 
-import fugashi
 from markupsafe import Markup
 
+from morphology import JAPANESE_PATTERN, contains_kanji, parse, token_reading
+
+# Pattern to match HTML tags; used to split content into tags and text nodes
+HTML_TAG_PATTERN = re.compile(r"(<[^>]+>)")
+
 
 def add_furigana(html_content):
     """
@@ -27,15 +31,9 @@ def add_furigana(html_content):
     if not html_content:
         return html_content
 
-    # Initialize fugashi tagger for morphological analysis
-    tagger = fugashi.Tagger()  # type:ignore
-
-    # Pattern to match text outside of HTML tags
-    # We need to process text nodes but preserve HTML structure
-    html_tag_pattern = re.compile(r"(<[^>]+>)")
-
     # Split content into HTML tags and text segments
-    segments = html_tag_pattern.split(str(html_content))
+    # We need to process text nodes but preserve HTML structure
+    segments = HTML_TAG_PATTERN.split(str(html_content))
 
     # Track whether we're inside a <script> tag
     inside_script = False
@@ -43,7 +41,7 @@ def add_furigana(html_content):
     processed_segments = []
     for segment in segments:
         # If this is an HTML tag, check if it's a script tag
-        if html_tag_pattern.match(segment):
+        if HTML_TAG_PATTERN.match(segment):
             # Check for opening or closing script tags
             if segment.lower().startswith('<script'):
                 inside_script = True
@@ -57,19 +55,18 @@ def add_furigana(html_content):
                 processed_segments.append(segment)
             else:
                 # Outside script tag - process it for furigana
-                processed_segments.append(_process_text_for_furigana(segment, tagger))
+                processed_segments.append(_process_text_for_furigana(segment))
 
     result = "".join(processed_segments)
     return Markup(result)
 
 
-def _process_text_for_furigana(text, tagger):
+def _process_text_for_furigana(text):
     """
     Process a text segment to add furigana to kanji words.
 
     Args:
         text: Plain text string (not containing HTML tags)
-        tagger: Configured fugashi Tagger instance
 
     Returns:
         Text with ruby annotations added to kanji words
@@ -78,22 +75,17 @@ def _process_text_for_furigana(text, tagger):
         return text
 
     # Split text into Japanese and non-Japanese segments
-    # Japanese characters include: Hiragana, Katakana, Kanji, and Japanese punctuation
-    japanese_pattern = re.compile(
-        r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF\u3000-\u303F]+"
-    )
-
     output = []
     last_end = 0
 
-    for match in japanese_pattern.finditer(text):
+    for match in JAPANESE_PATTERN.finditer(text):
         # Add any non-Japanese text before this match (preserve as-is)
         if match.start() > last_end:
             output.append(text[last_end : match.start()])
 
         # Process the Japanese segment with fugashi
         japanese_segment = match.group()
-        output.append(_process_japanese_segment(japanese_segment, tagger))
+        output.append(_process_japanese_segment(japanese_segment))
 
         last_end = match.end()
 
@@ -104,80 +96,26 @@ def _process_text_for_furigana(text, tagger):
     return "".join(output)
 
 
-def _process_japanese_segment(text, tagger):
+def _process_japanese_segment(text):
     """
     Process a Japanese text segment to add furigana to kanji words.
 
     Args:
         text: Japanese text string (hiragana, katakana, kanji)
-        tagger: Configured fugashi Tagger instance
 
     Returns:
         Text with ruby annotations added to kanji words
     """
-    # Parse text with morphological analyzer
-    words = tagger(text)
-
     output = []
-    for word in words:
-        orig = word.surface  # Original text
-
-        # Get katakana reading and convert to hiragana
-        kana = word.feature.kana if hasattr(word.feature, "kana") else None
-
-        if kana:
-            hira = _katakana_to_hiragana(kana)
-        else:
-            # No reading available, use original text
-            hira = orig
+    for token in parse(text):
+        orig = token.surface  # Original text
 
         # Check if this segment contains kanji
-        if _contains_kanji(orig):
+        if contains_kanji(orig):
             # Wrap with ruby annotation
-            output.append(f"<ruby>{orig}<rt>{hira}</rt></ruby>")
+            output.append(f"<ruby>{orig}<rt>{token_reading(token)}</rt></ruby>")
         else:
             # No kanji - preserve as-is
             output.append(orig)
 
     return "".join(output)
-
-
-def _katakana_to_hiragana(text):
-    """
-    Convert katakana characters to hiragana.
-
-    Args:
-        text: String containing katakana characters
-
-    Returns:
-        String with katakana converted to hiragana
-    """
-    hiragana = []
-    for char in text:
-        code = ord(char)
-        # Katakana range: U+30A0 to U+30FF
-        # Hiragana range: U+3040 to U+309F
-        # Offset is 0x60 (96)
-        if 0x30A0 <= code <= 0x30FF:
-            hiragana.append(chr(code - 0x60))
-        else:
-            hiragana.append(char)
-    return "".join(hiragana)
-
-
-def _contains_kanji(text):
-    """
-    Check if text contains any kanji characters.
-
-    Kanji Unicode ranges:
-    - CJK Unified Ideographs: U+4E00 to U+9FFF
-    - CJK Unified Ideographs Extension A: U+3400 to U+4DBF
-
-    Args:
-        text: String to check
-
-    Returns:
-        True if text contains kanji, False otherwise
-    """
-    kanji_pattern = re.compile(r"[\u4E00-\u9FFF\u3400-\u4DBF]")
-    return bool(kanji_pattern.search(text))
@@ -26,6 +26,9 @@ from pathlib import Path
 
 from pelican import signals
 
+from background_loop import shutdown_background_loop
+from plugin_chain import is_processed
+
 from .processor import get_processor
 
 _log = logging.getLogger(__name__)
@@ -66,7 +69,7 @@ def process_content(content):
         content: Pelican content object
     """
     # Only process content objects that have _content attribute
-    if not hasattr(content, "_content"):
+    if not hasattr(content, "_content") or is_processed(content):
         return
 
     # Skip media files
@@ -102,3 +105,4 @@ def register():
     """
     _log.info(" Registering Japanese text processor plugin")
     signals.content_object_init.connect(process_content)
+    signals.finalized.connect(shutdown_background_loop)
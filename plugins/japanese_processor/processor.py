@@ -14,6 +14,8 @@ from markupsafe import Markup
 from pydantic_ai.models.google import GoogleModel
 from pydantic_ai.providers.google import GoogleProvider
 
+from background_loop import get_background_loop
+from scheduler import get_scheduler
 from tools import load_google_api_key
 
 from .cache import get_cache
@@ -21,7 +23,6 @@ from .cache import get_cache
 _log = logging.getLogger(__name__)
 
 # Configuration
-BATCH_SIZE = 30  # Number of Japanese text chunks to process concurrently
 MAX_RETRIES = 1  # Number of retry attempts for failed LLM calls
 
 # Cache configuration (can be overridden via environment variables)
@@ -107,6 +108,12 @@ class JapaneseTextProcessor:
 
         # Initialize cache
         self.cache = get_cache(key_prefix=CACHE_VERSION)
+        # Agent shared by all requests; its HTTP client lives on the background loop
+        self._agent: marvin.Agent | None = None
+
+        # Responses of this session, so prefetched segments are found even
+        # when Redis is unavailable
+        self._responses: dict[str, JapaneseWordSpans] = {}
 
     def process_content(self, html_content: str) -> str:
         """
@@ -131,9 +138,9 @@ class JapaneseTextProcessor:
         # Get all text nodes
         text_nodes = soup.find_all(string=True)
 
-        # Process text nodes in batches
+        # Process text nodes on the shared background loop
         try:
-            asyncio.run(self._process_text_nodes_in_batches(text_nodes))
+            get_background_loop().run(self._process_text_nodes_in_batches(text_nodes))
         except Exception as e:
             _log.info(f"Error during async processing: {e}")
             # Return original content if processing fails
@@ -145,30 +152,62 @@ class JapaneseTextProcessor:
 
     async def _process_text_nodes_in_batches(self, text_nodes: List) -> None:
         """
-        Process text nodes in async batches.
+        Process text nodes concurrently.
+
+        LLM calls go through the shared scheduler, which caps how many run at
+        once and how fast they start.
 
         Args:
             text_nodes: List of BeautifulSoup text nodes to process
         """
-        # Process in batches
-        for i in range(0, len(text_nodes), BATCH_SIZE):
-            batch = text_nodes[i : i + BATCH_SIZE]
-            _log.info(
-                f"Processing batch {i // BATCH_SIZE + 1} ({len(batch)} text nodes)"
-            )
+        _log.info(f"Processing {len(text_nodes)} text nodes")
+        await asyncio.gather(
+            *[self._process_text_node(node) for node in text_nodes],
+            return_exceptions=True,
+        )
 
-            # Process batch concurrently
-            await asyncio.gather(
-                *[self._process_text_node(node) for node in batch],
-                return_exceptions=True,
-            )
+    def find_segments(self, html_content: str) -> list[str]:
+        """
+        Find the Japanese text segments ``process_content`` would send to the LLM.
 
-    async def _process_text_node(self, text_node) -> None:
+        Args:
+            html_content: HTML string containing Japanese text
+
+        Returns:
+            Segments in document order, including repeats
         """
-        Process a single text node, replacing Japanese text with annotated spans.
+        soup = BeautifulSoup(str(html_content), "html.parser")
+        return [
+            segment
+            for text_node in soup.find_all(string=True)
+            for _, _, segment in self._find_japanese(text_node)
+        ]
+
+    async def prefetch(self, segments: list[str]) -> None:
+        """
+        Process Japanese text segments up front, e.g. those of a whole site.
+
+        Responses are cached, so ``process_content`` finds them later.
 
         Args:
-            text_node: BeautifulSoup text node to process
+            segments: Segments as returned by ``find_segments``
+        """
+        unique_segments = dict.fromkeys(segments)
+        _log.info(f"Prefetching {len(unique_segments)} Japanese text segments")
+        await asyncio.gather(
+            *[self._call_llm_for_segment(segment) for segment in unique_segments],
+            return_exceptions=True,
+        )
+
+    def _find_japanese(self, text_node) -> list[tuple[int, int, str]]:
+        """
+        Find the Japanese segments of a text node that need processing.
+
+        Args:
+            text_node: BeautifulSoup text node
+
+        Returns:
+            List of (start, end, segment) tuples
         """
         # Skip text inside ignored tags
         if text_node.parent is not None and text_node.parent.name in [
@@ -176,19 +215,26 @@ class JapaneseTextProcessor:
             "style",
             "wordbank",
         ]:
-            return
+            return []
 
+        return [
+            (match.start(), match.end(), match.group())
+            for match in self.japanese_pattern.finditer(str(text_node))
+            # Skip single-character punctuation
+            if not _should_skip_segment(match.group())
+        ]
+
+    async def _process_text_node(self, text_node) -> None:
+        """
+        Process a single text node, replacing Japanese text with annotated spans.
+
+        Args:
+            text_node: BeautifulSoup text node to process
+        """
         # Check if text contains Japanese characters
         original_text = str(text_node)
-        matches = []
-        japanese_segments = []
-
-        for match in self.japanese_pattern.finditer(original_text):
-            matched_text = match.group()
-            # Skip single-character punctuation
-            if not _should_skip_segment(matched_text):
-                japanese_segments.append(matched_text)
-                matches.append((match.start(), match.end(), matched_text))
+        matches = self._find_japanese(text_node)
+        japanese_segments = [segment for _, _, segment in matches]
 
         # If no Japanese text, skip
         if not matches:
@@ -237,6 +283,9 @@ class JapaneseTextProcessor:
         Returns:
             JapaneseWordSpans object from LLM, or None if call failed
         """
+        if text in self._responses:
+            return self._responses[text]
+
         # Check cache first (cache stores JSON serialized response)
         cached_json = self.cache.get(text)
         if cached_json is not None:
@@ -245,7 +294,8 @@ class JapaneseTextProcessor:
                 data = json.loads(cached_json)
                 # Reconstruct JapaneseWordSpans from dict
                 spans = [JapaneseWordSpan(**item) for item in data.get("spans", [])]
-                return JapaneseWordSpans(spans=spans)
+                self._responses[text] = JapaneseWordSpans(spans=spans)
+                return self._responses[text]
             except Exception as e:
                 _log.info(f"Error deserializing cached response: {e}")
                 # Fall through to LLM call
@@ -253,17 +303,23 @@ class JapaneseTextProcessor:
         # Cache miss - call LLM
         try:
             prompt = self._build_llm_prompt(text)
-            agent = _create_agent(prompt)
+            if self._agent is None:
+                self._agent = _create_agent(prompt)
+            agent = self._agent
 
             _log.info(f"Processing text: {text}")
-            response = await agent.run_async(
-                prompt, result_type=JapaneseWordSpans, handlers=[]
+            response = await get_scheduler().run(
+                "gemini-flash",
+                lambda: agent.run_async(
+                    prompt, result_type=JapaneseWordSpans, handlers=[]
+                ),
             )
             _log.info(f"{text} -> {response}")
 
             # Serialize and cache the response using asdict()
             response_dict = asdict(response)
             self.cache.set(text, json.dumps(response_dict))
+            self._responses[text] = response
 
             return response
 
@@ -0,0 +1,211 @@
+"""
+Output Cache Plugin for Pelican
+
+Skips the content plugin chain for articles whose output is cached from a
+previous build (see src/content_cache.py for what the cache key covers).
+
+This plugin:
+1. Computes the build's part of the cache key when Pelican initializes
+2. Gives cached articles their stored _content in content_object_init and
+   marks them as processed, so the other plugins skip them
+3. Collects the output of the other articles at the end of the chain, unless
+   an error was logged while they were processed
+4. Stores the collected output when Pelican finishes, under a build key
+   computed again then: generating content changes the data the key covers,
+   and the next build looks entries up with the data as this build left it
+
+The prefetch and parallel_build plugins skip cached articles as well. Must be
+listed first.
+
+Settings:
+    OUTPUT_CACHE: Set to False to disable (default: True)
+    OUTPUT_CACHE_PATH: Cache directory (default: CACHE_PATH/plugin_output)
+"""
+
+import logging
+import os
+
+from pelican import signals
+from pelican.contents import Static
+
+from content_cache import ContentCache, build_key
+from plugin_chain import is_processed, mark_processed
+
+_log = logging.getLogger(__name__)
+
+# Attribute holding the cache key of content objects to store
+KEY_ATTRIBUTE = "_output_cache_key"
+
+# Global cache of the current build, None when disabled
+_cache: ContentCache | None = None
+# Lookups done before content_object_init, by absolute source path
+_lookups: dict[str, tuple[str, str | None]] = {}
+# Output to store when the build finishes, by absolute source path
+_outputs: dict[str, str] = {}
+
+
+class _ErrorCounter(logging.Handler):
+    """Count the errors logged during the build."""
+
+    def __init__(self):
+        """Initialize the counter."""
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        """Count an error record."""
+        self.count += 1
+
+
+_errors = _ErrorCounter()
+
+
+def open_cache(pelican):
+    """
+    Set up the cache for this build.
+
+    Args:
+        pelican: The Pelican instance
+    """
+    global _cache
+    settings = pelican.settings
+    _lookups.clear()
+    _outputs.clear()
+    if not settings.get("OUTPUT_CACHE", True):
+        _cache = None
+        return
+
+    cache_dir = settings.get("OUTPUT_CACHE_PATH") or os.path.join(
+        settings["CACHE_PATH"], "plugin_output"
+    )
+    _cache = ContentCache(cache_dir, build_key(settings))
+    logging.getLogger().addHandler(_errors)
+    # Connected now, after every plugin's register(), so it runs last
+    signals.content_object_init.connect(store_output)
+
+
+def lookup(source_path: str) -> tuple[str, str | None] | None:
+    """
+    Look up the cached output of an article.
+
+    Args:
+        source_path: Path of the article's source file
+
+    Returns:
+        The article's cache key and cached content (None on a miss), or None
+        if the cache is disabled
+    """
+    if _cache is None:
+        return None
+    source_path = os.path.abspath(source_path)
+    if source_path not in _lookups:
+        key = _cache.key(source_path)
+        _lookups[source_path] = (key, _cache.get(source_path, key))
+    return _lookups[source_path]
+
+
+def is_cached(source_path: str) -> bool:
+    """
+    Check whether an article's output is cached.
+
+    Args:
+        source_path: Path of the article's source file
+
+    Returns:
+        True if the plugins will skip the article
+    """
+    result = lookup(source_path)
+    return result is not None and result[1] is not None
+
+
+def use_cached_output(content):
+    """
+    Replace a content object's _content with its cached output.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+    """
+    source_path = getattr(content, "source_path", None)
+    if not source_path or isinstance(content, Static):
+        return
+
+    try:
+        result = lookup(source_path)
+    except OSError:
+        _log.exception(f"Error looking up {source_path} in the output cache")
+        return
+    if result is None:
+        return
+
+    key, cached = result
+    if cached is not None:
+        content._content = cached
+        mark_processed(content)
+    elif not is_processed(content):
+        setattr(content, KEY_ATTRIBUTE, (key, _errors.count))
+
+
+def store_output(content):
+    """
+    Collect a content object's output at the end of the plugin chain.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+    """
+    pending = getattr(content, KEY_ATTRIBUTE, None)
+    if _cache is None or pending is None:
+        return
+
+    _key, error_count = pending
+    delattr(content, KEY_ATTRIBUTE)
+    if _errors.count != error_count:
+        # The output may lack what failed; process the article again next time
+        _log.info(f"Warning: Not caching {content.source_path} after errors")
+        return
+    _outputs[os.path.abspath(content.source_path)] = str(content._content)
+
+
+def save_outputs(pelican):
+    """
+    Store the collected output under the build key of the finished build.
+
+    Args:
+        pelican: The Pelican instance
+    """
+    if _cache is None or not _outputs:
+        return
+
+    cache = ContentCache(_cache.cache_dir, build_key(pelican.settings))
+    if cache.build_key != _cache.build_key:
+        _log.info("Build data changed during the build, rekeying cached output")
+    for source_path, content in _outputs.items():
+        try:
+            cache.put(source_path, cache.key(source_path), content)
+        except OSError:
+            _log.exception(f"Error caching the output of {source_path}")
+    _log.info(f"Cached the output of {len(_outputs)} articles")
+
+
+def close_cache(pelican=None):
+    """
+    Store the collected output and stop caching when Pelican finishes.
+
+    Args:
+        pelican: The Pelican instance
+    """
+    global _cache
+    try:
+        if pelican is not None:
+            save_outputs(pelican)
+    finally:
+        _cache = None
+        _lookups.clear()
+        _outputs.clear()
+        logging.getLogger().removeHandler(_errors)
+
+
+def register():
+    """Register the plugin with Pelican."""
+    signals.initialized.connect(open_cache)
+    signals.content_object_init.connect(use_cached_output)
+    signals.finalized.connect(close_cache)
@@ -0,0 +1,132 @@
+"""
+Parallel Build Plugin for Pelican
+
+Runs the content plugin chain of all articles in a process pool, so the
+CPU-bound work (HTML parsing, tokenization, HTML generation) uses every core.
+
+When PARALLEL_BUILD is enabled, this plugin:
+1. Waits for the prefetch plugin's generation work, if any, so workers find
+   LLM responses, audio and images cached instead of generating them under
+   separate per-process rate limits
+2. Submits every markdown source to worker processes, which read it and run
+   the other plugins' content_object_init handlers on it
+3. Hands each transformed _content back to Pelican in content_object_init and
+   marks the content object as processed, so the plugins skip it
+
+Shared state goes through the on-disk stores and the Redis LLM cache. The
+wordbank record log and the JSON stores (audio metadata, image derivatives,
+image hashes) take a file lock and merge each update into the current file,
+so concurrent workers don't lose each other's entries. Articles served from
+the output cache aren't submitted. Must be listed after prefetch and before
+the content plugins.
+
+The final render of a sharded build (src/sharded_build.py) also goes through
+this plugin: articles are taken from SHARDED_BUILD_DIR instead of workers.
+
+Settings:
+    PARALLEL_BUILD: Set to True to enable (default: False)
+    PARALLEL_BUILD_WORKERS: Worker processes (default: CPU count)
+    SHARDED_BUILD_DIR: Transformed content of a sharded build (set by its
+        coordinator)
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from pelican import signals
+
+from parallel_build.worker import init_worker, picklable_settings, transform
+from output_cache import is_cached
+from plugin_chain import is_processed, mark_processed
+from prefetch import wait_for_all_prefetch
+from prefetch.planner import PrefetchPlanner
+from sharded_build import transformed_path
+
+_log = logging.getLogger(__name__)
+
+# Global pool and the pending transformations, by absolute source path
+_executor: ProcessPoolExecutor | None = None
+_pending: dict[str, Future] = {}
+
+
+def start_workers(pelican):
+    """
+    Submit the plugin chain of every article to the process pool.
+
+    Args:
+        pelican: The Pelican instance
+    """
+    global _executor
+    settings = pelican.settings
+    if not settings.get("PARALLEL_BUILD", False):
+        return
+
+    wait_for_all_prefetch()
+
+    # Spawned workers don't inherit the build's threads (e.g. the background loop)
+    _executor = ProcessPoolExecutor(
+        max_workers=settings.get("PARALLEL_BUILD_WORKERS"),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(list(sys.path), picklable_settings(settings)),
+    )
+    for source_path in PrefetchPlanner.find_sources(settings):
+        if is_cached(source_path):
+            continue
+        _pending[source_path] = _executor.submit(transform, source_path)
+    _log.info(f"Processing {len(_pending)} articles in parallel")
+
+
+def use_worker_result(content):
+    """
+    Replace a content object's _content with the worker's transformation.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+    """
+    source_path = getattr(content, "source_path", None)
+    if not source_path or is_processed(content):
+        return
+
+    future = _pending.pop(os.path.abspath(source_path), None)
+    if future is not None:
+        try:
+            content._content = future.result()
+        except Exception:
+            # The plugins process the content in this process instead
+            _log.exception(f"Error processing {source_path} in a worker")
+            return
+        mark_processed(content)
+        return
+
+    # Final render of a sharded build
+    shared_dir = content.settings.get("SHARDED_BUILD_DIR")
+    if shared_dir:
+        relative_path = os.path.relpath(source_path, content.settings["PATH"])
+        output_path = transformed_path(shared_dir, relative_path)
+        if output_path.exists():
+            content._content = output_path.read_text(encoding="utf-8")
+            mark_processed(content)
+        else:
+            _log.info(f"Warning: No sharded build output for {relative_path}")
+
+
+def stop_workers(*_args, **_kwargs):
+    """Stop the worker processes when Pelican finishes."""
+    global _executor
+    for future in _pending.values():
+        future.cancel()
+    _pending.clear()
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def register():
+    """Register the plugin with Pelican."""
+    signals.initialized.connect(start_workers)
+    signals.content_object_init.connect(use_worker_result)
+    signals.finalized.connect(stop_workers)
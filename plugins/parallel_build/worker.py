@@ -0,0 +1,90 @@
+"""
+Parallel Build Worker
+
+Runs the content plugin chain for one article in a worker process. The worker
+loads and registers the same plugins as the build, so sending
+``content_object_init`` for a stand-in content object runs exactly the
+transformations Pelican would run.
+"""
+
+import atexit
+import logging
+import pickle
+import sys
+from types import SimpleNamespace
+from typing import Any
+
+from pelican import signals
+from pelican.plugins._utils import get_plugin_name, load_plugins
+from pelican.readers import MarkdownReader
+
+_log = logging.getLogger(__name__)
+
+# Plugins that coordinate the build rather than transform content
+COORDINATING_PLUGINS = {"output_cache", "prefetch", "parallel_build"}
+
+# Settings of the worker process, set by init_worker
+_settings: dict[str, Any] = {}
+
+
+def picklable_settings(settings: dict[str, Any]) -> dict[str, Any]:
+    """
+    Select the settings that can be sent to a worker process.
+
+    Args:
+        settings: Pelican settings
+
+    Returns:
+        Settings without values that can't be pickled, e.g. local functions
+    """
+    selected = {}
+    for key, value in settings.items():
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        selected[key] = value
+    return selected
+
+
+def init_worker(sys_path: list[str], settings: dict[str, Any]) -> None:
+    """
+    Prepare a worker process: import and register the content plugins.
+
+    Args:
+        sys_path: Module search path of the build process
+        settings: Picklable Pelican settings
+    """
+    global _settings
+    sys.path[:] = sys_path
+    _settings = settings
+
+    for plugin in load_plugins(settings):
+        if get_plugin_name(plugin) not in COORDINATING_PLUGINS:
+            plugin.register()
+
+    # Imported after the plugins, from the same search path
+    from background_loop import shutdown_background_loop
+
+    atexit.register(shutdown_background_loop)
+
+
+def transform(source_path: str) -> str:
+    """
+    Read an article and run the content plugin chain on it.
+
+    Args:
+        source_path: Absolute path of the article's source file
+
+    Returns:
+        The article's transformed ``_content``
+    """
+    content, metadata = MarkdownReader(_settings).read(source_path)
+    stand_in = SimpleNamespace(
+        _content=content,
+        settings=_settings,
+        source_path=source_path,
+        title=metadata.get("title", "Unknown"),
+    )
+    signals.content_object_init.send(stand_in)
+    return str(stand_in._content)
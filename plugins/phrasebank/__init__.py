@@ -8,6 +8,8 @@ semantic HTML definition lists (dl/dt/dd) with integrated TTS support.
 from pathlib import Path
 from pelican import signals
 
+from plugin_chain import is_processed
+
 from .processor import PhrasebankProcessor
 
 # Media file extensions to exclude from processing
@@ -21,7 +23,7 @@ def process_phrasebank(content):
 
     This is called by Pelican during content processing.
     """
-    if hasattr(content, "_content"):
+    if hasattr(content, "_content") and not is_processed(content):
         # Skip processing for media files
         source_path = getattr(content, 'source_path', '')
         if source_path:
@@ -29,11 +31,8 @@ def process_phrasebank(content):
             if file_ext in EXCLUDED_EXTENSIONS:
                 return
 
-        # Get SITEURL from settings
-        siteurl = content.settings.get("SITEURL", "")
-
         # Create processor instance
-        processor = PhrasebankProcessor(siteurl=siteurl)
+        processor = PhrasebankProcessor()
 
         # Process the content
         content._content = processor.process_content(content._content)
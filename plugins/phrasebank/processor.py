@@ -9,7 +9,7 @@ import hashlib
 import json
 import re
 
-import fugashi
+from morphology import contains_kanji, reading
 
 
 class PhrasebankProcessor:
@@ -26,16 +26,6 @@ class PhrasebankProcessor:
         r"^\s*-\s*(.+?):\s*(.+?)\s*\((.+?)\)\s*$", re.MULTILINE
     )
 
-    def __init__(self, siteurl: str = ""):
-        """Initialize the processor.
-
-        Args:
-            siteurl: The SITEURL from Pelican settings for generating correct paths
-        """
-        self.siteurl = siteurl
-        # Initialize fugashi tagger for furigana generation
-        self.tagger = fugashi.Tagger()  # type: ignore
-
     def extract_phrasebank_sections(
         self, content: str
     ) -> list[tuple[str, list[tuple[str, str, str]]]]:
@@ -124,23 +114,8 @@ class PhrasebankProcessor:
             answers = [phrase_jp]
 
             # If phrase contains kanji, add hiragana reading as alternative answer
-            if self._contains_kanji(phrase_jp):
-                # Parse with fugashi to get reading
-                words = self.tagger(phrase_jp)
-
-                # Build the hiragana reading
-                hiragana_parts = []
-                for w in words:
-                    # Get katakana reading and convert to hiragana
-                    kana = w.feature.kana if hasattr(w.feature, "kana") else None
-                    if kana:
-                        hiragana = self._katakana_to_hiragana(kana)
-                        hiragana_parts.append(hiragana)
-                    else:
-                        # Fallback to original if no reading available
-                        hiragana_parts.append(w.surface)
-
-                hiragana_reading = "".join(hiragana_parts)
+            if contains_kanji(phrase_jp):
+                hiragana_reading = reading(phrase_jp)
 
                 # Only add if different from original
                 if hiragana_reading != phrase_jp:
@@ -221,27 +196,6 @@ class PhrasebankProcessor:
             .replace("'", "&#x27;")
         )
 
-    @staticmethod
-    def _contains_kanji(text: str) -> bool:
-        """Check if text contains any kanji characters."""
-        kanji_pattern = re.compile(r"[\u4E00-\u9FFF\u3400-\u4DBF]")
-        return bool(kanji_pattern.search(text))
-
-    @staticmethod
-    def _katakana_to_hiragana(text: str) -> str:
-        """Convert katakana characters to hiragana."""
-        hiragana = []
-        for char in text:
-            code = ord(char)
-            # Katakana range: U+30A0 to U+30FF
-            # Hiragana range: U+3040 to U+309F
-            # Offset is 0x60 (96)
-            if 0x30A0 <= code <= 0x30FF:
-                hiragana.append(chr(code - 0x60))
-            else:
-                hiragana.append(char)
-        return "".join(hiragana)
-
     @staticmethod
     def _generate_quiz_item_id(question_text: str, answers: list[str]) -> str:
         """
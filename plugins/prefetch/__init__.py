@@ -0,0 +1,79 @@
+"""
+Prefetch Plugin for Pelican
+
+Starts the LLM, TTS and image generation of the whole site before any article
+is processed.
+
+Without it, each plugin generates an article's media inside
+content_object_init, so the work of the next article only starts once the
+current one is done. This plugin:
+1. Reads all source files when Pelican initializes
+2. Extracts their wordbank, TTS and Japanese text with the other plugins'
+   extractors and submits everything uncached at once
+3. Makes each article wait for its prefetched work before the other plugins
+   process it, so they find their results cached
+
+Must be listed after output_cache and before the plugins it prefetches for.
+"""
+
+import logging
+
+from pelican import signals
+
+from output_cache import is_cached
+from prefetch.planner import PrefetchPlanner
+
+_log = logging.getLogger(__name__)
+
+# Global planner instance
+_planner = PrefetchPlanner()
+
+
+def plan_generation(pelican):
+    """
+    Submit the generation work of all articles.
+
+    Args:
+        pelican: The Pelican instance
+    """
+    settings = pelican.settings
+    try:
+        # Articles served from the output cache need no generation
+        sources = [
+            source_path
+            for source_path in PrefetchPlanner.find_sources(settings)
+            if not is_cached(source_path)
+        ]
+        _planner.plan(settings, sources)
+    except Exception:
+        # Articles generate their own work as without this plugin
+        _log.exception("Error planning prefetched generation")
+
+
+def wait_for_prefetch(content):
+    """
+    Wait for the prefetched work of a content object.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+    """
+    source_path = getattr(content, "source_path", None)
+    if source_path:
+        _planner.wait(source_path)
+
+
+def wait_for_all_prefetch():
+    """Wait until the prefetched work of all articles is done."""
+    _planner.wait_all()
+
+
+def shutdown_planner(*_args, **_kwargs):
+    """Cancel unclaimed prefetch work when Pelican finishes."""
+    _planner.shutdown()
+
+
+def register():
+    """Register the plugin with Pelican."""
+    signals.initialized.connect(plan_generation)
+    signals.content_object_init.connect(wait_for_prefetch)
+    signals.finalized.connect(shutdown_planner)
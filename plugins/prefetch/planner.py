@@ -0,0 +1,207 @@
+"""
+Prefetch Planner
+
+Reads every source file before Pelican processes any article, finds the
+generation work the other plugins will need and starts all of it at once on the
+shared background loop.
+"""
+
+import concurrent.futures
+import logging
+import os
+import time
+from collections.abc import Coroutine
+from pathlib import Path
+from typing import Any
+
+from pelican.readers import MarkdownReader
+
+from background_loop import get_background_loop
+from japanese_processor import CACHE_ENABLED, CACHE_TTL
+from japanese_processor.processor import get_processor as get_japanese_processor
+from phrasebank.processor import PhrasebankProcessor
+from tts_filter import get_processor as get_tts_processor
+from wordbank_flashcards import get_processor as get_wordbank_processor
+
+_log = logging.getLogger(__name__)
+
+
+class PrefetchPlanner:
+    """Starts the generation work of all articles and tracks it per article."""
+
+    def __init__(self):
+        """Initialize the planner without any planned work."""
+        # Source path -> futures of the jobs the article waits for
+        self._pending: dict[str, list[concurrent.futures.Future]] = {}
+
+    def plan(self, settings: dict[str, Any], sources: list[str] | None = None) -> None:
+        """
+        Scan the source files and submit their generation work.
+
+        Each plugin gets one job covering the whole site, so requests of
+        different articles are deduplicated and batched together.
+
+        Args:
+            settings: Pelican settings
+            sources: Absolute source paths to plan for (default: all sources)
+        """
+        generate_content = settings.get("GENERATE_CONTENT", True)
+        phrasebank = PhrasebankProcessor()
+        wordbank = get_wordbank_processor(
+            generate_content, settings.get("WORDBANK_STORAGE", "jsonl")
+        )
+        tts = get_tts_processor(
+            generate_content, settings.get("TTS_AUDIO_SPRITES", False)
+        )
+        japanese = get_japanese_processor(
+            cache_enabled=CACHE_ENABLED, cache_ttl=CACHE_TTL
+        )
+
+        wordbank_contents: list[str] = []
+        tts_contents: list[str] = []
+        segments: list[str] = []
+        # Source path -> names of the jobs its article depends on
+        dependencies: dict[str, list[str]] = {}
+        for source_path, content in self._read_sources(settings, sources):
+            needs = []
+            if wordbank.extract_wordbank_sections(content):
+                wordbank_contents.append(content)
+                needs.append("wordbank")
+            # Phrasebank sections expand into <tts> tags
+            content = phrasebank.process_content(content)
+            if tts.extract_tts_sections(content):
+                tts_contents.append(content)
+                needs.append("tts")
+            article_segments = japanese.find_segments(content)
+            if article_segments:
+                segments.extend(article_segments)
+                needs.append("japanese")
+            dependencies[source_path] = needs
+
+        jobs: dict[str, Coroutine[Any, Any, None]] = {}
+        if wordbank_contents:
+            jobs["wordbank"] = wordbank.prefetch(wordbank_contents)
+        if tts_contents:
+            jobs["tts"] = tts.prefetch(tts_contents)
+        if segments:
+            jobs["japanese"] = japanese.prefetch(segments)
+        if not jobs:
+            return
+
+        _log.info(
+            f"Prefetching {', '.join(jobs)} work for {len(dependencies)} articles"
+        )
+        background_loop = get_background_loop()
+        futures = {
+            name: background_loop.submit(self._run(name, job))
+            for name, job in jobs.items()
+        }
+        for source_path, needs in dependencies.items():
+            self._pending[source_path] = [futures[name] for name in needs]
+
+    def wait(self, source_path: str) -> None:
+        """
+        Wait until the prefetched work of an article is done.
+
+        Args:
+            source_path: Path of the article's source file
+        """
+        futures = self._pending.pop(os.path.abspath(source_path), [])
+        if any(not future.done() for future in futures):
+            _log.info(f"Waiting for prefetched work of {source_path}")
+            concurrent.futures.wait(futures)
+
+    def wait_all(self, timeout: float | None = None) -> bool:
+        """
+        Wait until all prefetched work is done.
+
+        Args:
+            timeout: Maximum seconds to wait (default: no limit)
+
+        Returns:
+            True if all work is done, False if the timeout expired first
+        """
+        futures = {
+            future
+            for article_futures in self._pending.values()
+            for future in article_futures
+        }
+        _, not_done = concurrent.futures.wait(futures, timeout)
+        return not not_done
+
+    def shutdown(self) -> None:
+        """Cancel work nobody waited for."""
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending.clear()
+
+    @staticmethod
+    async def _run(name: str, job: Coroutine[Any, Any, None]) -> None:
+        """Run a job, logging failures - articles then generate what's missing."""
+        start = time.monotonic()
+        try:
+            await job
+        except Exception:
+            _log.exception(f"Error prefetching {name} work")
+            return
+        _log.info(f"Prefetched {name} work in {time.monotonic() - start:.1f}s")
+
+    @staticmethod
+    def find_sources(settings: dict[str, Any]) -> list[str]:
+        """
+        Find the markdown sources Pelican will read.
+
+        Args:
+            settings: Pelican settings
+
+        Returns:
+            Absolute source paths, in a stable order
+        """
+        content_path = Path(os.path.abspath(settings["PATH"]))
+        static_paths = [
+            content_path / path for path in settings.get("STATIC_PATHS", [])
+        ]
+        extensions = {f".{extension}" for extension in MarkdownReader.file_extensions}
+
+        sources = []
+        for directory, subdirectories, filenames in os.walk(content_path):
+            # Static files are copied as they are
+            subdirectories[:] = sorted(
+                name
+                for name in subdirectories
+                if Path(directory) / name not in static_paths
+            )
+            sources.extend(
+                os.path.join(directory, filename)
+                for filename in sorted(filenames)
+                if Path(filename).suffix.lower() in extensions
+            )
+        return sources
+
+    @staticmethod
+    def _read_sources(
+        settings: dict[str, Any], source_paths: list[str] | None = None
+    ) -> list[tuple[str, str]]:
+        """
+        Read the markdown sources the way Pelican will.
+
+        Args:
+            settings: Pelican settings
+            source_paths: Absolute source paths to read (default: all sources)
+
+        Returns:
+            List of (absolute source path, HTML content) tuples
+        """
+        reader = MarkdownReader(settings)
+        if source_paths is None:
+            source_paths = PrefetchPlanner.find_sources(settings)
+        sources = []
+        for source_path in source_paths:
+            try:
+                content, _ = reader.read(source_path)
+            except Exception as e:
+                _log.info(f"Warning: Failed to read {source_path}: {e}")
+                continue
+            sources.append((source_path, content))
+        return sources
@@ -10,12 +10,16 @@ This plugin:
 3. Replaces TTS tags with HTML audio elements (inline or full player)
 """
 
-import asyncio
 import logging
 from pathlib import Path
 
 from pelican import signals
 
+from audio import get_audio_metadata
+from background_loop import get_background_loop, shutdown_background_loop
+from media_index import get_media_index
+from plugin_chain import is_processed
+from site_url import resolve_written_file
 from tts_filter.processor import TTSProcessor
 
 _log = logging.getLogger(__name__)
@@ -38,34 +42,28 @@ EXCLUDED_EXTENSIONS = {
 
 # Global processor instance to share cache across all articles
 _processor = None
-_current_siteurl = None
-_event_loop = None
+_current_options = None
 
 
-def get_processor(siteurl: str = "", generate_content: bool = True):
+def get_processor(generate_content: bool = True, sprite_mode: bool = False):
     """Get or create the global TTSProcessor instance.
 
+    The processor doesn't depend on SITEURL, so it and its cache are kept across
+    builds with different SITEURLs.
+
     Args:
-        siteurl: The SITEURL from Pelican settings
         generate_content: If True, generate audio files; if False, use cached files only
+        sprite_mode: If True, pack inline snippets of each article into one audio sprite
     """
-    global _processor, _current_siteurl
-    # Recreate processor if SITEURL has changed or generate_content settings changed
-    if _processor is None or _current_siteurl != siteurl:
-        _processor = TTSProcessor(siteurl, not generate_content)
-        _current_siteurl = siteurl
+    global _processor, _current_options
+    # Recreate processor if the generate_content or sprite settings changed
+    options = (generate_content, sprite_mode)
+    if _processor is None or _current_options != options:
+        _processor = TTSProcessor(not generate_content, sprite_mode)
+        _current_options = options
     return _processor
 
 
-def get_event_loop():
-    """Get or create a persistent event loop for the plugin."""
-    global _event_loop
-    if _event_loop is None or _event_loop.is_closed():
-        _event_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(_event_loop)
-    return _event_loop
-
-
 def process_tts_content(content):
     """
     Process TTS sections in article content.
@@ -77,7 +75,7 @@ def process_tts_content(content):
         content: The Pelican content object (Article or Page)
     """
     # Only process if the content has a _content attribute (contains the markdown)
-    if not hasattr(content, "_content"):
+    if not hasattr(content, "_content") or is_processed(content):
         return
 
     # Skip processing for media files
@@ -87,20 +85,19 @@ def process_tts_content(content):
         if file_ext in EXCLUDED_EXTENSIONS:
             return
 
-    # Get SITEURL and generate_content from settings
-    siteurl = ""
+    # Get generate_content and sprite mode from settings
     generate_content = True
+    sprite_mode = False
     if hasattr(content, "settings"):
-        siteurl = content.settings.get("SITEURL", "")
         generate_content = content.settings.get("GENERATE_CONTENT", True)
+        sprite_mode = content.settings.get("TTS_AUDIO_SPRITES", False)
 
-    # Get the processor with the correct SITEURL and generate_content
-    processor = get_processor(siteurl, generate_content)
+    # Get the processor with the correct generate_content and sprite mode
+    processor = get_processor(generate_content, sprite_mode)
 
-    # Process the content using a persistent event loop
+    # Process the content on the shared background loop
     try:
-        loop = get_event_loop()
-        processed_content = loop.run_until_complete(
+        processed_content = get_background_loop().run(
             processor.process_content(content._content)
         )
         content._content = processed_content
@@ -110,12 +107,14 @@ def process_tts_content(content):
         )
 
 
-def cleanup_event_loop(*_args, **_kwargs):
-    """Clean up the event loop when Pelican finishes."""
-    global _event_loop
-    if _event_loop is not None and not _event_loop.is_closed():
-        _event_loop.close()
-        _event_loop = None
+def save_audio_metadata(*_args, **_kwargs):
+    """Write audio metadata still buffered when Pelican finishes."""
+    get_audio_metadata().flush()
+
+
+def reset_media_index(*_args, **_kwargs):
+    """Forget the media listings, so the next build (e.g. on autoreload) rescans."""
+    get_media_index().clear()
 
 
 def register():
@@ -126,4 +125,8 @@ def register():
     which fires when a content object is initialized but before it's fully processed.
     """
     signals.content_object_init.connect(process_tts_content)
-    signals.finalized.connect(cleanup_event_loop)
+    signals.content_written.connect(resolve_written_file)
+    signals.feed_written.connect(resolve_written_file)
+    signals.finalized.connect(shutdown_background_loop)
+    signals.finalized.connect(save_audio_metadata)
+    signals.finalized.connect(reset_media_index)
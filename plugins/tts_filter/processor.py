@@ -7,13 +7,17 @@ and generation of HTML audio elements.
 
 import asyncio
 import hashlib
+import json
 import logging
 import re
 from collections.abc import Coroutine
 from pathlib import Path
 from typing import Any, TypedDict, cast
 
-from tts import TTS
+from audio import clip_key, get_audio_metadata
+from media_index import get_media_index
+from site_url import SITEURL_PLACEHOLDER
+from tts import TTS, audio_sources, build_sprite
 
 _log = logging.getLogger(__name__)
 
@@ -45,15 +49,18 @@ class TTSProcessor:
         re.DOTALL | re.IGNORECASE,
     )
 
-    def __init__(self, siteurl: str = "", dev_mode: bool = False):
+    def __init__(self, dev_mode: bool = False, sprite_mode: bool = False):
         """Initialize the processor with a TTS instance.
 
+        URLs in the generated HTML start with the SITEURL placeholder.
+
         Args:
-            siteurl: The SITEURL from Pelican settings for generating correct paths
             dev_mode: If True, skip audio generation and only generate HTML from cached files
+            sprite_mode: If True, pack all inline snippets of an article into a single
+                audio sprite instead of one audio file per snippet
         """
-        self.siteurl = siteurl
         self.dev_mode = dev_mode
+        self.sprite_mode = sprite_mode
         self.tts = None if dev_mode else TTS()
         # Cache to store generated audio files during processing
         self._audio_cache = {}
@@ -126,7 +133,7 @@ class TTSProcessor:
             return self._audio_cache[cache_key]
 
         # Check if file already exists on disk
-        if output_path.exists():
+        if get_media_index().exists(output_path):
             _log.info(f"Using cached audio file: {filename}")
             self._audio_cache[cache_key] = output_path
             return output_path
@@ -153,6 +160,45 @@ class TTSProcessor:
 
             return output_path
 
+    async def generate_audio_batch(
+        self, texts: list[str], voice: str | None = None
+    ) -> None:
+        """
+        Pre-generate audio for short snippets with batched TTS requests.
+
+        Snippets that are already cached or on disk are skipped. Failures are only
+        logged - ``generate_audio`` generates any clip still missing afterwards.
+
+        Args:
+            texts: Snippet texts, in page order
+            voice: Optional voice name used for every snippet
+        """
+        if self.dev_mode:
+            return
+
+        media_index = get_media_index()
+        pending = []
+        for text in dict.fromkeys(texts):
+            output_path = self.audio_base_path / self.generate_audio_filename(text)
+            if (text, voice) in self._audio_cache or media_index.exists(output_path):
+                continue
+            pending.append((text, output_path))
+
+        # A single snippet gains nothing from batching
+        if len(pending) < 2:
+            return
+
+        try:
+            assert self.tts is not None
+            if voice:
+                await self.tts.generate_batch(pending, voice=voice)
+            else:
+                await self.tts.generate_batch(pending)
+        except Exception:
+            _log.exception(
+                f"Error generating batched audio for {len(pending)} snippets"
+            )
+
     def parse_speakers_config(self, speakers_str: str) -> dict[str, str]:
         """
         Parse the speakers attribute string into a speaker-to-voice mapping.
@@ -267,7 +313,7 @@ class TTSProcessor:
             return self._audio_cache[cache_key]
 
         # Check if file already exists on disk
-        if output_path.exists():
+        if get_media_index().exists(output_path):
             _log.info(f"Using cached dialogue audio file: {filename}")
             self._audio_cache[cache_key] = output_path
             return output_path
@@ -277,11 +323,11 @@ class TTSProcessor:
             self._audio_cache[cache_key] = output_path
             return output_path
 
-        # Generate the audio file
+        # Generate the audio file turn by turn - unchanged turns come from cache
         _log.info(f"Generating dialogue audio with {len(dialogue)} turns...")
         try:
             assert self.tts is not None
-            await self.tts.generate_dialogue(speaker_cfg, dialogue, output_path)
+            await self.tts.generate_dialogue_turns(speaker_cfg, dialogue, output_path)
             self._audio_cache[cache_key] = output_path
             return output_path
         except Exception:
@@ -289,6 +335,85 @@ class TTSProcessor:
 
             return output_path
 
+    def generate_sources_html(self, audio_filename: str, indent: str = "") -> str:
+        """
+        Generate <source> elements for every encoding of a clip that exists on disk.
+
+        Sources are listed in encoding ladder order, so browsers pick the most
+        efficient format they support and fall back to AAC otherwise.
+
+        Args:
+            audio_filename: The primary audio filename (not full path)
+            indent: Prefix added to each line
+
+        Returns:
+            HTML string with one <source> element per line
+        """
+        audio_file_path = self.audio_base_path / audio_filename
+        subdir = Path(audio_filename).parent
+        return "\n".join(
+            f'{indent}<source src="{SITEURL_PLACEHOLDER}/audio/tts/{(subdir / filename).as_posix()}" type="{mime_type}">'
+            for filename, mime_type in audio_sources(audio_file_path)
+        )
+
+    def generate_player_attrs(self, audio_filename: str) -> str:
+        """
+        Generate build-time player hints for an audio element.
+
+        Duration and waveform peaks are recorded when a clip is generated. The
+        theme's audio-players.js shows them next to the player, so players can
+        lay out without fetching audio metadata and preload="none" is safe.
+
+        Args:
+            audio_filename: The primary audio filename (not full path)
+
+        Returns:
+            Attribute string (with leading space), or empty string if unknown
+        """
+        metadata = get_audio_metadata().get(clip_key(self.audio_base_path / audio_filename))
+        if not metadata or "duration" not in metadata or "peaks" not in metadata:
+            return ""
+
+        peaks = ",".join(f"{peak:g}" for peak in metadata["peaks"])
+        return f' preload="none" data-duration="{metadata["duration"]}" data-peaks="{peaks}"'
+
+    async def get_sprite(
+        self, audio_paths: list[Path]
+    ) -> tuple[str, list[dict[str, float]]] | None:
+        """
+        Get or build the audio sprite for a list of inline clips.
+
+        The sprite is named after the clips it contains, so an article's sprite is
+        only rebuilt when its set of snippets changes. The individual clips stay on
+        disk as build inputs.
+
+        Args:
+            audio_paths: Paths of the clips, in page order
+
+        Returns:
+            Tuple of (sprite filename relative to the TTS audio dir, offset table),
+            or None if the sprite couldn't be built
+        """
+        clip_ids = "\n".join(path.stem for path in audio_paths)
+        sprite_hash = hashlib.md5(clip_ids.encode("utf-8")).hexdigest()
+        sprite_path = self.audio_base_path / "sprites" / f"{sprite_hash}.aac"
+        sprite_filename = f"sprites/{sprite_path.name}"
+
+        metadata = get_audio_metadata()
+        entry = metadata.get(clip_key(sprite_path))
+        if get_media_index().exists(sprite_path) and entry and "segments" in entry:
+            return sprite_filename, entry["segments"]
+
+        _log.info(f"Building audio sprite with {len(audio_paths)} clips...")
+        try:
+            segments = await asyncio.to_thread(build_sprite, audio_paths, sprite_path)
+        except Exception:
+            _log.exception("Error building audio sprite")
+            return None
+
+        metadata.update(clip_key(sprite_path), {"segments": segments})
+        return sprite_filename, segments
+
     def generate_inline_html(self, text: str, audio_filename: str) -> str:
         """
         Generate inline HTML with hidden audio and speaker icon link.
@@ -302,18 +427,18 @@ class TTSProcessor:
         """
         # Check if audio file exists
         audio_file_path = self.audio_base_path / audio_filename
-        if not audio_file_path.exists():
+        if not get_media_index().exists(audio_file_path):
             _log.info(
                 f"Warning: Audio file not found for inline TTS - skipping audio button: {audio_filename}"
             )
             return text
 
-        audio_path = f"{self.siteurl}/audio/tts/{audio_filename}"
-        speaker_icon_path = f"{self.siteurl}/images/audio-speaker.svg"
+        sources_html = self.generate_sources_html(audio_filename, indent="    ")
+        speaker_icon_path = f"{SITEURL_PLACEHOLDER}/images/audio-speaker.svg"
 
         # Don't escape the text - it's still markdown at this point and will be processed later
-        html = f"""<audio class="tts-audio" style="display: none;">
-    <source src="{audio_path}" type="audio/aac">
+        html = f"""<audio class="tts-audio" preload="none" style="display: none;">
+{sources_html}
     Your browser does not support the audio element.
 </audio>
 <a href="#" class="tts-audio-btn" style="text-decoration: none; border: none;" aria-label="Play pronunciation" onclick="event.preventDefault(); this.previousElementSibling.play();">
@@ -322,6 +447,45 @@ class TTSProcessor:
 
         return html
 
+    def generate_sprite_inline_html(
+        self, text: str, sprite_id: str, segment: dict[str, float]
+    ) -> str:
+        """
+        Generate inline HTML with a speaker icon that plays a segment of the page sprite.
+
+        Args:
+            text: The original text content
+            sprite_id: The id of the page's sprite <audio> element
+            segment: The snippet's {"start", "end"} offsets in seconds
+
+        Returns:
+            HTML string with speaker icon followed by the text
+        """
+        speaker_icon_path = f"{SITEURL_PLACEHOLDER}/images/audio-speaker.svg"
+
+        # Don't escape the text - it's still markdown at this point and will be processed later
+        html = f"""<a href="#" class="tts-audio-btn tts-sprite-btn" style="text-decoration: none; border: none;" aria-label="Play pronunciation" data-sprite="{sprite_id}" data-start="{segment["start"]}" data-end="{segment["end"]}">
+    <img src="{speaker_icon_path}" alt="Play" width="16" height="16" style="vertical-align: middle;">
+</a>{text}"""
+
+        return html
+
+    def generate_sprite_audio_html(self, sprite_id: str, sprite_filename: str) -> str:
+        """
+        Generate the hidden <audio> element holding a page's sprite.
+
+        Args:
+            sprite_id: Element id referenced by the sprite buttons
+            sprite_filename: Sprite filename relative to the TTS audio dir
+
+        Returns:
+            HTML string with the sprite audio element
+        """
+        sources_html = self.generate_sources_html(sprite_filename, indent="    ")
+        return f"""<audio class="tts-sprite" id="{sprite_id}" preload="metadata" style="display: none;">
+{sources_html}
+</audio>"""
+
     def generate_full_html(self, text: str, audio_filename: str) -> str:
         """
         Generate full HTML with text and audio player with controls.
@@ -335,19 +499,21 @@ class TTSProcessor:
         """
         # Check if audio file exists
         audio_file_path = self.audio_base_path / audio_filename
-        if not audio_file_path.exists():
+        if not get_media_index().exists(audio_file_path):
             _log.info(
                 f"Warning: Audio file not found for full TTS - skipping audio controls: {audio_filename}"
             )
             return text
 
-        audio_path = f"{self.siteurl}/audio/tts/{audio_filename}"
+        sources_html = self.generate_sources_html(audio_filename, indent="        ")
+
+        player_attrs = self.generate_player_attrs(audio_filename)
 
         # Don't escape the text - it's still markdown at this point and will be processed later
         html = f"""{text}
 <div style="margin-top: 1em;">
-    <audio controls class="tts-audio-full">
-        <source src="{audio_path}" type="audio/aac">
+    <audio controls class="tts-audio-full"{player_attrs}>
+{sources_html}
         Your browser does not support the audio element.
     </audio>
 </div>"""
@@ -355,7 +521,7 @@ class TTSProcessor:
         return html
 
     def generate_dialogue_html(
-        self, dialogue: list[tuple[str, str]], audio_filename: str
+        self, dialogue: list[tuple[str, str]], audio_filename: str, occurrence: int = 0
     ) -> str:
         """
         Generate HTML for dialogue using definition list structure with audio player.
@@ -363,13 +529,16 @@ class TTSProcessor:
         Args:
             dialogue: List of (speaker, text) tuples
             audio_filename: The audio filename (not full path)
+            occurrence: Number of earlier occurrences of the same dialogue on
+                the page, which keeps the element ids unique
 
         Returns:
-            HTML string with formatted dialogue as <dl> and audio player
+            HTML string with formatted dialogue as <dl> and audio player, plus a
+            JSON timing table for per-line playback when turn timings are known
         """
         # Check if audio file exists
         audio_file_path = self.audio_base_path / audio_filename
-        if not audio_file_path.exists():
+        if not get_media_index().exists(audio_file_path):
             _log.info(
                 f"Warning: Audio file not found for dialogue TTS - skipping audio controls: {audio_filename}"
             )
@@ -377,29 +546,117 @@ class TTSProcessor:
             dialogue_lines = [f"- {speaker}: {text}" for speaker, text in dialogue]
             return "\n".join(dialogue_lines)
 
-        audio_path = f"{self.siteurl}/audio/tts/{audio_filename}"
+        sources_html = self.generate_sources_html(audio_filename, indent="        ")
+        player_attrs = self.generate_player_attrs(audio_filename)
+
+        # Turn timings are recorded when the dialogue is synthesized turn by turn;
+        # older dialogue clips have none and only get the full player
+        metadata = get_audio_metadata().get(clip_key(audio_file_path)) or {}
+        timings = metadata.get("turns")
+        if timings is not None and len(timings) != len(dialogue):
+            _log.info(
+                f"Warning: Timing table doesn't match dialogue turns - ignoring: {audio_filename}"
+            )
+            timings = None
 
         # Build definition list HTML structure
         dl_items = []
-        for speaker, text in dialogue:
+        for i, (speaker, text) in enumerate(dialogue):
             # Don't escape - the text will be processed by other Pelican plugins (like furigana)
             dl_items.append(f"    <dt>{speaker}</dt>")
-            dl_items.append(f"    <dd>{text}</dd>")
+            if timings:
+                dl_items.append(
+                    f'    <dd data-turn="{i}" data-start="{timings[i]["start"]}" data-end="{timings[i]["end"]}">{text}</dd>'
+                )
+            else:
+                dl_items.append(f"    <dd>{text}</dd>")
 
         dialogue_html = "\n".join(dl_items)
 
-        html = f"""<dl class="dialogue">
+        if not timings:
+            return f"""<dl class="dialogue">
 {dialogue_html}
 </dl>
 <div class="dialogue-audio">
-    <audio controls class="tts-audio-dialogue">
-        <source src="{audio_path}" type="audio/aac">
+    <audio controls class="tts-audio-dialogue"{player_attrs}>
+{sources_html}
         Your browser does not support the audio element.
     </audio>
 </div>"""
 
+        dialogue_id = f"dialogue-{Path(audio_filename).stem[:12]}"
+        if occurrence:
+            dialogue_id = f"{dialogue_id}-{occurrence}"
+        timings_json = json.dumps(timings, ensure_ascii=False)
+
+        html = f"""<dl class="dialogue" data-dialogue-id="{dialogue_id}">
+{dialogue_html}
+</dl>
+<div class="dialogue-audio">
+    <audio controls class="tts-audio-dialogue" id="{dialogue_id}-audio"{player_attrs}>
+{sources_html}
+        Your browser does not support the audio element.
+    </audio>
+</div>
+<script type="application/json" class="dialogue-timings" id="{dialogue_id}-timings">
+    {timings_json}
+</script>"""
+
         return html
 
+    async def prefetch(self, contents: list[str]) -> None:
+        """
+        Generate the audio of the TTS sections of many documents up front.
+
+        Sections repeated across documents are generated once, and inline
+        snippets of all documents are batched per voice. The clips land on
+        disk and in the audio cache, where ``process_content`` finds them.
+        Invalid sections are skipped here and reported by ``process_content``.
+
+        Args:
+            contents: The markdown content of each document
+        """
+        if self.dev_mode:
+            return
+
+        tasks: dict[tuple[str, str | None], Coroutine[Any, Any, Path]] = {}
+        inline_texts: dict[str | None, list[str]] = {}
+        for content in contents:
+            for _, tts_type, voice, speakers, text_content in self.extract_tts_sections(
+                content
+            ):
+                if tts_type != "dialogue":
+                    if tts_type == "inline":
+                        inline_texts.setdefault(voice, []).append(text_content)
+                    if (text_content, voice) not in tasks:
+                        tasks[(text_content, voice)] = self.generate_audio(
+                            text_content, voice
+                        )
+                    continue
+
+                if not speakers or (text_content, speakers) in tasks:
+                    continue
+                try:
+                    speaker_cfg = self.parse_speakers_config(speakers)
+                    dialogue = self.parse_dialogue_content(text_content)
+                    self.validate_dialogue_speakers(dialogue, speaker_cfg)
+                except ValueError:
+                    continue
+                tasks[(text_content, speakers)] = self.generate_dialogue_audio(
+                    dialogue, speaker_cfg
+                )
+
+        await asyncio.gather(
+            *(
+                self.generate_audio_batch(texts, voice)
+                for voice, texts in inline_texts.items()
+            )
+        )
+        if tasks:
+            _log.info(f"Prefetching audio for {len(tasks)} TTS sections...")
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await get_audio_metadata().save()
+
     async def process_content(self, content: str) -> str:
         """
         Process content: extract TTS sections, generate audio, and generate HTML.
@@ -421,6 +678,8 @@ class TTSProcessor:
         # Prepare all sections and validate them first
         tasks: list[Coroutine[Any, Any, Path]] = []
         section_data: list[DialogueSectionData | SimpleSectionData] = []
+        # Inline snippets grouped by voice, for batched generation
+        inline_texts: dict[str | None, list[str]] = {}
 
         for full_match, tts_type, voice, speakers, text_content in sections:
             try:
@@ -454,6 +713,8 @@ class TTSProcessor:
                     )
                 else:
                     # Handle inline and full types
+                    if tts_type == "inline":
+                        inline_texts.setdefault(voice, []).append(text_content)
                     task = self.generate_audio(text_content, voice)
                     tasks.append(task)
                     section_data.append(
@@ -469,12 +730,49 @@ class TTSProcessor:
                 _log.info(f"Skipping section: {full_match[:100]}...")
                 continue
 
+        # Short inline snippets are synthesized in batched requests first; the
+        # per-section tasks below then find their clips on disk
+        if inline_texts:
+            await asyncio.gather(
+                *(
+                    self.generate_audio_batch(texts, voice)
+                    for voice, texts in inline_texts.items()
+                )
+            )
+
         # Generate all audio files concurrently
         if tasks:
             _log.info(f"Generating audio for {len(tasks)} TTS sections concurrently...")
             audio_paths = await asyncio.gather(*tasks, return_exceptions=True)
 
+            # In sprite mode, pack the inline snippets that have audio into one file
+            sprite_segments: dict[int, dict[str, float]] = {}
+            sprite_id = ""
+            sprite_html = ""
+            if self.sprite_mode:
+                inline_indexes = [
+                    i
+                    for i, (audio_result, section_info) in enumerate(
+                        zip(audio_paths, section_data)
+                    )
+                    if section_info["type"] == "inline"
+                    and isinstance(audio_result, Path)
+                    and get_media_index().exists(audio_result)
+                ]
+                if len(inline_indexes) > 1:
+                    sprite = await self.get_sprite(
+                        [cast(Path, audio_paths[i]) for i in inline_indexes]
+                    )
+                    if sprite is not None:
+                        sprite_filename, segments = sprite
+                        sprite_id = f"tts-sprite-{Path(sprite_filename).stem[:12]}"
+                        sprite_segments = dict(zip(inline_indexes, segments))
+                        sprite_html = self.generate_sprite_audio_html(
+                            sprite_id, sprite_filename
+                        )
+
             # Process results and generate HTML
+            dialogue_occurrences: dict[str, int] = {}
             for i, (audio_result, section_info) in enumerate(
                 zip(audio_paths, section_data)
             ):
@@ -495,21 +793,36 @@ class TTSProcessor:
                         # Type narrowing: section_info is DialogueSectionData
                         dialogue_section = cast(DialogueSectionData, section_info)
                         dialogue = dialogue_section["dialogue"]
-                        html = self.generate_dialogue_html(dialogue, audio_filename)
+                        occurrence = dialogue_occurrences.get(audio_filename, 0)
+                        dialogue_occurrences[audio_filename] = occurrence + 1
+                        html = self.generate_dialogue_html(
+                            dialogue, audio_filename, occurrence
+                        )
                     elif tts_type == "full":
                         text_content = section_info["text_content"]
                         html = self.generate_full_html(text_content, audio_filename)
+                    elif i in sprite_segments:
+                        text_content = section_info["text_content"]
+                        html = self.generate_sprite_inline_html(
+                            text_content, sprite_id, sprite_segments[i]
+                        )
                     else:  # inline (default)
                         text_content = section_info["text_content"]
                         html = self.generate_inline_html(text_content, audio_filename)
 
-                    # Replace the TTS section with HTML
-                    content = content.replace(full_match, html)
+                    # Replace the TTS section with HTML; a repeated section is
+                    # replaced occurrence by occurrence
+                    content = content.replace(full_match, html, 1)
 
                 except Exception:
                     _log.exception("Error processing TTS section result")
                     continue
 
+            if sprite_html:
+                content = f"{content}\n{sprite_html}"
+
+        # Persist the metadata of the article's new clips in one write
+        await get_audio_metadata().save()
         return content
 
     @staticmethod
@@ -6,7 +6,7 @@ flashcard widgets with images.
 
 This plugin:
 1. Extracts word entries from wordbank sections
-2. Propagates them to the site-wide wordbank database using WordBank.propagate()
+2. Propagates them to the site-wide wordbank database using WordBank.propagate_many()
 3. Generates HTML flashcards with images and interactive flip functionality
 """
 
@@ -15,6 +15,10 @@ from pathlib import Path
 
 from pelican import signals
 
+from background_loop import shutdown_background_loop
+from image_derivatives import get_image_derivatives
+from plugin_chain import is_processed
+from site_url import resolve_written_file
 from wordbank_flashcards.processor import WordbankProcessor
 
 _log = logging.getLogger(__name__)
@@ -38,21 +42,27 @@ EXCLUDED_EXTENSIONS = {
 
 # Global processor instance to share cache across all articles
 _processor = None
-_current_siteurl = None
+_current_options = None
 
 
-def get_processor(siteurl: str = "", generate_content: bool = True):
+def get_processor(generate_content: bool = True, storage: str = "jsonl"):
     """Get or create the global WordbankProcessor instance.
 
+    The processor doesn't depend on SITEURL, so it and its cache are kept across
+    builds with different SITEURLs.
+
     Args:
-        siteurl: The SITEURL from Pelican settings
         generate_content: If True, generate images/audio; if False, use cached data only
+        storage: Wordbank storage engine ("jsonl" or "sqlite")
     """
-    global _processor, _current_siteurl
-    # Recreate processor if SITEURL has changed or generate_content settings changed
-    if _processor is None or _current_siteurl != siteurl:
-        _processor = WordbankProcessor(siteurl, not generate_content)
-        _current_siteurl = siteurl
+    global _processor, _current_options
+    # Recreate processor if the generate_content or storage settings changed
+    options = (generate_content, storage)
+    if _processor is None or _current_options != options:
+        if _processor is not None:
+            _processor.wordbank.close()
+        _processor = WordbankProcessor(not generate_content, storage)
+        _current_options = options
     return _processor
 
 
@@ -67,7 +77,7 @@ def process_wordbank_content(content):
         content: The Pelican content object (Article or Page)
     """
     # Only process if the content has a _content attribute (contains the markdown)
-    if not hasattr(content, "_content"):
+    if not hasattr(content, "_content") or is_processed(content):
         return
 
     # Skip processing for media files
@@ -77,15 +87,15 @@ def process_wordbank_content(content):
         if file_ext in EXCLUDED_EXTENSIONS:
             return
 
-    # Get SITEURL and generate_content from settings
-    siteurl = ""
+    # Get generate_content and the storage engine from settings
     generate_content = True
+    storage = "jsonl"
     if hasattr(content, "settings"):
-        siteurl = content.settings.get("SITEURL", "")
         generate_content = content.settings.get("GENERATE_CONTENT", True)
+        storage = content.settings.get("WORDBANK_STORAGE", "jsonl")
 
-    # Get the processor with the correct SITEURL and generate_content
-    processor = get_processor(siteurl, generate_content)
+    # Get the processor with the correct generate_content and storage engine
+    processor = get_processor(generate_content, storage)
 
     # Process the content
     try:
@@ -97,6 +107,13 @@ def process_wordbank_content(content):
         )
 
 
+def close_wordbank(*_args, **_kwargs):
+    """Sync the wordbank record log and stop image workers when Pelican finishes."""
+    if _processor is not None:
+        _processor.wordbank.close()
+    get_image_derivatives().shutdown()
+
+
 def register():
     """
     Plugin registration - required by Pelican.
@@ -105,3 +122,7 @@ def register():
     which fires when a content object is initialized but before it's fully processed.
     """
     signals.content_object_init.connect(process_wordbank_content)
+    signals.content_written.connect(resolve_written_file)
+    signals.feed_written.connect(resolve_written_file)
+    signals.finalized.connect(close_wordbank)
+    signals.finalized.connect(shutdown_background_loop)
@@ -5,22 +5,27 @@ Handles parsing of wordbank sections, propagation to the wordbank database,
 and generation of interactive HTML flashcards.
 """
 
-import asyncio
 import hashlib
 import json
 import logging
 import re
 from pathlib import Path
 
-import fugashi
 from tqdm import tqdm
 
-from wordbank import WordBank, WordbankWordDetails
+from background_loop import get_background_loop
+from image_derivatives import get_image_derivatives
+from media_index import get_media_index
+from morphology import contains_kanji, reading
+from site_url import SITEURL_PLACEHOLDER
+from tts import audio_sources
+from wordbank import WordBank, WordbankWordDetails, image_path
 
 _log = logging.getLogger(__name__)
 
-# Batch size for concurrent propagation
-PROPAGATE_BATCH_SIZE = 15
+# Rendered width of flashcard images: cards fill a grid column of at least 280px
+# and are 360px tall, and the square image covers the card
+FLASHCARD_IMAGE_SIZES = "(max-width: 600px) 100vw, 400px"
 
 
 class WordbankProcessor:
@@ -37,20 +42,19 @@ class WordbankProcessor:
         r"^\s*-\s*(.+?):\s*(.+?)\s*\((.+?)\)\s*$", re.MULTILINE
     )
 
-    def __init__(self, siteurl: str = "", dev_mode: bool = False):
+    def __init__(self, dev_mode: bool = False, storage: str = "jsonl"):
         """Initialize the processor with a WordBank instance.
 
+        URLs in the generated HTML start with the SITEURL placeholder.
+
         Args:
-            siteurl: The SITEURL from Pelican settings for generating correct paths
             dev_mode: If True, skip word propagation and only generate HTML from cache
+            storage: Wordbank storage engine ("jsonl" or "sqlite")
         """
-        self.wordbank = WordBank()
-        self.siteurl = siteurl
+        self.wordbank = WordBank(storage=storage)
         self.dev_mode = dev_mode
         # Cache to store propagated words during first pass
         self._propagated_cache = {}
-        # Initialize fugashi tagger for furigana generation
-        self.tagger = fugashi.Tagger()  # type: ignore
 
     def extract_wordbank_sections(
         self, content: str
@@ -89,77 +93,69 @@ class WordbankProcessor:
         self, words: list[tuple[str, str, str]]
     ) -> list[WordbankWordDetails]:
         """
-        Propagate words to the wordbank database using async batch processing.
+        Propagate words to the wordbank database.
+
+        Words not yet seen in this session are propagated together with
+        ``WordBank.propagate_many``, which generates their details in a few
+        multi-word LLM requests.
 
         Args:
             words: List of (japanese_word, english_translation, context) tuples
 
         Returns:
-            List of WordbankWordDetails objects
+            List of WordbankWordDetails objects, without the words whose
+            generation failed
         """
-        results = []
-
-        # Process words in batches for better concurrency control
         with tqdm(
             total=len(words),
             desc="Processing wordbank entries",
             unit="word",
             leave=False,
         ) as pbar:
-            for i in range(0, len(words), PROPAGATE_BATCH_SIZE):
-                batch = words[i : i + PROPAGATE_BATCH_SIZE]
-                batch_tasks = []
-
-                for japanese_word, english_translation, context in batch:
-                    cache_key = (japanese_word, english_translation)
-
-                    # Check if we already propagated this word in this session
-                    if cache_key in self._propagated_cache:
-                        results.append(self._propagated_cache[cache_key])
-                        pbar.update(1)
-                        continue
-
-                    # In dev mode, only fetch from cache without propagating
-                    if self.dev_mode:
-                        details = self.wordbank.get(japanese_word, english_translation)
-                        if details is None:
-                            # Word not in cache - skip image/audio generation in dev mode
-                            # Create minimal details object for HTML generation
-                            details = WordbankWordDetails(
-                                word=japanese_word,
-                                en_translation=english_translation,
-                                language_code="ja",  # Default to Japanese
-                                examples=[],
-                                description=context,
-                                image_description="",  # Empty in dev mode
-                            )
-                        # Cache the result
-                        self._propagated_cache[cache_key] = details
-                        results.append(details)
-                        pbar.update(1)
-                    else:
-                        # Production mode: Propagate the word (generates images/audio) asynchronously
-                        batch_tasks.append(
-                            (
-                                cache_key,
-                                self.wordbank.propagate(
-                                    japanese_word, english_translation, context
-                                ),
-                            )
+            to_propagate = []
+            for japanese_word, english_translation, context in words:
+                cache_key = (japanese_word, english_translation)
+
+                # Check if we already propagated this word in this session
+                if cache_key in self._propagated_cache:
+                    pbar.update(1)
+                    continue
+
+                # In dev mode, only fetch from cache without propagating
+                if self.dev_mode:
+                    details = self.wordbank.get(japanese_word, english_translation)
+                    if details is None:
+                        # Word not in cache - skip image/audio generation in dev mode
+                        # Create minimal details object for HTML generation
+                        details = WordbankWordDetails(
+                            word=japanese_word,
+                            en_translation=english_translation,
+                            language_code="ja",  # Default to Japanese
+                            examples=[],
+                            description=context,
+                            image_description="",  # Empty in dev mode
                         )
+                    # Cache the result
+                    self._propagated_cache[cache_key] = details
+                    pbar.update(1)
+                else:
+                    to_propagate.append((japanese_word, english_translation, context))
+
+            # Production mode: Propagate the words (generates images/audio)
+            if to_propagate:
+                propagated = await self.wordbank.propagate_many(
+                    to_propagate, on_complete=lambda _pair, _details: pbar.update(1)
+                )
+                for (word, en, _), details in zip(to_propagate, propagated):
+                    # Cache the result; failed words are tried again next time
+                    if details is not None:
+                        self._propagated_cache[(word, en)] = details
 
-                # Wait for all tasks in the batch to complete
-                if batch_tasks:
-                    batch_results = await asyncio.gather(
-                        *[task for _, task in batch_tasks]
-                    )
-                    for (cache_key, _), details in zip(batch_tasks, batch_results):
-                        # Cache the result
-                        self._propagated_cache[cache_key] = details
-                        results.append(details)
-                        pbar.update(1)
-
-        return results
+        return [
+            self._propagated_cache[(word, en)]
+            for word, en, _ in words
+            if (word, en) in self._propagated_cache
+        ]
 
     def generate_flashcard_html(self, details: WordbankWordDetails) -> str:
         """
@@ -173,19 +169,15 @@ class WordbankProcessor:
         """
         # Check if image file exists - skip flashcard if not
         if details.image_file:
-            image_file_path = (
-                Path(__file__).parent.parent.parent
-                / "content"
-                / "images"
-                / "wordbank"
-                / details.image_file
-            )
-            if not image_file_path.exists():
+            image_file_path = image_path(details)
+            if not get_media_index().exists(image_file_path):
                 _log.info(
                     f"Warning: Skipping flashcard for '{details.word}' - image file not found: {details.image_file}"
                 )
                 return ""
-            image_path = f"{self.siteurl}/images/wordbank/{details.image_file}"
+            image_html = self.generate_image_html(
+                image_file_path, self._escape_html(details.en_translation)
+            )
         else:
             # No image file specified - skip this flashcard
             _log.info(
@@ -207,11 +199,14 @@ class WordbankProcessor:
                 / "wordbank"
                 / details.audio_file
             )
-            if audio_file_path.exists():
-                audio_path = f"{self.siteurl}/audio/wordbank/{details.audio_file}"
-                speaker_icon_path = f"{self.siteurl}/images/audio-speaker.svg"
-                audio_button = f"""<audio class="flashcard-audio" style="display: none;">
-            <source src="{audio_path}" type="audio/aac">
+            if get_media_index().exists(audio_file_path):
+                sources_html = "\n".join(
+                    f'            <source src="{SITEURL_PLACEHOLDER}/audio/wordbank/{filename}" type="{mime_type}">'
+                    for filename, mime_type in audio_sources(audio_file_path)
+                )
+                speaker_icon_path = f"{SITEURL_PLACEHOLDER}/images/audio-speaker.svg"
+                audio_button = f"""<audio class="flashcard-audio" preload="none" style="display: none;">
+{sources_html}
             Your browser does not support the audio element.
         </audio>
         <button class="flashcard-audio-btn" aria-label="Play pronunciation" onclick="event.stopPropagation();">
@@ -237,7 +232,7 @@ class WordbankProcessor:
         html = f"""
 <div class="flashcard" data-word="{word_escaped}" data-translation="{en_translation_escaped}">
     <div class="flashcard-front">
-        <img src="{image_path}" alt="{en_translation_escaped}" loading="lazy">
+        {image_html}
         <div class="flashcard-word-jp">{word_escaped}{audio_button}</div>
     </div>
     <div class="flashcard-back" style="display: none;">
@@ -248,6 +243,58 @@ class WordbankProcessor:
 
         return html
 
+    def generate_image_html(self, image_file_path: Path, alt: str) -> str:
+        """
+        Generate the image element of a flashcard.
+
+        Images with derivatives get a <picture> offering every format and
+        width through srcset, over a blurred placeholder background that shows
+        until the image loads. Others fall back to the source image.
+
+        Args:
+            image_file_path: Path to the source image
+            alt: Escaped alt text
+
+        Returns:
+            HTML string for the image
+        """
+        base_url = f"{SITEURL_PLACEHOLDER}/images/wordbank"
+        derivatives = get_image_derivatives()
+        variants = derivatives.variants(image_file_path)
+        if not variants:
+            return f'<img src="{base_url}/{image_file_path.name}" alt="{alt}" loading="lazy">'
+
+        by_type: dict[str, list[dict]] = {}
+        for variant in variants:
+            by_type.setdefault(variant["type"], []).append(variant)
+
+        def srcset(variants: list[dict]) -> str:
+            return ", ".join(f"{base_url}/{v['file']} {v['width']}w" for v in variants)
+
+        # The last format is the universally supported fallback
+        *preferred, fallback_type = by_type
+        sources = "".join(
+            f'<source type="{mime_type}" srcset="{srcset(by_type[mime_type])}" '
+            f'sizes="{FLASHCARD_IMAGE_SIZES}">'
+            for mime_type in preferred
+        )
+        fallback = by_type[fallback_type]
+        default = fallback[len(fallback) // 2]
+        placeholder = derivatives.placeholder(image_file_path)
+        style = (
+            f' style="background: center / cover no-repeat url({placeholder})"'
+            if placeholder
+            else ""
+        )
+        return (
+            f"<picture>{sources}"
+            f'<img src="{base_url}/{default["file"]}" srcset="{srcset(fallback)}" '
+            f'sizes="{FLASHCARD_IMAGE_SIZES}" width="{default["width"]}" '
+            f'height="{default["height"]}" alt="{alt}" loading="lazy" decoding="async"'
+            f"{style}>"
+            f"</picture>"
+        )
+
     def generate_flashcard_section_html(
         self, word_details_list: list[WordbankWordDetails]
     ) -> str:
@@ -270,8 +317,9 @@ class WordbankProcessor:
                 cards_html += card_html
 
                 # Prepare quiz data for this word in new generalized format
+                # The image shown on the card, following aliases
                 image_url = (
-                    f"{self.siteurl}/images/wordbank/{details.image_file}"
+                    f"{SITEURL_PLACEHOLDER}/images/wordbank/{image_path(details).name}"
                     if details.image_file
                     else ""
                 )
@@ -280,23 +328,8 @@ class WordbankProcessor:
                 answers = [details.word]
 
                 # If word contains kanji, add hiragana reading as alternative answer
-                if self._contains_kanji(details.word):
-                    # Parse with fugashi to get reading
-                    words = self.tagger(details.word)
-
-                    # Build the hiragana reading
-                    hiragana_parts = []
-                    for w in words:
-                        # Get katakana reading and convert to hiragana
-                        kana = w.feature.kana if hasattr(w.feature, "kana") else None
-                        if kana:
-                            hiragana = self._katakana_to_hiragana(kana)
-                            hiragana_parts.append(hiragana)
-                        else:
-                            # Fallback to original if no reading available
-                            hiragana_parts.append(w.surface)
-
-                    hiragana_reading = "".join(hiragana_parts)
+                if contains_kanji(details.word):
+                    hiragana_reading = reading(details.word)
 
                     # Only add if different from original
                     if hiragana_reading != details.word:
@@ -340,6 +373,31 @@ class WordbankProcessor:
 
         return complete_html
 
+    async def prefetch(self, contents: list[str]) -> None:
+        """
+        Propagate the words of the wordbank sections of many documents up front.
+
+        All words are handed to ``propagate_words`` at once, so their details
+        are generated in as few batched requests as possible, and the image
+        derivatives are rendered. ``process_content`` then finds every word
+        in the session cache.
+
+        Args:
+            contents: The markdown content of each document
+        """
+        words = {}
+        for content in contents:
+            for _, section_words in self.extract_wordbank_sections(content):
+                for entry in section_words:
+                    words.setdefault(entry[:2], entry)
+        if not words:
+            return
+
+        word_details_list = await self.propagate_words(list(words.values()))
+        await get_image_derivatives().ensure(
+            [image_path(details) for details in word_details_list]
+        )
+
     async def process_content_async(self, content: str) -> str:
         """
         Process content: extract wordbank sections, propagate words, and generate HTML.
@@ -362,6 +420,11 @@ class WordbankProcessor:
             # First pass: propagate words (async with batching)
             word_details_list = await self.propagate_words(words)
 
+            # Render the responsive image derivatives the cards will reference
+            await get_image_derivatives().ensure(
+                [image_path(details) for details in word_details_list]
+            )
+
             # Second pass: generate HTML
             html = self.generate_flashcard_section_html(word_details_list)
 
@@ -374,7 +437,8 @@ class WordbankProcessor:
         """
         Process content: extract wordbank sections, propagate words, and generate HTML.
 
-        This is the sync wrapper that runs the async processing.
+        This is the sync wrapper that runs the async processing on the shared
+        background loop.
 
         Args:
             content: The markdown content
@@ -382,24 +446,7 @@ class WordbankProcessor:
         Returns:
             Processed content with wordbank sections replaced by HTML flashcards
         """
-        # Check if there's already a running event loop
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-
-        if loop is not None:
-            # We're already in an async context, create a new loop in a thread
-            import concurrent.futures
-
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(
-                    asyncio.run, self.process_content_async(content)
-                )
-                return future.result()
-        else:
-            # No event loop running, we can safely use asyncio.run
-            return asyncio.run(self.process_content_async(content))
+        return get_background_loop().run(self.process_content_async(content))
 
     def _generate_furigana_text(self, word: str) -> str:
         """
@@ -415,49 +462,11 @@ class WordbankProcessor:
             Formatted string with furigana, e.g., "意味 (いみ)" or just "です"
         """
         # Check if word contains kanji
-        if not self._contains_kanji(word):
+        if not contains_kanji(word):
             return word
 
-        # Parse with fugashi to get reading
-        words = self.tagger(word)
-
-        # Build the hiragana reading
-        hiragana_parts = []
-        for w in words:
-            # Get katakana reading and convert to hiragana
-            kana = w.feature.kana if hasattr(w.feature, "kana") else None
-            if kana:
-                hiragana = self._katakana_to_hiragana(kana)
-                hiragana_parts.append(hiragana)
-            else:
-                # Fallback to original if no reading available
-                hiragana_parts.append(w.surface)
-
-        hiragana_reading = "".join(hiragana_parts)
-
         # Return formatted as "kanji (hiragana)"
-        return f"{word} ({hiragana_reading})"
-
-    @staticmethod
-    def _contains_kanji(text: str) -> bool:
-        """Check if text contains any kanji characters."""
-        kanji_pattern = re.compile(r"[\u4E00-\u9FFF\u3400-\u4DBF]")
-        return bool(kanji_pattern.search(text))
-
-    @staticmethod
-    def _katakana_to_hiragana(text: str) -> str:
-        """Convert katakana characters to hiragana."""
-        hiragana = []
-        for char in text:
-            code = ord(char)
-            # Katakana range: U+30A0 to U+30FF
-            # Hiragana range: U+3040 to U+309F
-            # Offset is 0x60 (96)
-            if 0x30A0 <= code <= 0x30FF:
-                hiragana.append(chr(code - 0x60))
-            else:
-                hiragana.append(char)
-        return "".join(hiragana)
+        return f"{word} ({reading(word)})"
 
     @staticmethod
     def _escape_html(text: str) -> str:
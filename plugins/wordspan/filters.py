@@ -5,11 +5,20 @@ import logging
 import re
 from pathlib import Path
 
-import fugashi
 from markupsafe import Markup
 
+from morphology import (
+    JAPANESE_PATTERN,
+    is_japanese_word,
+    katakana_to_hiragana,
+    parse,
+)
+
 _log = logging.getLogger(__name__)
 
+# Pattern to match HTML tags; used to split content into tags and text nodes
+HTML_TAG_PATTERN = re.compile(r"(<[^>]+>)")
+
 # Global dictionary cache for translations (lazy loaded)
 _translations_cache = None
 
@@ -77,14 +86,8 @@ def wrap_japanese_words(html_content):
     # Load translations dictionary (lazy loaded on first use)
     translations = _load_translations()
 
-    # Initialize fugashi tagger for morphological analysis
-    tagger = fugashi.Tagger()  # type:ignore
-
-    # Pattern to match text outside of HTML tags
-    html_tag_pattern = re.compile(r"(<[^>]+>)")
-
     # Split content into HTML tags and text segments
-    segments = html_tag_pattern.split(str(html_content))
+    segments = HTML_TAG_PATTERN.split(str(html_content))
 
     # Counter for unique word IDs across the entire content
     word_counter = {"count": 0}
@@ -95,7 +98,7 @@ def wrap_japanese_words(html_content):
     processed_segments = []
     for segment in segments:
         # If this is an HTML tag, check if it's a script tag
-        if html_tag_pattern.match(segment):
+        if HTML_TAG_PATTERN.match(segment):
             # Check for opening or closing script tags
             if segment.lower().startswith("<script"):
                 inside_script = True
@@ -110,9 +113,7 @@ def wrap_japanese_words(html_content):
             else:
                 # Outside script tag - process it for word wrapping
                 processed_segments.append(
-                    _process_text_for_wordspan(
-                        segment, tagger, word_counter, translations
-                    )
+                    _process_text_for_wordspan(segment, word_counter, translations)
                 )
 
     result = "".join(processed_segments)
@@ -120,13 +121,12 @@ def wrap_japanese_words(html_content):
     return Markup(result)
 
 
-def _process_text_for_wordspan(text, tagger, word_counter, translations):
+def _process_text_for_wordspan(text, word_counter, translations):
     """
     Process a text segment to wrap Japanese words in spans.
 
     Args:
         text: Plain text string (not containing HTML tags)
-        tagger: Configured fugashi Tagger instance
         word_counter: Dict with 'count' key for tracking unique word IDs
         translations: Dict mapping Japanese words to English translations
 
@@ -137,15 +137,10 @@ def _process_text_for_wordspan(text, tagger, word_counter, translations):
         return text
 
     # Split text into Japanese and non-Japanese segments
-    # Japanese characters include: Hiragana, Katakana, Kanji, and Japanese punctuation
-    japanese_pattern = re.compile(
-        r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF\u3000-\u303F]+"
-    )
-
     output = []
     last_end = 0
 
-    for match in japanese_pattern.finditer(text):
+    for match in JAPANESE_PATTERN.finditer(text):
         # Add any non-Japanese text before this match (preserve as-is)
         if match.start() > last_end:
             output.append(text[last_end : match.start()])
@@ -153,9 +148,7 @@ def _process_text_for_wordspan(text, tagger, word_counter, translations):
         # Process the Japanese segment with fugashi
         japanese_segment = match.group()
         output.append(
-            _process_japanese_segment(
-                japanese_segment, tagger, word_counter, translations
-            )
+            _process_japanese_segment(japanese_segment, word_counter, translations)
         )
 
         last_end = match.end()
@@ -177,7 +170,7 @@ def _try_merge_tokens(words, index):
     - 勉強 + し + ます → 勉強します
 
     Args:
-        words: List of fugashi word tokens
+        words: Sequence of tokens from ``morphology.parse``
         index: Current index in the words list
 
     Returns:
@@ -186,112 +179,47 @@ def _try_merge_tokens(words, index):
         - merged_lemma: Combined lemma form, or None if no merge
         - skip_count: Number of additional tokens to skip (0 if no merge)
     """
-    if index >= len(words):
-        return words[index].surface, None, 0
-
     current = words[index]
 
-    # Get POS tags safely
-    try:
-        current_pos1 = (
-            current.feature.pos1 if hasattr(current.feature, "pos1") else None
-        )
-        current_lemma = (
-            current.feature.lemma if hasattr(current.feature, "lemma") else None
-        )
-    except (AttributeError, IndexError):
-        return current.surface, None, 0
-
     # Pattern 1: Verb + auxiliary verb (ます/ました/etc)
     # Example: 行き (動詞) + ます (助動詞)
-    if current_pos1 == "動詞" and index + 1 < len(words):
+    if current.pos1 == "動詞" and index + 1 < len(words):
         next_word = words[index + 1]
-        try:
-            next_pos1 = (
-                next_word.feature.pos1 if hasattr(next_word.feature, "pos1") else None
-            )
-            next_lemma = (
-                next_word.feature.lemma if hasattr(next_word.feature, "lemma") else None
-            )
-        except (AttributeError, IndexError):
-            return current.surface, None, 0
 
         # Merge verb + ます/た/etc
-        if next_pos1 == "助動詞":
+        if next_word.pos1 == "助動詞":
             merged_surface = current.surface + next_word.surface
-            merged_lemma = current_lemma  # Use the verb's base form for lookup
+            merged_lemma = current.lemma  # Use the verb's base form for lookup
 
             # Check if there's a た after ます (e.g., ました)
-            if index + 2 < len(words):
-                third_word = words[index + 2]
-                try:
-                    third_pos1 = (
-                        third_word.feature.pos1
-                        if hasattr(third_word.feature, "pos1")
-                        else None
-                    )
-                except (AttributeError, IndexError):
-                    return merged_surface, merged_lemma, 1
-
-                if third_pos1 == "助動詞":
-                    merged_surface = merged_surface + third_word.surface
-                    return merged_surface, merged_lemma, 2
+            if index + 2 < len(words) and words[index + 2].pos1 == "助動詞":
+                merged_surface = merged_surface + words[index + 2].surface
+                return merged_surface, merged_lemma, 2
 
             return merged_surface, merged_lemma, 1
 
     # Pattern 2: Noun + する verb pattern
     # Example: 勉強 (名詞) + し (動詞) + ます (助動詞)
-    if current_pos1 == "名詞" and index + 1 < len(words):
+    if current.pos1 == "名詞" and index + 1 < len(words):
         next_word = words[index + 1]
-        try:
-            next_pos1 = (
-                next_word.feature.pos1 if hasattr(next_word.feature, "pos1") else None
-            )
-            next_lemma = (
-                next_word.feature.lemma if hasattr(next_word.feature, "lemma") else None
-            )
-        except (AttributeError, IndexError):
-            return current.surface, None, 0
 
         # Check if next is する (為る)
-        if next_pos1 == "動詞" and next_lemma == "為る":
+        if next_word.pos1 == "動詞" and next_word.lemma == "為る":
             merged_surface = current.surface + next_word.surface
             # Use the noun as the lemma (e.g., "勉強" not "勉強する")
             # Many dictionaries have the noun form, not the verb form
-            merged_lemma = current_lemma if current_lemma else current.surface
+            merged_lemma = current.lemma if current.lemma else current.surface
 
             # Check if there's an auxiliary after する (e.g., ます)
-            if index + 2 < len(words):
-                third_word = words[index + 2]
-                try:
-                    third_pos1 = (
-                        third_word.feature.pos1
-                        if hasattr(third_word.feature, "pos1")
-                        else None
-                    )
-                except (AttributeError, IndexError):
-                    return merged_surface, merged_lemma, 1
-
-                if third_pos1 == "助動詞":
-                    merged_surface = merged_surface + third_word.surface
-
-                    # Check for た after ます
-                    if index + 3 < len(words):
-                        fourth_word = words[index + 3]
-                        try:
-                            fourth_pos1 = (
-                                fourth_word.feature.pos1
-                                if hasattr(fourth_word.feature, "pos1")
-                                else None
-                            )
-                        except (AttributeError, IndexError):
-                            return merged_surface, merged_lemma, 2
-
-                        if fourth_pos1 == "助動詞":
-                            merged_surface = merged_surface + fourth_word.surface
-                            return merged_surface, merged_lemma, 3
-
-                    return merged_surface, merged_lemma, 2
+            if index + 2 < len(words) and words[index + 2].pos1 == "助動詞":
+                merged_surface = merged_surface + words[index + 2].surface
+
+                # Check for た after ます
+                if index + 3 < len(words) and words[index + 3].pos1 == "助動詞":
+                    merged_surface = merged_surface + words[index + 3].surface
+                    return merged_surface, merged_lemma, 3
+
+                return merged_surface, merged_lemma, 2
 
             return merged_surface, merged_lemma, 1
 
@@ -299,13 +227,12 @@ def _try_merge_tokens(words, index):
     return current.surface, None, 0
 
 
-def _process_japanese_segment(text, tagger, word_counter, translations):
+def _process_japanese_segment(text, word_counter, translations):
     """
     Process a Japanese text segment to wrap each word in a span.
 
     Args:
         text: Japanese text string (hiragana, katakana, kanji)
-        tagger: Configured fugashi Tagger instance
         word_counter: Dict with 'count' key for tracking unique word IDs
         translations: Dict mapping Japanese words to English translations
 
@@ -313,7 +240,7 @@ def _process_japanese_segment(text, tagger, word_counter, translations):
         Text with each word wrapped in a span element
     """
     # Parse text with morphological analyzer
-    words = list(tagger(text))
+    words = parse(text)
 
     output = []
     i = 0
@@ -322,7 +249,7 @@ def _process_japanese_segment(text, tagger, word_counter, translations):
         orig = word.surface  # Original text
 
         # Check if this is actually a word (not just punctuation)
-        if _is_japanese_word(orig):
+        if is_japanese_word(orig):
             # Check if we should merge this token with the next one (e.g., verb + auxiliary)
             merged_surface, merged_lemma, skip_count = _try_merge_tokens(words, i)
 
@@ -333,32 +260,16 @@ def _process_japanese_segment(text, tagger, word_counter, translations):
                 i += skip_count  # Skip the merged tokens
             else:
                 # Single token, get its lemma
-                try:
-                    lemma = (
-                        word.feature.lemma if hasattr(word.feature, "lemma") else None
-                    )
-                except (AttributeError, IndexError):
-                    lemma = None
+                lemma = word.lemma
 
             word_counter["count"] += 1
 
-            # Get the reading (kana) for dictionary lookup
-            # Try to get the reading from fugashi feature, fallback to surface
-            try:
-                reading = word.feature.kana  # Reading in katakana
-                # Convert katakana to hiragana for better dictionary matching
-                reading = _katakana_to_hiragana(reading) if reading else orig
-            except (AttributeError, IndexError):
-                reading = orig
+            # Get the reading (kana) for dictionary lookup, fallback to surface
+            # Convert katakana to hiragana for better dictionary matching
+            reading = katakana_to_hiragana(word.kana) if word.kana else orig
 
             # Get lemma in kana form (better for dictionary lookup than kanji lemma)
-            try:
-                lemma_kana = (
-                    word.feature.kanaBase if hasattr(word.feature, "kanaBase") else None
-                )
-                lemma_kana = _katakana_to_hiragana(lemma_kana) if lemma_kana else None
-            except (AttributeError, IndexError):
-                lemma_kana = None
+            lemma_kana = katakana_to_hiragana(word.kana_base) if word.kana_base else None
 
             # Look up English translations
             # Try multiple forms in order of preference:
@@ -408,43 +319,3 @@ def _process_japanese_segment(text, tagger, word_counter, translations):
 
     return "".join(output)
 
-
-def _katakana_to_hiragana(text):
-    """
-    Convert katakana characters to hiragana.
-
-    Args:
-        text: String potentially containing katakana
-
-    Returns:
-        String with katakana converted to hiragana
-    """
-    if not text:
-        return text
-
-    result = []
-    for char in text:
-        code = ord(char)
-        # Katakana range: 0x30A0-0x30FF
-        # Hiragana range: 0x3040-0x309F
-        # Offset: 0x60
-        if 0x30A0 <= code <= 0x30FF:
-            result.append(chr(code - 0x60))
-        else:
-            result.append(char)
-    return "".join(result)
-
-
-def _is_japanese_word(text):
-    """
-    Check if text is a Japanese word (not just punctuation).
-
-    Args:
-        text: String to check
-
-    Returns:
-        True if text contains Japanese word characters, False otherwise
-    """
-    # Check for hiragana, katakana, or kanji
-    word_pattern = re.compile(r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF]")
-    return bool(word_pattern.search(text))
@@ -0,0 +1,567 @@
+"""PCM post-processing for generated speech audio.
+
+All processing works on mono float32 sample arrays in the range [-1.0, 1.0]
+and is vectorized with NumPy, so it costs next to nothing compared with the
+ffmpeg encoding that follows it.
+"""
+
+import asyncio
+import io
+import logging
+import threading
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from json_store import read_json, update_json
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_METADATA_PATH = Path(__file__).parent.parent / "data" / "audio_metadata.json"
+
+# Floor used when converting silent frames to decibels
+_MIN_AMPLITUDE = 1e-10
+
+# Number of bins in the downsampled waveform stored for each clip
+DEFAULT_PEAK_BINS = 64
+
+
+@dataclass(frozen=True)
+class PostProcessConfig:
+    """Thresholds for silence trimming and loudness normalization."""
+
+    # Analysis frame length for RMS measurement
+    frame_ms: float = 10.0
+    # Frames quieter than this (dBFS RMS) count as silence
+    silence_threshold_db: float = -45.0
+    # Audio kept before the first and after the last voiced frame
+    padding_ms: float = 80.0
+    # Target RMS loudness of the voiced frames (dBFS)
+    target_rms_db: float = -20.0
+    # Upper bound for the applied gain
+    max_gain_db: float = 12.0
+    # Peaks are never pushed above this level (dBFS)
+    peak_ceiling_db: float = -1.0
+
+
+@dataclass(frozen=True)
+class SplitConfig:
+    """Thresholds for splitting a batched recording at the pauses between utterances."""
+
+    # Analysis frame length for RMS measurement
+    frame_ms: float = 10.0
+    # Frames quieter than this (dBFS RMS) count as silence
+    silence_threshold_db: float = -45.0
+    # Silences shorter than this are pauses within an utterance, not between them
+    min_gap_ms: float = 500.0
+    # A clip's voiced length may be off its expected share of the recording by
+    # this factor, plus the slack, before the split counts as misaligned
+    max_length_ratio: float = 2.5
+    length_slack_ms: float = 400.0
+    # Tighter bound on how much longer the first clip may be: a spoken request
+    # instruction would be glued onto it
+    first_length_ratio: float = 1.5
+
+
+@dataclass
+class ClipStats:
+    """Per-clip measurements recorded by the post-processing stage."""
+
+    sample_rate: int
+    original_duration: float
+    duration: float
+    trimmed_start: float
+    trimmed_end: float
+    input_rms_db: float
+    gain_db: float
+    peak_db: float
+
+
+def pcm_to_array(pcm: bytes, bits_per_sample: int = 16) -> np.ndarray:
+    """Convert little-endian signed PCM bytes to float32 samples.
+
+    Args:
+        pcm: Raw PCM data
+        bits_per_sample: Sample width (16 or 32)
+
+    Returns:
+        Float32 array with samples in [-1.0, 1.0]
+    """
+    dtype = {16: "<i2", 32: "<i4"}.get(bits_per_sample)
+    if dtype is None:
+        raise ValueError(f"Unsupported PCM sample width: {bits_per_sample}")
+    samples = np.frombuffer(pcm, dtype=dtype).astype(np.float32)
+    return samples / float(2 ** (bits_per_sample - 1))
+
+
+def array_to_pcm(samples: np.ndarray) -> bytes:
+    """Convert float32 samples to 16-bit little-endian PCM bytes.
+
+    Args:
+        samples: Float32 array with samples in [-1.0, 1.0]
+
+    Returns:
+        Raw PCM data
+    """
+    clipped = np.clip(samples, -1.0, 1.0)
+    return (clipped * 32767.0).round().astype("<i2").tobytes()
+
+
+def array_to_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Wrap float32 samples in a mono 16-bit WAV container.
+
+    Args:
+        samples: Float32 array with samples in [-1.0, 1.0]
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        WAV file contents
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(array_to_pcm(samples))
+    return buffer.getvalue()
+
+
+def wav_to_array(wav_data: bytes) -> tuple[np.ndarray, int]:
+    """Read a PCM WAV file into float32 samples, mixing down to mono.
+
+    Args:
+        wav_data: WAV file contents
+
+    Returns:
+        Tuple of (samples, sample_rate)
+    """
+    with wave.open(io.BytesIO(wav_data), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        sample_rate = wav_file.getframerate()
+        bits_per_sample = wav_file.getsampwidth() * 8
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    samples = pcm_to_array(frames, bits_per_sample)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def _to_db(values: np.ndarray | float) -> np.ndarray:
+    """Convert linear amplitudes to dBFS."""
+    return 20.0 * np.log10(np.maximum(values, _MIN_AMPLITUDE))
+
+
+def frame_rms_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """Measure the RMS level of consecutive frames.
+
+    The last frame is zero-padded to a full frame.
+
+    Args:
+        samples: Float32 sample array
+        frame_length: Frame length in samples
+
+    Returns:
+        Array with one dBFS value per frame
+    """
+    n_frames = -(-len(samples) // frame_length)
+    padded = np.zeros(n_frames * frame_length, dtype=np.float32)
+    padded[: len(samples)] = samples
+    frames = padded.reshape(n_frames, frame_length)
+    return _to_db(np.sqrt(np.mean(frames**2, axis=1)))
+
+
+def trim_silence(
+    samples: np.ndarray, sample_rate: int, config: PostProcessConfig
+) -> tuple[int, int]:
+    """Find the voiced region of a clip.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        config: Trimming thresholds
+
+    Returns:
+        Tuple of (start, end) sample indices; the full range if nothing is voiced
+    """
+    frame_length = max(1, int(sample_rate * config.frame_ms / 1000))
+    if len(samples) == 0:
+        return 0, 0
+
+    voiced = np.flatnonzero(
+        frame_rms_db(samples, frame_length) > config.silence_threshold_db
+    )
+    if len(voiced) == 0:
+        return 0, len(samples)
+
+    padding = int(sample_rate * config.padding_ms / 1000)
+    start = max(0, int(voiced[0]) * frame_length - padding)
+    end = min(len(samples), (int(voiced[-1]) + 1) * frame_length + padding)
+    return start, end
+
+
+def normalization_gain_db(
+    samples: np.ndarray, sample_rate: int, config: PostProcessConfig
+) -> tuple[float, float]:
+    """Compute the gain that brings voiced frames to the target loudness.
+
+    Only frames above the silence threshold contribute to the loudness
+    measurement, so pauses don't inflate the gain. The gain is capped by
+    ``max_gain_db`` and by the peak ceiling.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        config: Normalization targets
+
+    Returns:
+        Tuple of (input_rms_db, gain_db)
+    """
+    if len(samples) == 0:
+        return float(_to_db(0.0)), 0.0
+
+    frame_length = max(1, int(sample_rate * config.frame_ms / 1000))
+    rms_db = frame_rms_db(samples, frame_length)
+    voiced = rms_db > config.silence_threshold_db
+    if not voiced.any():
+        return float(rms_db.max()), 0.0
+
+    # Average power over voiced frames
+    input_rms_db = float(10.0 * np.log10(np.mean(10.0 ** (rms_db[voiced] / 10.0))))
+    peak_db = float(_to_db(np.abs(samples).max()))
+
+    gain_db = min(
+        config.target_rms_db - input_rms_db,
+        config.max_gain_db,
+        config.peak_ceiling_db - peak_db,
+    )
+    return input_rms_db, gain_db
+
+
+def post_process(
+    samples: np.ndarray, sample_rate: int, config: PostProcessConfig
+) -> tuple[np.ndarray, ClipStats]:
+    """Trim leading/trailing silence and normalize loudness.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        config: Trimming and normalization thresholds
+
+    Returns:
+        Tuple of (processed samples, clip stats)
+    """
+    start, end = trim_silence(samples, sample_rate, config)
+    trimmed = samples[start:end]
+
+    input_rms_db, gain_db = normalization_gain_db(trimmed, sample_rate, config)
+    processed = np.clip(trimmed * np.float32(10.0 ** (gain_db / 20.0)), -1.0, 1.0)
+    peak = float(np.abs(processed).max()) if len(processed) else 0.0
+
+    stats = ClipStats(
+        sample_rate=sample_rate,
+        original_duration=round(len(samples) / sample_rate, 3),
+        duration=round(len(processed) / sample_rate, 3),
+        trimmed_start=round(start / sample_rate, 3),
+        trimmed_end=round((len(samples) - end) / sample_rate, 3),
+        input_rms_db=round(input_rms_db, 2),
+        gain_db=round(gain_db, 2),
+        peak_db=round(float(_to_db(peak)), 2),
+    )
+    return processed.astype(np.float32), stats
+
+
+def find_silent_gaps(
+    samples: np.ndarray, sample_rate: int, config: SplitConfig
+) -> np.ndarray:
+    """Find the silences between voiced regions of a recording.
+
+    Leading and trailing silence is not a gap and is never reported.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        config: Silence thresholds
+
+    Returns:
+        Array of shape (n_gaps, 2) with the start and end sample of each gap
+    """
+    frame_length = max(1, int(sample_rate * config.frame_ms / 1000))
+    if len(samples) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    silent = frame_rms_db(samples, frame_length) <= config.silence_threshold_db
+
+    # Runs of silent frames start where the padded mask rises and end where it falls
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_frames = max(1, int(config.min_gap_ms / config.frame_ms))
+    interior = (starts > 0) & (ends < len(silent))
+    keep = interior & (ends - starts >= min_frames)
+    return np.stack([starts[keep], ends[keep]], axis=1) * frame_length
+
+
+def voiced_length(samples: np.ndarray, sample_rate: int, config: SplitConfig) -> int:
+    """Measure the span from the first to the last voiced frame of a clip.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        config: Silence thresholds
+
+    Returns:
+        Length of the voiced span in samples, 0 if nothing is voiced
+    """
+    frame_length = max(1, int(sample_rate * config.frame_ms / 1000))
+    if len(samples) == 0:
+        return 0
+
+    voiced = np.flatnonzero(
+        frame_rms_db(samples, frame_length) > config.silence_threshold_db
+    )
+    if len(voiced) == 0:
+        return 0
+    return (int(voiced[-1]) + 1 - int(voiced[0])) * frame_length
+
+
+def segment_lengths_match(
+    segments: list[np.ndarray],
+    sample_rate: int,
+    weights: Sequence[float],
+    config: SplitConfig,
+) -> bool:
+    """Check that each clip's length fits the length of its utterance.
+
+    A pause that is swallowed in one place and added in another keeps the
+    number of gaps right while pairing clips with the wrong utterances. Each
+    clip's voiced length is compared with its expected length: its weight
+    (e.g. the utterance's mora count) times the speaking rate of the other
+    clips. The first clip is held to a tighter upper bound, since instructions
+    read out before the first utterance would end up in it and would inflate
+    the rate if it counted.
+
+    Args:
+        segments: Clips of the split recording
+        sample_rate: Sample rate in Hz
+        weights: Expected relative length of each clip
+        config: Silence thresholds and length tolerance
+
+    Returns:
+        True if every clip is within tolerance of its expected length
+    """
+    lengths = np.array(
+        [voiced_length(segment, sample_rate, config) for segment in segments],
+        dtype=np.float64,
+    )
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(lengths) != len(weights) or weights.sum() <= 0 or lengths.sum() <= 0:
+        return False
+
+    # Voiced samples per unit of weight, measured without the first clip
+    rest = slice(1, None) if len(lengths) > 1 else slice(None)
+    if weights[rest].sum() <= 0 or lengths[rest].sum() <= 0:
+        return False
+    expected = weights * lengths[rest].sum() / weights[rest].sum()
+
+    slack = sample_rate * config.length_slack_ms / 1000
+    too_short = lengths < expected / config.max_length_ratio - slack
+    too_long = lengths > expected * config.max_length_ratio + slack
+    too_long[0] |= lengths[0] > expected[0] * config.first_length_ratio + slack
+    return not (too_short | too_long).any()
+
+
+def split_at_silences(
+    samples: np.ndarray,
+    sample_rate: int,
+    n_segments: int,
+    config: SplitConfig,
+    weights: Sequence[float] | None = None,
+) -> list[np.ndarray] | None:
+    """Split a recording of several utterances into one clip per utterance.
+
+    The recording is cut in the middle of each gap. The split is only accepted
+    when the number of gaps matches the expected number of utterances, since a
+    dropped pause or an extra one would shift every following clip, and, given
+    weights, when every clip's length fits its utterance.
+
+    Args:
+        samples: Float32 sample array
+        sample_rate: Sample rate in Hz
+        n_segments: Expected number of utterances
+        config: Silence thresholds
+        weights: Expected relative length of each utterance, see
+            segment_lengths_match()
+
+    Returns:
+        List of ``n_segments`` sample arrays, or None if the gaps don't match
+    """
+    gaps = find_silent_gaps(samples, sample_rate, config)
+    if len(gaps) != n_segments - 1:
+        return None
+
+    cuts = (gaps[:, 0] + gaps[:, 1]) // 2
+    segments = np.split(samples, cuts)
+    if weights is not None and not segment_lengths_match(
+        segments, sample_rate, weights, config
+    ):
+        return None
+    return segments
+
+
+def compute_peaks(samples: np.ndarray, n_bins: int = DEFAULT_PEAK_BINS) -> list[float]:
+    """Downsample a clip to a waveform overview.
+
+    The clip is split into ``n_bins`` equal bins and the absolute peak of each
+    bin is taken, normalized so the loudest bin is 1.0.
+
+    Args:
+        samples: Float32 sample array
+        n_bins: Number of bins in the overview
+
+    Returns:
+        List of ``n_bins`` peak values in [0.0, 1.0], rounded to 2 decimals
+    """
+    if len(samples) == 0:
+        return [0.0] * n_bins
+
+    bin_length = -(-len(samples) // n_bins)
+    padded = np.zeros(bin_length * n_bins, dtype=np.float32)
+    padded[: len(samples)] = np.abs(samples)
+    peaks = padded.reshape(n_bins, bin_length).max(axis=1)
+
+    loudest = peaks.max()
+    if loudest > 0:
+        peaks = peaks / loudest
+    return [round(float(peak), 2) for peak in peaks]
+
+
+def waveform_metadata(samples: np.ndarray, sample_rate: int) -> dict[str, Any]:
+    """Build the player hints stored for each clip.
+
+    Args:
+        samples: Final samples of the clip
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Dict with "duration" (seconds) and "peaks"
+    """
+    return {
+        "duration": round(len(samples) / sample_rate, 3),
+        "peaks": compute_peaks(samples),
+    }
+
+
+def clip_key(output: Path) -> str:
+    """Build the metadata index key for an encoded clip.
+
+    Args:
+        output: Path of the clip's primary output file
+
+    Returns:
+        Key in format "{directory}/{stem}", e.g. "tts/0a1b2c..."
+    """
+    return f"{output.parent.name}/{output.stem}"
+
+
+class AudioMetadataIndex:
+    """
+    JSON-backed index of per-clip audio metadata.
+
+    Entries are keyed by ``clip_key`` and hold the measurements recorded while
+    the clip's PCM was in memory, so build steps can use them without decoding
+    any audio. Updates are buffered in memory and merged into the file by
+    ``flush``, once per batch of clips rather than once per update.
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_METADATA_PATH):
+        """
+        Initialize the index.
+
+        Args:
+            path: Path to the JSON file
+        """
+        self.path = Path(path)
+        self._entries: dict[str, dict[str, Any]] | None = None
+        # Updates not written yet, by clip key
+        self._pending: dict[str, dict[str, Any]] = {}
+        # Guards the buffers against a flush running in a worker thread
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        Get the metadata for a clip.
+
+        Args:
+            key: Clip key from ``clip_key``
+
+        Returns:
+            Metadata dict, or None if the clip is unknown
+        """
+        return self._load().get(key)
+
+    def update(self, key: str, values: dict[str, Any]) -> None:
+        """
+        Merge values into a clip's metadata; see ``flush`` for persisting it.
+
+        Args:
+            key: Clip key from ``clip_key``
+            values: Fields to set
+        """
+        entries = self._load()
+        with self._lock:
+            entries.setdefault(key, {}).update(values)
+            self._pending.setdefault(key, {}).update(values)
+
+    def flush(self) -> None:
+        """Merge the buffered updates into the file's current entries."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        def merge(entries: dict[str, dict[str, Any]]) -> None:
+            for key, values in pending.items():
+                entries.setdefault(key, {}).update(values)
+
+        # Merged into the file's current entries, which other processes update
+        entries = update_json(self.path, merge)
+        with self._lock:
+            # Keep updates made while the file was written
+            for key, values in self._pending.items():
+                entries.setdefault(key, {}).update(values)
+            self._entries = entries
+
+    async def save(self) -> None:
+        """Flush the buffered updates without blocking the event loop."""
+        if self._pending:
+            await asyncio.to_thread(self.flush)
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """Load the index from disk on first use."""
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = read_json(self.path)
+        return self._entries
+
+
+# Global index instance
+_metadata_index = None
+
+
+def get_audio_metadata() -> AudioMetadataIndex:
+    """
+    Get or create the global audio metadata index.
+
+    Returns:
+        AudioMetadataIndex instance
+    """
+    global _metadata_index
+    if _metadata_index is None:
+        _metadata_index = AudioMetadataIndex()
+    return _metadata_index
@@ -0,0 +1,116 @@
+"""Shared background event loop for the build.
+
+Pelican calls plugins synchronously, one content object at a time. Instead of
+each plugin running its own event loop per article, all async work goes to one
+long-lived loop running in a background thread, so work submitted by different
+plugins and articles overlaps, and async clients bound to a loop can be reused
+for the whole build.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """Event loop running in a daemon thread, with a sync bridge to submit work."""
+
+    def __init__(self):
+        """Initialize the bridge; the loop starts on first use."""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        """
+        Schedule a coroutine on the background loop.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Future of the coroutine's result, usable from any thread
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """
+        Run a coroutine on the background loop and wait for its result.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            RuntimeError: If called from the background loop itself, which
+                would deadlock
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Cannot block on the background loop from inside it")
+        return self.submit(coro).result()
+
+    def shutdown(self) -> None:
+        """Cancel the remaining tasks and stop the loop; it restarts on next use."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+
+        async def cancel_tasks():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result()
+        except Exception as e:
+            _log.info(f"Warning: Failed to cancel background tasks: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Get the loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="background-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+
+# Global background loop instance
+_background_loop = None
+
+
+def get_background_loop() -> BackgroundLoop:
+    """
+    Get or create the global background loop.
+
+    Returns:
+        BackgroundLoop instance
+    """
+    global _background_loop
+    if _background_loop is None:
+        _background_loop = BackgroundLoop()
+    return _background_loop
+
+
+def shutdown_background_loop(*_args, **_kwargs) -> None:
+    """Stop the global background loop, e.g. from Pelican's finalized signal."""
+    get_background_loop().shutdown()
@@ -0,0 +1,238 @@
+"""Persistent cache of the content plugin chain's output.
+
+Most builds change a handful of articles, yet every article goes through the
+whole plugin chain: warm-cache lookups, HTML parsing and HTML generation. This
+module stores each article's final ``_content`` on disk, under a key made of:
+
+- the hash of the article's source file,
+- the plugin code: every source file in the plugin and ``src`` directories,
+- the settings that change the plugins' output, e.g. ``GENERATE_CONTENT``,
+- the data the output depends on: which media files exist (like the media
+  index) and the contents of the data files, e.g. the wordbank.
+
+Any change to the last three invalidates every article, so the cache only pays
+off between builds that change content alone.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+_log = logging.getLogger(__name__)
+
+_SRC_DIR = Path(__file__).parent
+_ROOT_DIR = _SRC_DIR.parent
+
+# Bump to invalidate all entries after a change to the entry format
+CACHE_VERSION = 1
+
+# Settings that change the plugins' output. SITEURL doesn't: the plugins emit
+# a placeholder for it (see site_url.py)
+DEFAULT_SETTINGS_KEYS = (
+    "GENERATE_CONTENT",
+    "TTS_AUDIO_SPRITES",
+    "WORDBANK_STORAGE",
+    "PLUGINS",
+    "MARKDOWN",
+)
+
+# Plugins that never change an article's _content: they coordinate the build or
+# only rewrite output files on finalized (cache_busting, added by publishconf)
+OUTPUT_NEUTRAL_PLUGINS = frozenset(
+    {"output_cache", "prefetch", "parallel_build", "cache_busting"}
+)
+
+# Files in the data directory that change without the data changing: locks,
+# temp files and SQLite's write-ahead log and shared memory
+_TRANSIENT_SUFFIXES = (".lock", ".tmp", "-wal", "-shm", "-journal")
+
+# Files of the plugin code: modules, prompts and templates
+_CODE_SUFFIXES = {".py", ".md", ".txt", ".html", ".json"}
+
+
+def hash_file(path: Path | str) -> str:
+    """
+    Hash the contents of a file.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _walk_files(directory: Path) -> Iterable[Path]:
+    """List the files under a directory, skipping bytecode caches."""
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            yield Path(root) / name
+
+
+def code_fingerprint(directories: Iterable[Path | str]) -> str:
+    """
+    Hash the code files under some directories.
+
+    Args:
+        directories: Directories with plugin code
+
+    Returns:
+        Hex SHA-256 digest of the files' paths and contents
+    """
+    digest = hashlib.sha256()
+    for directory in directories:
+        directory = Path(directory)
+        for path in _walk_files(directory):
+            if path.suffix in _CODE_SUFFIXES:
+                digest.update(path.relative_to(directory).as_posix().encode())
+                digest.update(hash_file(path).encode())
+    return digest.hexdigest()
+
+
+def data_fingerprint(
+    media_dirs: Iterable[Path | str], data_dir: Path | str | None = None
+) -> str:
+    """
+    Hash the state of the media and data the plugins read.
+
+    Args:
+        media_dirs: Directories whose file names are hashed
+        data_dir: Directory whose top-level files are hashed by contents
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for directory in media_dirs:
+        directory = Path(directory)
+        for path in _walk_files(directory):
+            digest.update(path.relative_to(directory).as_posix().encode() + b"\0")
+
+    if data_dir is not None and os.path.isdir(data_dir):
+        for entry in sorted(os.scandir(data_dir), key=lambda entry: entry.name):
+            if entry.is_file() and not entry.name.endswith(_TRANSIENT_SUFFIXES):
+                digest.update(f"{entry.name}:{hash_file(entry.path)}".encode())
+    return digest.hexdigest()
+
+
+def content_plugins(plugins: Iterable[Any]) -> list[str]:
+    """
+    List the plugins that transform article content.
+
+    Args:
+        plugins: The PLUGINS setting, names or plugin modules
+
+    Returns:
+        Names of the plugins not in OUTPUT_NEUTRAL_PLUGINS, in order
+    """
+    names = [
+        plugin if isinstance(plugin, str) else getattr(plugin, "__name__", str(plugin))
+        for plugin in plugins
+    ]
+    return [name for name in names if name not in OUTPUT_NEUTRAL_PLUGINS]
+
+
+def build_key(
+    settings: dict[str, Any], settings_keys: Iterable[str] = DEFAULT_SETTINGS_KEYS
+) -> str:
+    """
+    Compute the part of the cache key shared by all articles of a build.
+
+    Args:
+        settings: Pelican settings
+        settings_keys: Settings that change the plugins' output
+
+    Returns:
+        Hex SHA-256 digest of the code, settings and data fingerprints
+    """
+    content_path = Path(settings["PATH"])
+    code_dirs = [_SRC_DIR] + [Path(path) for path in settings.get("PLUGIN_PATHS", [])]
+    media_dirs = [content_path / path for path in settings.get("STATIC_PATHS", [])]
+    relevant = {key: settings.get(key) for key in settings_keys}
+    if relevant.get("PLUGINS") is not None:
+        # Production adds cache_busting, which shouldn't split the cache
+        relevant["PLUGINS"] = content_plugins(relevant["PLUGINS"])
+    relevant_settings = json.dumps(relevant, sort_keys=True, default=str)
+
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    digest.update(code_fingerprint(code_dirs).encode())
+    digest.update(relevant_settings.encode())
+    digest.update(data_fingerprint(media_dirs, _ROOT_DIR / "data").encode())
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """Transformed content per source file, one JSON file per article."""
+
+    def __init__(self, cache_dir: Path | str, build_key: str):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory of the cache entries
+            build_key: Key part shared by all articles, see build_key()
+        """
+        self.cache_dir = Path(cache_dir)
+        self.build_key = build_key
+
+    def key(self, source_path: Path | str) -> str:
+        """
+        Compute the cache key of an article.
+
+        Args:
+            source_path: Path of the article's source file
+
+        Returns:
+            Hex SHA-256 digest of the build key and the source contents
+        """
+        return hashlib.sha256(
+            f"{self.build_key}:{hash_file(source_path)}".encode()
+        ).hexdigest()
+
+    def get(self, source_path: Path | str, key: str) -> str | None:
+        """
+        Look up the transformed content of an article.
+
+        Args:
+            source_path: Path of the article's source file
+            key: The article's cache key
+
+        Returns:
+            The cached content, or None if missing or stale
+        """
+        try:
+            with open(self._entry_path(source_path), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["content"] if entry.get("key") == key else None
+
+    def put(self, source_path: Path | str, key: str, content: str) -> None:
+        """
+        Store the transformed content of an article.
+
+        Args:
+            source_path: Path of the article's source file
+            key: The article's cache key
+            content: The transformed content
+        """
+        entry_path = self._entry_path(source_path)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = entry_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "content": content}, f, ensure_ascii=False)
+        os.replace(temp_path, entry_path)
+
+    def _entry_path(self, source_path: Path | str) -> Path:
+        """Get the file of an article's entry."""
+        name = hashlib.sha256(os.path.abspath(source_path).encode()).hexdigest()
+        return self.cache_dir / f"{name}.json"
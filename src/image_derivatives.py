@@ -0,0 +1,376 @@
+"""Responsive derivatives of generated images.
+
+Imagen returns 1024px JPEGs, but flashcards display them at a few hundred CSS
+pixels. This module renders each source image at several widths in AVIF and
+WebP, plus JPEG fallbacks, so pages can offer them through ``srcset``.
+It also computes a tiny blurred placeholder shown while the image loads.
+Rendering is CPU-bound and runs in a process pool. Results are recorded in a
+JSON manifest keyed by the source's content hash, so an image is only
+re-rendered when it changes.
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from json_store import read_json, update_json
+from media_index import get_media_index
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = Path(__file__).parent.parent / "data" / "image_derivatives.json"
+
+# Subdirectory of the source image's directory holding its derivatives
+DERIVATIVE_DIR = "derived"
+# Rendered widths in pixels; sources are never upscaled
+DERIVATIVE_WIDTHS = (360, 540, 720)
+# (extension, MIME type, Pillow save options), best compression first. The last
+# format is the fallback for browsers without <picture> source support.
+DERIVATIVE_FORMATS = (
+    ("avif", "image/avif", {"quality": 50}),
+    ("webp", "image/webp", {"quality": 75, "method": 6}),
+    ("jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+# Placeholder resolution in pixels per side; the browser's upscaling blurs it
+PLACEHOLDER_SIZE = 8
+
+# Characters of the source hash used in derivative filenames
+_HASH_LENGTH = 12
+
+
+def source_hash(path: Path | str) -> str:
+    """
+    Hash the content of a source image.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def supported_formats() -> list[tuple[str, str, dict[str, Any]]]:
+    """
+    Get the derivative formats this Pillow build can write.
+
+    Returns:
+        Entries of ``DERIVATIVE_FORMATS`` with an available encoder
+    """
+    extensions = Image.registered_extensions()
+    return [
+        entry
+        for entry in DERIVATIVE_FORMATS
+        if extensions.get(f".{entry[0]}") in Image.SAVE
+    ]
+
+
+def block_mean(pixels: np.ndarray, size: int = PLACEHOLDER_SIZE) -> np.ndarray:
+    """
+    Downsample an image to size x size by averaging equal blocks of pixels.
+
+    Args:
+        pixels: Array of shape (height, width, channels)
+        size: Output pixels per side
+
+    Returns:
+        Array of shape (size, size, channels); edge rows and columns that don't
+        fill a whole block are ignored
+    """
+    height, width, channels = pixels.shape
+    block_h, block_w = max(height // size, 1), max(width // size, 1)
+    rows, cols = min(size, height), min(size, width)
+    blocks = pixels[: rows * block_h, : cols * block_w].reshape(
+        rows, block_h, cols, block_w, channels
+    )
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def placeholder_data_uri(image: Image.Image) -> str:
+    """
+    Encode a tiny placeholder of an image as a PNG data URI.
+
+    Args:
+        image: RGB image
+
+    Returns:
+        "data:image/png;base64,..." URI of a few hundred bytes
+    """
+    pixels = block_mean(np.asarray(image, dtype=np.float32))
+    thumbnail = Image.fromarray(np.rint(pixels).astype(np.uint8), "RGB")
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def render_placeholder(source: str) -> str:
+    """
+    Compute the placeholder of one image (runs in a worker process).
+
+    Args:
+        source: Path to the source image
+
+    Returns:
+        Placeholder data URI
+    """
+    with Image.open(source) as image:
+        return placeholder_data_uri(image.convert("RGB"))
+
+
+def render_derivatives(
+    source: str,
+    digest: str,
+    widths: tuple[int, ...],
+    formats: list[tuple[str, str, dict[str, Any]]],
+) -> dict[str, Any]:
+    """
+    Render the derivatives and placeholder of one image (runs in a worker process).
+
+    Args:
+        source: Path to the source image
+        digest: Content hash of the source, embedded in the filenames
+        widths: Widths to render
+        formats: Formats to render each width in
+
+    Returns:
+        Dict with "variants", one dict per file with "file" (relative to the
+        source's directory), "type" (MIME type), "width" and "height", and
+        "placeholder", the placeholder data URI
+    """
+    source_path = Path(source)
+    output_dir = source_path.parent / DERIVATIVE_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    extensions = Image.registered_extensions()
+
+    variants = []
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+        # Always include one rendering, even for sources smaller than every width
+        targets = [w for w in widths if w < image.width] or [image.width]
+        for width in targets:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+            for extension, mime_type, options in formats:
+                name = f"{source_path.stem}.{digest[:_HASH_LENGTH]}-{width}.{extension}"
+                temp_path = output_dir / f"{name}.{os.getpid()}.tmp"
+                resized.save(temp_path, format=extensions[f".{extension}"], **options)
+                os.replace(temp_path, output_dir / name)
+                variants.append(
+                    {
+                        "file": f"{DERIVATIVE_DIR}/{name}",
+                        "type": mime_type,
+                        "width": width,
+                        "height": height,
+                    }
+                )
+        placeholder = placeholder_data_uri(image)
+    return {"variants": variants, "placeholder": placeholder}
+
+
+class ImageDerivatives:
+    """Builds derivatives on demand and keeps the manifest of existing ones."""
+
+    def __init__(
+        self, manifest_path: Path | str = DEFAULT_MANIFEST_PATH, max_workers=None
+    ):
+        """
+        Initialize the derivative builder.
+
+        Args:
+            manifest_path: Path to the JSON manifest
+            max_workers: Worker processes for rendering (default: CPU count)
+        """
+        self.manifest_path = Path(manifest_path)
+        self.max_workers = max_workers
+        self._entries: dict[str, dict[str, Any]] | None = None
+        self._executor: ProcessPoolExecutor | None = None
+
+    def variants(self, source: Path | str) -> list[dict[str, Any]]:
+        """
+        Get the recorded derivatives of an image.
+
+        Args:
+            source: Path to the source image
+
+        Returns:
+            Variant dicts as returned by ``render_derivatives``, or an empty
+            list if the image has none
+        """
+        entry = self._load().get(self._key(source))
+        return entry["variants"] if entry else []
+
+    def placeholder(self, source: Path | str) -> str | None:
+        """
+        Get the recorded placeholder of an image.
+
+        Args:
+            source: Path to the source image
+
+        Returns:
+            Placeholder data URI, or None if the image has none
+        """
+        entry = self._load().get(self._key(source))
+        return entry.get("placeholder") if entry else None
+
+    async def ensure(self, sources: list[Path]) -> None:
+        """
+        Render the missing or outdated derivatives of several images.
+
+        A source whose size and modification time match the manifest is
+        trusted without hashing. Otherwise its content hash decides whether
+        the recorded derivatives are still valid.
+
+        Args:
+            sources: Paths to source images; missing files are skipped
+        """
+        media_index = get_media_index()
+        entries = self._load()
+        formats = supported_formats()
+        loop = asyncio.get_running_loop()
+
+        def submit(function, *args) -> asyncio.Future:
+            return loop.run_in_executor(self._get_executor(), function, *args)
+
+        # Source -> (content hash, future); the hash is None for placeholder jobs
+        jobs: dict[Path, tuple[str | None, asyncio.Future]] = {}
+        # Manifest keys whose entries changed
+        changed: set[str] = set()
+        for source in dict.fromkeys(sources):
+            if not media_index.exists(source):
+                continue
+            entry = entries.get(self._key(source))
+            stat = os.stat(source)
+            signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            if entry and all(
+                media_index.exists(source.parent / variant["file"])
+                for variant in entry["variants"]
+            ):
+                if {key: entry[key] for key in signature} == signature:
+                    digest = entry["hash"]
+                else:
+                    # Touched but possibly unchanged, e.g. after a checkout
+                    digest = await asyncio.to_thread(source_hash, source)
+                    if entry["hash"] == digest:
+                        entry.update(signature)
+                        changed.add(self._key(source))
+
+                if entry["hash"] == digest:
+                    if "placeholder" not in entry:
+                        # Entry from before placeholders were recorded
+                        jobs[source] = (None, submit(render_placeholder, str(source)))
+                    continue
+            else:
+                digest = await asyncio.to_thread(source_hash, source)
+
+            jobs[source] = (
+                digest,
+                submit(
+                    render_derivatives,
+                    str(source),
+                    digest,
+                    DERIVATIVE_WIDTHS,
+                    formats,
+                ),
+            )
+
+        if jobs:
+            _log.info(f"Rendering derivatives for {len(jobs)} images")
+        for source, (digest, future) in jobs.items():
+            try:
+                result = await future
+            except Exception as e:
+                _log.info(f"Warning: Failed to render derivatives of {source}: {e}")
+                continue
+
+            key = self._key(source)
+            changed.add(key)
+            if digest is None:
+                entries[key]["placeholder"] = result
+                continue
+
+            old_files = {v["file"] for v in entries.get(key, {}).get("variants", [])}
+            for variant in result["variants"]:
+                media_index.add(source.parent / variant["file"])
+                old_files.discard(variant["file"])
+            # Derivatives of the previous version of the image
+            for old_file in old_files:
+                (source.parent / old_file).unlink(missing_ok=True)
+                media_index.discard(source.parent / old_file)
+
+            stat = os.stat(source)
+            entries[key] = {
+                "hash": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                **result,
+            }
+
+        if changed:
+            updates = {key: entries[key] for key in changed}
+            # Merged into the manifest's current entries, which other processes
+            # update
+            self._entries = update_json(self.manifest_path, lambda e: e.update(updates))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the process pool, starting it on first use."""
+        if self._executor is None:
+            # Spawned, not forked: the build process runs the background event
+            # loop and other threads whose locks a forked child could inherit held
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @staticmethod
+    def _key(source: Path | str) -> str:
+        """Get the manifest key of a source image, e.g. "wordbank/abc.jpg"."""
+        source = Path(source)
+        return f"{source.parent.name}/{source.name}"
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """Load the manifest from disk on first use."""
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = read_json(self.manifest_path)
+        return self._entries
+
+
+# Global derivative builder instance
+_image_derivatives = None
+
+
+def get_image_derivatives() -> ImageDerivatives:
+    """
+    Get or create the global image derivative builder.
+
+    Returns:
+        ImageDerivatives instance
+    """
+    global _image_derivatives
+    if _image_derivatives is None:
+        _image_derivatives = ImageDerivatives()
+    return _image_derivatives
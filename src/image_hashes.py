@@ -0,0 +1,412 @@
+"""Perceptual-hash index of the generated wordbank images.
+
+Imagen prompts for related words often come back as near-identical pictures.
+Each image gets a difference hash (dHash) and a DCT-based perceptual hash
+(pHash), both 64 bits, so near-duplicates can be found by Hamming distance.
+Hashes are cached in a JSON file by file size and modification time.
+
+The index also records image aliases: a word whose generated image turned out
+to be visually equivalent to an existing one can point at that image instead
+of shipping its own copy.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from PIL import Image
+
+from json_store import read_json, update_json
+
+_log = logging.getLogger(__name__)
+
+_ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_IMAGE_DIR = _ROOT_DIR / "content" / "images" / "wordbank"
+DEFAULT_INDEX_PATH = _ROOT_DIR / "data" / "image_hashes.json"
+
+# Images whose dHash and pHash both differ in at most this many of 64 bits are
+# near-duplicates
+DEFAULT_MAX_DISTANCE = 10
+
+# Side of the downscaled image the pHash DCT runs on
+_PHASH_SIZE = 32
+# Side of the low-frequency DCT block kept for the pHash
+_PHASH_LOW = 8
+_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    """Pack a boolean array of 64 bits into an integer."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix of size n x n."""
+    k = np.arange(n)[:, np.newaxis]
+    matrix = np.cos(np.pi * (2 * np.arange(n) + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_PHASH_SIZE)
+
+
+def dhash(image: Image.Image) -> int:
+    """
+    Compute the 64-bit difference hash of an image.
+
+    Each bit tells whether a pixel of the 9x8 grayscale thumbnail is brighter
+    than its right neighbour.
+
+    Args:
+        image: Image to hash
+
+    Returns:
+        Hash as an integer
+    """
+    pixels = np.asarray(
+        image.convert("L").resize((9, 8), Image.Resampling.LANCZOS), dtype=np.int16
+    )
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def phash(image: Image.Image) -> int:
+    """
+    Compute the 64-bit perceptual hash of an image.
+
+    Each bit tells whether a low-frequency DCT coefficient of the 32x32
+    grayscale thumbnail is above the median of those coefficients.
+
+    Args:
+        image: Image to hash
+
+    Returns:
+        Hash as an integer
+    """
+    thumbnail = image.convert("L").resize(
+        (_PHASH_SIZE, _PHASH_SIZE), Image.Resampling.LANCZOS
+    )
+    pixels = np.asarray(thumbnail, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:_PHASH_LOW, :_PHASH_LOW]
+    # The DC term only reflects overall brightness
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def hash_image(path: Path | str) -> tuple[int, int]:
+    """
+    Compute both hashes of an image file.
+
+    Args:
+        path: Path to the image
+
+    Returns:
+        Tuple of (dhash, phash)
+    """
+    with Image.open(path) as image:
+        return dhash(image), phash(image)
+
+
+def hamming_distances(hashes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Count differing bits between a query and many hashes.
+
+    Args:
+        hashes: Array of shape (n, k) of uint64 hashes
+        query: Array of shape (k,) of uint64 hashes
+
+    Returns:
+        Array of shape (n, k) with the Hamming distance of each hash
+    """
+    differing = np.bitwise_xor(hashes, query)
+    octets = differing.view(np.uint8).reshape(*differing.shape, 8)
+    return np.unpackbits(octets, axis=-1).sum(axis=-1)
+
+
+class ImageHashIndex:
+    """JSON-backed perceptual hashes and aliases of the images in a directory."""
+
+    def __init__(
+        self,
+        image_dir: Path | str = DEFAULT_IMAGE_DIR,
+        path: Path | str = DEFAULT_INDEX_PATH,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            image_dir: Directory with the images
+            path: Path to the JSON file
+        """
+        self.image_dir = Path(image_dir)
+        self.path = Path(path)
+        self._data: dict[str, dict[str, Any]] | None = None
+        # Image names and an (n, 2) array of their (dhash, phash), built on use
+        self._names: list[str] | None = None
+        self._hashes: np.ndarray | None = None
+
+    def refresh(self) -> int:
+        """
+        Hash the images that are new or changed since the last refresh.
+
+        Returns:
+            Number of images hashed
+        """
+        images = self._load()["images"]
+        present = set()
+        updated = {}
+        with os.scandir(self.image_dir) as entries:
+            for entry in entries:
+                suffix = Path(entry.name).suffix.lower()
+                if not entry.is_file() or suffix not in _IMAGE_SUFFIXES:
+                    continue
+                present.add(entry.name)
+                stat = entry.stat()
+                cached = images.get(entry.name)
+                if (
+                    cached
+                    and cached["size"] == stat.st_size
+                    and cached["mtime_ns"] == stat.st_mtime_ns
+                ):
+                    continue
+                updated[entry.name] = self._entry(entry.path, stat)
+
+        removed = images.keys() - present
+        if updated or removed:
+            _log.info(f"Hashed {len(updated)} images in {self.image_dir}")
+
+            def merge(data: dict[str, Any]) -> None:
+                data["images"].update(updated)
+                for name in removed:
+                    # Unless another process wrote it since the scan
+                    if not (self.image_dir / name).exists():
+                        data["images"].pop(name, None)
+
+            self._update(merge)
+        return len(updated)
+
+    def add(self, path: Path | str) -> None:
+        """
+        Hash a newly written image.
+
+        Args:
+            path: Path to the image, inside ``image_dir``
+        """
+        path = Path(path)
+        entry = self._entry(path, os.stat(path))
+
+        def merge(data: dict[str, Any]) -> None:
+            data["images"][path.name] = entry
+
+        self._update(merge)
+
+    def discard(self, path: Path | str) -> None:
+        """
+        Forget a removed image.
+
+        Args:
+            path: Path to the image, inside ``image_dir``
+        """
+        name = Path(path).name
+
+        def merge(data: dict[str, Any]) -> None:
+            data["images"].pop(name, None)
+
+        self._update(merge)
+
+    def find_similar(
+        self, path: Path | str, max_distance: int = DEFAULT_MAX_DISTANCE
+    ) -> list[tuple[str, int]]:
+        """
+        Find indexed images that look like an image.
+
+        Args:
+            path: Path to the image; it's hashed if it isn't indexed
+            max_distance: Maximum Hamming distance of both hashes
+
+        Returns:
+            List of (image name, distance) sorted by distance, excluding the
+            image itself. The distance is the larger of the two hashes'.
+        """
+        path = Path(path)
+        cached = self._load()["images"].get(path.name)
+        if cached and path.parent == self.image_dir:
+            query = (int(cached["dhash"], 16), int(cached["phash"], 16))
+        else:
+            query = hash_image(path)
+
+        names, hashes = self._matrix()
+        if not names:
+            return []
+        query_hashes = np.array(query, dtype=np.uint64)
+        distances = hamming_distances(hashes, query_hashes).max(axis=1)
+        matches = [
+            (names[i], int(distances[i]))
+            for i in np.flatnonzero(distances <= max_distance)
+            if names[i] != path.name
+        ]
+        return sorted(matches, key=lambda match: match[1])
+
+    def duplicate_groups(
+        self, max_distance: int = DEFAULT_MAX_DISTANCE
+    ) -> list[list[str]]:
+        """
+        Group the indexed images into sets of near-duplicates.
+
+        Args:
+            max_distance: Maximum Hamming distance of both hashes
+
+        Returns:
+            Groups of two or more image names
+        """
+        names, hashes = self._matrix()
+        # Union-find over the near-duplicate pairs
+        parent = list(range(len(names)))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i in range(len(names) - 1):
+            distances = hamming_distances(hashes[i + 1 :], hashes[i]).max(axis=1)
+            for j in np.flatnonzero(distances <= max_distance) + i + 1:
+                parent[root(int(j))] = root(i)
+
+        groups: dict[int, list[str]] = {}
+        for i, name in enumerate(names):
+            groups.setdefault(root(i), []).append(name)
+        return [sorted(group) for group in groups.values() if len(group) > 1]
+
+    def alias(self, name: str) -> str | None:
+        """
+        Get the image an image name was aliased to.
+
+        Args:
+            name: Image file name
+
+        Returns:
+            Name of the image to use instead, or None if not aliased
+        """
+        return self._load()["aliases"].get(name)
+
+    def resolve(self, name: str) -> str:
+        """
+        Get the image file to show for an image name.
+
+        Args:
+            name: Image file name
+
+        Returns:
+            The alias target if the name is aliased, the name itself otherwise
+        """
+        return self.alias(name) or name
+
+    def set_alias(self, name: str, target: str) -> None:
+        """
+        Make an image name point at another image.
+
+        Args:
+            name: Image file name
+            target: Name of the image to use instead
+        """
+        target = self.resolve(target)
+
+        def merge(data: dict[str, Any]) -> None:
+            data["aliases"][name] = target
+
+        self._update(merge)
+
+    @staticmethod
+    def _entry(path: Path | str, stat: os.stat_result) -> dict[str, Any]:
+        """Hash an image into an index entry."""
+        dhash_value, phash_value = hash_image(path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "dhash": f"{dhash_value:016x}",
+            "phash": f"{phash_value:016x}",
+        }
+
+    def _matrix(self) -> tuple[list[str], np.ndarray]:
+        """Get the indexed names and their hashes as a uint64 array."""
+        if self._names is None:
+            images = self._load()["images"]
+            self._names = sorted(images)
+            self._hashes = np.array(
+                [
+                    (int(images[name]["dhash"], 16), int(images[name]["phash"], 16))
+                    for name in self._names
+                ],
+                dtype=np.uint64,
+            ).reshape(-1, 2)
+        return self._names, self._hashes
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        """Load the index from disk on first use."""
+        if self._data is None:
+            self._data = {"images": {}, "aliases": {}, **read_json(self.path)}
+        return self._data
+
+    def _update(self, merge: Callable[[dict[str, Any]], None]) -> None:
+        """Apply a change to the index file and reload it from the result."""
+
+        def apply(data: dict[str, Any]) -> None:
+            data.setdefault("images", {})
+            data.setdefault("aliases", {})
+            merge(data)
+
+        self._data = update_json(self.path, apply)
+        self._names = None
+
+
+# Global index instance
+_image_hashes = None
+
+
+def get_image_hashes() -> ImageHashIndex:
+    """
+    Get or create the global image hash index.
+
+    Returns:
+        ImageHashIndex instance
+    """
+    global _image_hashes
+    if _image_hashes is None:
+        _image_hashes = ImageHashIndex()
+    return _image_hashes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from wordbank_storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Wordbank image hash utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser(
+        "report", help="List groups of near-identical wordbank images"
+    )
+    report_parser.add_argument(
+        "--max-distance",
+        type=int,
+        default=DEFAULT_MAX_DISTANCE,
+        help="Maximum Hamming distance (of 64 bits) between near-duplicates",
+    )
+    args = parser.parse_args()
+
+    index = get_image_hashes()
+    index.refresh()
+    storage = open_storage(_ROOT_DIR / "data" / "wordbank.jsonl")
+    groups = index.duplicate_groups(args.max_distance)
+    for group in groups:
+        print("Near-identical images:")
+        for name in group:
+            words = ", ".join(
+                f"{record['word']} ({record['en_translation']})"
+                for record in storage.find(word_hash=Path(name).stem)
+            )
+            print(f"  {name}\t{words}")
+    print(f"{len(groups)} groups, {sum(len(g) for g in groups)} images")
@@ -0,0 +1,98 @@
+"""Shared JSON files written by several build processes.
+
+The audio metadata, image derivative manifest and image hash index are single
+JSON files updated by every process of a build: the main process, parallel
+build workers and the nodes of a sharded build. An update therefore never
+writes a process's in-memory copy over the file. It takes the file's lock
+(``<name>.lock``, like the wordbank record log), re-reads the file, applies
+its change to the current contents and replaces the file through a temp file
+of its own.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable
+
+_log = logging.getLogger(__name__)
+
+
+@contextmanager
+def locked(path: Path):
+    """
+    Hold the cross-process lock of a JSON file.
+
+    Args:
+        path: Path of the JSON file
+    """
+    lock_path = path.with_name(f"{path.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    # A lock file opened per call also serializes the threads of a process
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: Path) -> dict[str, Any]:
+    """
+    Read a JSON file.
+
+    Args:
+        path: Path of the JSON file
+
+    Returns:
+        The parsed object, or an empty dict if the file is missing or invalid
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        _log.info(f"Warning: Failed to parse {path}: {e}")
+        return {}
+
+
+def write_json(path: Path, data: dict[str, Any]) -> None:
+    """
+    Replace a JSON file atomically.
+
+    Args:
+        path: Path of the JSON file
+        data: Object to write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Unique per node, process and thread, so writers never share a temp file
+    suffix = f"{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}"
+    temp_path = path.with_name(f"{path.name}.{suffix}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def update_json(
+    path: Path, update: Callable[[dict[str, Any]], None]
+) -> dict[str, Any]:
+    """
+    Apply a change to the current contents of a JSON file.
+
+    Args:
+        path: Path of the JSON file
+        update: Function changing the parsed contents in place
+
+    Returns:
+        The updated contents, including other processes' changes
+    """
+    with locked(path):
+        data = read_json(path)
+        update(data)
+        write_json(path, data)
+    return data
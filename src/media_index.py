@@ -0,0 +1,109 @@
+"""Build-wide index of the media files present on disk.
+
+Every clip and image is checked several times per build (before generating it,
+before emitting HTML for it, for each encoding variant). Instead of a stat per
+check, each media directory is listed once with ``os.scandir`` and later
+queries are answered from memory. Generators register the files they write,
+so the index stays current for the rest of the build.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+_log = logging.getLogger(__name__)
+
+
+class MediaIndex:
+    """Set of file names per directory, scanned lazily on first query."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._listings: dict[str, set[str]] = {}
+        # Generators write from worker threads (ffmpeg runs in the thread pool)
+        self._lock = threading.Lock()
+
+    def exists(self, path: Path | str) -> bool:
+        """
+        Check whether a file exists.
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            True if the file was present when its directory was scanned or has
+            been added since, False otherwise
+        """
+        directory, name = os.path.split(os.path.abspath(path))
+        return name in self._listing(directory)
+
+    def add(self, path: Path | str) -> None:
+        """
+        Record a file that was just written.
+
+        Args:
+            path: Path of the file
+        """
+        directory, name = os.path.split(os.path.abspath(path))
+        listing = self._listing(directory)
+        with self._lock:
+            listing.add(name)
+
+    def discard(self, path: Path | str) -> None:
+        """
+        Record a file that was removed.
+
+        Args:
+            path: Path of the file
+        """
+        directory, name = os.path.split(os.path.abspath(path))
+        listing = self._listing(directory)
+        with self._lock:
+            listing.discard(name)
+
+    def clear(self) -> None:
+        """Forget all listings, so the next queries rescan their directories."""
+        with self._lock:
+            self._listings.clear()
+
+    def _listing(self, directory: str) -> set[str]:
+        """Get the file names in a directory, scanning it on first use."""
+        listing = self._listings.get(directory)
+        if listing is not None:
+            return listing
+
+        with self._lock:
+            listing = self._listings.get(directory)
+            if listing is None:
+                listing = self._scan(directory)
+                self._listings[directory] = listing
+        return listing
+
+    @staticmethod
+    def _scan(directory: str) -> set[str]:
+        """List the regular files in a directory."""
+        try:
+            with os.scandir(directory) as entries:
+                names = {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            names = set()
+        _log.info(f"Indexed {len(names)} media files in {directory}")
+        return names
+
+
+# Global index instance
+_media_index = None
+
+
+def get_media_index() -> MediaIndex:
+    """
+    Get or create the global media index.
+
+    Returns:
+        MediaIndex instance
+    """
+    global _media_index
+    if _media_index is None:
+        _media_index = MediaIndex()
+    return _media_index
@@ -0,0 +1,226 @@
+"""Shared Japanese morphological analysis.
+
+Loading the unidic dictionary is slow, so the whole build shares a single
+lazily-built fugashi tagger. The tagger isn't thread-safe (TTS converts text
+on the event loop's thread while content plugins run on the main thread), so
+every call goes through a lock. Parses and readings are memoized: lesson text
+repeats the same words and phrases across TTS, furigana, word spans and
+flashcards, and each distinct string is only analyzed once.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+import fugashi
+
+_log = logging.getLogger(__name__)
+
+# Number of distinct strings kept by each memoized function
+CACHE_SIZE = 8192
+
+# Japanese characters: hiragana, katakana, kanji and Japanese punctuation
+JAPANESE_PATTERN = re.compile(
+    r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF\u3000-\u303F]+"
+)
+# Word characters only (no punctuation): hiragana, katakana and kanji
+JAPANESE_WORD_PATTERN = re.compile(
+    r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF]"
+)
+# CJK Unified Ideographs and Extension A
+KANJI_PATTERN = re.compile(r"[\u4E00-\u9FFF\u3400-\u4DBF]")
+
+# Small kana that form one mora with the preceding kana, e.g. the ゃ of きゃ
+_SMALL_KANA = set("ぁぃぅぇぉゃゅょゎァィゥェォャュョヮ")
+# Hiragana and katakana letters, including the small tsu and the long vowel mark
+_KANA_PATTERN = re.compile(r"[\u3041-\u3096\u30A1-\u30FA\u30FC]")
+
+# Katakana (U+30A0 to U+30FF) maps onto hiragana (U+3040 to U+309F) at an offset of 0x60
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A0, 0x3100)}
+
+
+@dataclass(frozen=True)
+class Token:
+    """A single morpheme with the unidic features used across the site."""
+
+    surface: str
+    # Reading in katakana
+    kana: str | None
+    # Reading of the base form in katakana
+    kana_base: str | None
+    lemma: str | None
+    # Top-level part of speech, e.g. "名詞" or "動詞"
+    pos1: str | None
+
+
+# Global tagger instance
+_tagger = None
+# Serializes loading the tagger and each call with the copying of its nodes
+_tagger_lock = threading.Lock()
+
+
+def get_tagger() -> fugashi.Tagger:  # type: ignore
+    """
+    Get or create the global fugashi tagger.
+
+    Returns:
+        fugashi Tagger instance
+    """
+    global _tagger
+    with _tagger_lock:
+        if _tagger is None:
+            _log.info("Loading fugashi tagger...")
+            _tagger = fugashi.Tagger()  # type: ignore
+    return _tagger
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse(text: str) -> tuple[Token, ...]:
+    """Split text into morphemes.
+
+    The tagger's nodes are only valid until its next call, so their features
+    are copied into immutable tokens that are safe to cache, while holding the
+    tagger's lock.
+
+    Args:
+        text: Japanese text
+
+    Returns:
+        Tuple of tokens
+    """
+    tagger = get_tagger()
+    with _tagger_lock:
+        return tuple(
+            Token(
+                surface=word.surface,
+                kana=getattr(word.feature, "kana", None),
+                kana_base=getattr(word.feature, "kanaBase", None),
+                lemma=getattr(word.feature, "lemma", None),
+                pos1=getattr(word.feature, "pos1", None),
+            )
+            for word in tagger(text)
+        )
+
+
+def katakana_to_hiragana(text: str) -> str:
+    """Convert katakana characters to hiragana.
+
+    Args:
+        text: String containing katakana characters
+
+    Returns:
+        String with katakana converted to hiragana
+    """
+    return text.translate(_KATAKANA_TO_HIRAGANA)
+
+
+def contains_kanji(text: str) -> bool:
+    """Check if text contains any kanji characters.
+
+    Args:
+        text: String to check
+
+    Returns:
+        True if text contains kanji, False otherwise
+    """
+    return KANJI_PATTERN.search(text) is not None
+
+
+def count_morae(text: str) -> int:
+    """Estimate the spoken length of text in morae.
+
+    Kana count one mora each, except small kana that merge with the previous
+    one. Kanji left unconverted count as two and other letters and digits as
+    one, while punctuation and whitespace aren't spoken.
+
+    Args:
+        text: Text, ideally already converted with to_hiragana()
+
+    Returns:
+        Estimated number of morae
+    """
+    count = 0
+    for char in text:
+        if _KANA_PATTERN.match(char):
+            count += char not in _SMALL_KANA
+        elif KANJI_PATTERN.match(char):
+            count += 2
+        elif char.isalnum():
+            count += 1
+    return count
+
+
+def is_japanese_word(text: str) -> bool:
+    """Check if text is a Japanese word (not just punctuation).
+
+    Args:
+        text: String to check
+
+    Returns:
+        True if text contains hiragana, katakana or kanji, False otherwise
+    """
+    return JAPANESE_WORD_PATTERN.search(text) is not None
+
+
+def token_reading(token: Token) -> str:
+    """Get a token's reading in hiragana, falling back to its surface form.
+
+    Args:
+        token: Token from ``parse``
+
+    Returns:
+        Hiragana reading
+    """
+    return katakana_to_hiragana(token.kana) if token.kana else token.surface
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def reading(text: str) -> str:
+    """Get the full hiragana reading of a word or phrase.
+
+    Args:
+        text: Japanese text
+
+    Returns:
+        Reading with every token converted to hiragana
+    """
+    return "".join(token_reading(token) for token in parse(text))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_hiragana(text: str) -> str:
+    """Replace the kanji words in text with their hiragana readings.
+
+    Non-Japanese text and words without kanji are kept as they are.
+
+    Args:
+        text: Text containing kanji characters
+
+    Returns:
+        Text with kanji converted to hiragana readings
+    """
+    if not text.strip():
+        return text
+
+    output = []
+    last_end = 0
+    for match in JAPANESE_PATTERN.finditer(text):
+        # Add any non-Japanese text before this match
+        if match.start() > last_end:
+            output.append(text[last_end : match.start()])
+
+        for token in parse(match.group()):
+            if contains_kanji(token.surface):
+                output.append(token_reading(token))
+            else:
+                output.append(token.surface)
+
+        last_end = match.end()
+
+    # Add any remaining non-Japanese text
+    if last_end < len(text):
+        output.append(text[last_end:])
+
+    return "".join(output)
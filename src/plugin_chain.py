@@ -0,0 +1,33 @@
+"""Bookkeeping of the content plugin chain.
+
+The content plugins transform an article's ``_content`` one after another in
+``content_object_init``, in ``PLUGINS`` order. When the whole chain already ran
+elsewhere - in a worker process of the parallel build, or from a cache - the
+content object is marked as processed, and the plugins leave it alone.
+"""
+
+# Attribute set on content objects whose _content already went through the chain
+PROCESSED_ATTRIBUTE = "_plugin_chain_processed"
+
+
+def mark_processed(content) -> None:
+    """
+    Mark a content object as transformed by the whole plugin chain.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+    """
+    setattr(content, PROCESSED_ATTRIBUTE, True)
+
+
+def is_processed(content) -> bool:
+    """
+    Check whether a content object was already transformed by the plugin chain.
+
+    Args:
+        content: The Pelican content object (Article or Page)
+
+    Returns:
+        True if the content plugins should skip it
+    """
+    return getattr(content, PROCESSED_ATTRIBUTE, False)
@@ -0,0 +1,362 @@
+"""Rate-limited scheduler for external generation calls.
+
+Every LLM, TTS and Imagen request goes through one scheduler, which knows the
+quota of each provider:
+
+- a token bucket caps the request rate,
+- a concurrency cap bounds the requests in flight,
+- waiting jobs start in priority order,
+- 429 and 5xx responses are retried with jittered exponential backoff, and a
+  429 empties the provider's bucket so other jobs back off too instead of
+  piling into a retry storm.
+
+The scheduler's state is guarded by a lock, since code on other threads (e.g.
+the ingestion tool or tests with their own loops) may share it. Waiting jobs
+don't poll: only the job first in line checks for a free slot and sleeps until
+its token is due; the others are parked on a future that is resolved, through
+its own loop, when they reach the head of the queue and a slot may be free.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+from typing import Any, TypeVar
+
+_log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Job priorities; lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+# Completed jobs per provider between progress log lines
+STATS_LOG_EVERY = 25
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """Quota of one provider."""
+
+    # Sustained requests per second
+    rate: float = 1.0
+    # Requests that may start back to back after an idle period
+    burst: int = 5
+    # Requests in flight at once
+    concurrency: int = 4
+    # Retries of a failed request before giving up
+    max_retries: int = 5
+    # Backoff before the first retry, doubling per retry, in seconds
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+
+
+# Limits of the providers used by the build
+DEFAULT_LIMITS = {
+    "gemini-flash": ProviderLimits(rate=15.0, burst=30, concurrency=30),
+    "gemini-pro": ProviderLimits(rate=2.0, burst=10, concurrency=15),
+    "gemini-tts": ProviderLimits(rate=1.0, burst=10, concurrency=8),
+    "imagen": ProviderLimits(rate=0.5, burst=5, concurrency=4),
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Check whether a failed request is worth retrying.
+
+    Rate limiting (429), server errors (5xx), timeouts and connection errors
+    are retryable. Wrapping exceptions are unwrapped through their causes.
+
+    Args:
+        error: The exception raised by the request
+
+    Returns:
+        True if the request should be retried
+    """
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+
+    cause: BaseException | None = error
+    while cause is not None:
+        if isinstance(cause, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def _status_code(error: BaseException | None) -> int | None:
+    """Find the HTTP status code of an error or of one of its causes."""
+    while error is not None:
+        for attribute in ("status_code", "code"):
+            value = getattr(error, attribute, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+        error = error.__cause__ or error.__context__
+    return None
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate."""
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self) -> None:
+        """Remove all tokens, e.g. after the provider reported rate limiting."""
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+
+
+class _Provider:
+    """Queue, bucket and counters of one provider."""
+
+    def __init__(self, limits: ProviderLimits):
+        self.limits = limits
+        self.bucket = TokenBucket(limits.rate, limits.burst)
+        # Heap of (priority, sequence) tickets of waiting jobs
+        self.queue: list[tuple[int, int]] = []
+        # Loop and wake-up future of each parked job, by ticket
+        self.waiters: dict[
+            tuple[int, int], tuple[asyncio.AbstractEventLoop, asyncio.Future]
+        ] = {}
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+
+class Scheduler:
+    """Runs jobs against providers within their rate and concurrency limits."""
+
+    def __init__(self, limits: dict[str, ProviderLimits] | None = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            limits: Limits per provider name. Defaults to ``DEFAULT_LIMITS``;
+                    unknown providers get ``ProviderLimits()``.
+        """
+        self._limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self._providers: dict[str, _Provider] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def configure(self, provider: str, **changes: Any) -> None:
+        """
+        Change the limits of a provider.
+
+        Args:
+            provider: Provider name
+            **changes: ``ProviderLimits`` fields to change
+        """
+        with self._lock:
+            limits = replace(self._limits.get(provider, ProviderLimits()), **changes)
+            self._limits[provider] = limits
+            state = self._providers.get(provider)
+            if state is not None:
+                state.limits = limits
+                state.bucket.rate = limits.rate
+                state.bucket.capacity = limits.burst
+                # A higher limit may let the first job start
+                self._wake_head(state)
+
+    async def run(
+        self,
+        provider: str,
+        job: Callable[[], Awaitable[T]],
+        priority: int = PRIORITY_NORMAL,
+    ) -> T:
+        """
+        Run a job within the provider's limits, retrying transient failures.
+
+        Args:
+            provider: Provider name, e.g. "gemini-flash"
+            job: Callable creating the request coroutine; called once per attempt
+            priority: Lower values start first
+
+        Returns:
+            The job's result
+
+        Raises:
+            Exception: The job's error once it isn't retryable or retries ran out
+        """
+        state = self._provider(provider)
+        with self._lock:
+            state.submitted += 1
+
+        attempt = 0
+        while True:
+            await self._acquire(state, priority)
+            try:
+                result = await job()
+            except Exception as e:
+                with self._lock:
+                    state.running -= 1
+                    self._wake_head(state)
+                    retry = attempt < state.limits.max_retries and is_retryable(e)
+                    if not retry:
+                        state.failed += 1
+                        raise
+                    state.retried += 1
+                    if _status_code(e) == 429:
+                        # Back everyone off, not just this job
+                        state.bucket.drain()
+                # Full jitter keeps retries of simultaneous failures apart
+                backoff = state.limits.base_delay * 2**attempt
+                delay = random.uniform(0, min(state.limits.max_delay, backoff))
+                _log.info(
+                    f"{provider} request failed ({e}) - retry {attempt + 1} "
+                    f"in {delay:.1f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled while running
+                with self._lock:
+                    state.running -= 1
+                    state.failed += 1
+                    self._wake_head(state)
+                raise
+
+            with self._lock:
+                state.running -= 1
+                state.completed += 1
+                self._wake_head(state)
+                log_progress = state.completed % STATS_LOG_EVERY == 0
+            if log_progress:
+                _log.info(f"{provider}: {self.stats()[provider]}")
+            return result
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Get the live counters of every provider used so far.
+
+        Returns:
+            Dict of provider name to counts of waiting, running, submitted,
+            completed, failed and retried jobs
+        """
+        with self._lock:
+            return {
+                name: {
+                    "waiting": len(state.queue),
+                    "running": state.running,
+                    "submitted": state.submitted,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "retried": state.retried,
+                }
+                for name, state in self._providers.items()
+            }
+
+    def _provider(self, provider: str) -> _Provider:
+        """Get a provider's state, creating it on first use."""
+        with self._lock:
+            state = self._providers.get(provider)
+            if state is None:
+                state = _Provider(self._limits.get(provider, ProviderLimits()))
+                self._providers[provider] = state
+            return state
+
+    async def _acquire(self, state: _Provider, priority: int) -> None:
+        """Wait until the job is first in line, a slot is free and a token is taken."""
+        loop = asyncio.get_running_loop()
+        ticket = (priority, next(self._sequence))
+        with self._lock:
+            heapq.heappush(state.queue, ticket)
+        try:
+            while True:
+                wakeup = loop.create_future()
+                with self._lock:
+                    # Jobs behind the head, or a head without a free slot, wait
+                    # until woken; only a head with a slot waits for its token
+                    timeout = None
+                    if (
+                        state.queue[0] == ticket
+                        and state.running < state.limits.concurrency
+                    ):
+                        timeout = state.bucket.reserve()
+                        if not timeout:
+                            heapq.heappop(state.queue)
+                            state.waiters.pop(ticket, None)
+                            state.running += 1
+                            # The next job may start right away, e.g. in a burst
+                            self._wake_head(state)
+                            return
+                    state.waiters[ticket] = (loop, wakeup)
+                await asyncio.wait((wakeup,), timeout=timeout)
+        except BaseException:
+            with self._lock:
+                state.waiters.pop(ticket, None)
+                if ticket in state.queue:
+                    state.queue.remove(ticket)
+                    heapq.heapify(state.queue)
+                    self._wake_head(state)
+            raise
+
+    @staticmethod
+    def _wake_head(state: _Provider) -> None:
+        """Wake the job first in line to check for a slot. Call with the lock held."""
+        if not state.queue:
+            return
+        waiter = state.waiters.pop(state.queue[0], None)
+        if waiter is not None:
+            loop, wakeup = waiter
+            loop.call_soon_threadsafe(_resolve, wakeup)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    """Resolve a wake-up future unless its waiter already gave up."""
+    if not future.done():
+        future.set_result(None)
+
+
+# Global scheduler instance
+_scheduler = None
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Get or create the global scheduler.
+
+    Returns:
+        Scheduler instance
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,547 @@
+"""Sharded content builds across several machines, coordinated through Redis.
+
+A full regeneration, e.g. after a prompt change, is more LLM, TTS and CPU work
+than one machine gets through quickly. This module splits the articles into
+shards by a stable hash of their source path:
+
+- workers, on any number of machines, lease shards from Redis, run the plugin
+  chain on each article of a shard and write the transformed content to a
+  shared directory,
+- the coordinator starts the build, reports progress and, once every shard is
+  done, runs the final Pelican render. The render takes each article's
+  transformed content from the shared directory instead of running the
+  content plugins again, and finalizing plugins such as cache_busting run as
+  usual.
+
+A lease expires unless its worker renews it, so the shards of a crashed worker
+are picked up by the others. Each node schedules its own LLM, TTS and image
+requests: start workers with ``--nodes`` set to the number of nodes to divide
+the provider quotas among them. The content directory (where the plugins write
+generated media), data/ and the shared directory must be on storage all nodes
+see, e.g. NFS with working file locks, and every node needs the same checkout.
+"""
+
+import hashlib
+import logging
+import os
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import redis
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_REDIS_URL = os.environ.get(
+    "SHARDED_BUILD_REDIS_URL", "redis://localhost:6379/0"
+)
+DEFAULT_SHARD_COUNT = 64
+# Seconds a shard stays leased without renewal
+LEASE_SECONDS = 120
+# Seconds between checks for free shards or build completion
+POLL_INTERVAL = 2.0
+# Seconds the state of a run is kept in Redis
+RUN_TTL = 7 * 24 * 3600
+# Seconds the coordinator waits without any live worker before giving up
+IDLE_TIMEOUT = 600.0
+
+_KEY_PREFIX = "sharded_build"
+
+# Extend a lease only if it's still held by the caller
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def shard_of(relative_path: str, shard_count: int) -> int:
+    """
+    Get the shard of a source file.
+
+    The shard only depends on the path, so every node assigns the same
+    articles to the same shard.
+
+    Args:
+        relative_path: Source path relative to the content directory
+        shard_count: Number of shards
+
+    Returns:
+        Shard number in [0, shard_count)
+    """
+    digest = hashlib.sha256(Path(relative_path).as_posix().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def transformed_path(shared_dir: Path | str, relative_path: str) -> Path:
+    """
+    Get the file holding an article's transformed content.
+
+    Args:
+        shared_dir: Shared directory of the build
+        relative_path: Source path relative to the content directory
+
+    Returns:
+        Path of the HTML file
+    """
+    return Path(shared_dir) / "content" / f"{relative_path}.html"
+
+
+class ShardedBuild:
+    """Shard leases and progress of the runs of one build, stored in Redis.
+
+    Every ``start()`` begins a new run with its own keys, so workers never mix
+    up the state of a finished run with that of the next one. The keys of a
+    run expire after ``RUN_TTL`` seconds.
+    """
+
+    def __init__(self, client: redis.Redis, build_id: str):
+        """
+        Initialize the build state.
+
+        Args:
+            client: Redis client
+            build_id: Name of the build, shared by its coordinator and workers
+        """
+        self.client = client
+        self.prefix = f"{_KEY_PREFIX}:{build_id}"
+        self._renew = client.register_script(_RENEW_SCRIPT)
+
+    def start(self, shard_count: int, article_count: int) -> str:
+        """
+        Start a new run of the build.
+
+        Args:
+            shard_count: Number of shards
+            article_count: Number of articles across all shards
+
+        Returns:
+            ID of the run
+        """
+        run = uuid.uuid4().hex
+        pipeline = self.client.pipeline()
+        pipeline.hset(
+            self._key(run, "meta"),
+            mapping={"shard_count": shard_count, "article_count": article_count},
+        )
+        pipeline.expire(self._key(run, "meta"), RUN_TTL)
+        pipeline.set(f"{self.prefix}:run", run, ex=RUN_TTL)
+        pipeline.execute()
+        return run
+
+    def current_run(self) -> str | None:
+        """
+        Get the run started last.
+
+        Returns:
+            ID of the run, or None if no run was started or it expired
+        """
+        return self.client.get(f"{self.prefix}:run")
+
+    def shard_count(self, run: str) -> int | None:
+        """
+        Get the number of shards of a run.
+
+        Args:
+            run: ID of the run
+
+        Returns:
+            Number of shards, or None if the run is unknown
+        """
+        value = self.client.hget(self._key(run, "meta"), "shard_count")
+        return int(value) if value is not None else None
+
+    def claim(self, run: str, worker_id: str) -> int | None:
+        """
+        Lease a shard that's neither done nor leased.
+
+        Args:
+            run: ID of the run
+            worker_id: Unique name of the worker
+
+        Returns:
+            The leased shard, or None if there's none free
+        """
+        shard_count = self.shard_count(run) or 0
+        done = {int(shard) for shard in self.client.smembers(self._key(run, "done"))}
+        for shard in range(shard_count):
+            if shard in done:
+                continue
+            if self.client.set(
+                self._lease_key(run, shard), worker_id, nx=True, ex=LEASE_SECONDS
+            ):
+                return shard
+        return None
+
+    def renew(self, run: str, shard: int, worker_id: str) -> bool:
+        """
+        Extend a shard lease.
+
+        Args:
+            run: ID of the run
+            shard: The leased shard
+            worker_id: Unique name of the worker
+
+        Returns:
+            False if the lease expired and was taken over by another worker
+        """
+        lease_key = self._lease_key(run, shard)
+        return bool(self._renew(keys=[lease_key], args=[worker_id, LEASE_SECONDS]))
+
+    def complete(self, run: str, shard: int, article_count: int) -> None:
+        """
+        Mark a shard as done and release its lease.
+
+        Args:
+            run: ID of the run
+            shard: The finished shard
+            article_count: Number of articles processed in the shard
+        """
+        pipeline = self.client.pipeline()
+        pipeline.sadd(self._key(run, "done"), shard)
+        pipeline.expire(self._key(run, "done"), RUN_TTL)
+        pipeline.hincrby(self._key(run, "meta"), "articles_done", article_count)
+        pipeline.delete(self._lease_key(run, shard))
+        pipeline.execute()
+
+    def heartbeat(self, run: str, worker_id: str) -> None:
+        """
+        Report a worker as alive.
+
+        Args:
+            run: ID of the run
+            worker_id: Unique name of the worker
+        """
+        self.client.set(self._key(run, f"worker:{worker_id}"), 1, ex=LEASE_SECONDS)
+
+    def progress(self, run: str) -> dict[str, int]:
+        """
+        Get the progress of a run.
+
+        Args:
+            run: ID of the run
+
+        Returns:
+            Dict with the counts of shards, done shards, leased shards, live
+            workers, articles and done articles
+        """
+        meta = self.client.hgetall(self._key(run, "meta"))
+        leased = sum(1 for _ in self.client.scan_iter(self._key(run, "lease:*")))
+        workers = sum(1 for _ in self.client.scan_iter(self._key(run, "worker:*")))
+        return {
+            "shards": int(meta.get("shard_count", 0)),
+            "shards_done": self.client.scard(self._key(run, "done")),
+            "shards_leased": leased,
+            "workers": workers,
+            "articles": int(meta.get("article_count", 0)),
+            "articles_done": int(meta.get("articles_done", 0)),
+        }
+
+    def is_complete(self, run: str) -> bool:
+        """
+        Check whether every shard of a run is done.
+
+        Args:
+            run: ID of the run
+
+        Returns:
+            True once all shards of the run are done
+        """
+        shard_count = self.shard_count(run)
+        return (
+            shard_count is not None
+            and self.client.scard(self._key(run, "done")) >= shard_count
+        )
+
+    def _key(self, run: str, name: str) -> str:
+        """Get the Redis key of a run's state."""
+        return f"{self.prefix}:{run}:{name}"
+
+    def _lease_key(self, run: str, shard: int) -> str:
+        """Get the Redis key of a shard's lease."""
+        return self._key(run, f"lease:{shard}")
+
+
+def relative_sources(settings: dict[str, Any]) -> list[str]:
+    """
+    List the markdown sources of the site.
+
+    Args:
+        settings: Pelican settings
+
+    Returns:
+        Source paths relative to the content directory
+    """
+    from prefetch.planner import PrefetchPlanner
+
+    return [
+        os.path.relpath(source_path, settings["PATH"])
+        for source_path in PrefetchPlanner.find_sources(settings)
+    ]
+
+
+def share_quotas(nodes: int) -> None:
+    """
+    Divide the provider quotas of this node's scheduler among the nodes.
+
+    Each node runs its own scheduler, so without this N nodes would use N
+    times every provider's quota.
+
+    Args:
+        nodes: Number of worker nodes running at the same time
+    """
+    from scheduler import DEFAULT_LIMITS, get_scheduler
+
+    for provider, limits in DEFAULT_LIMITS.items():
+        get_scheduler().configure(
+            provider,
+            rate=limits.rate / nodes,
+            burst=max(1, limits.burst // nodes),
+            concurrency=max(1, limits.concurrency // nodes),
+        )
+
+
+def wait_for_run(build: ShardedBuild) -> str:
+    """
+    Wait for a run that isn't complete yet.
+
+    A worker started before the coordinator of a rebuild finds the finished
+    previous run, which it must not mistake for the rebuild.
+
+    Args:
+        build: State of the build
+
+    Returns:
+        ID of the run
+    """
+    while True:
+        run = build.current_run()
+        if run is not None and not build.is_complete(run):
+            return run
+        _log.info("Waiting for the coordinator to start a build...")
+        time.sleep(POLL_INTERVAL)
+
+
+def run_worker(build: ShardedBuild, settings: dict[str, Any], shared_dir: Path) -> int:
+    """
+    Process shards until the current run of the build is complete.
+
+    The generation work of a shard is prefetched before its articles are
+    transformed, as in a single-machine build.
+
+    Args:
+        build: State of the build
+        settings: Pelican settings
+        shared_dir: Shared directory for the transformed content
+
+    Returns:
+        Number of articles processed by this worker
+    """
+    from background_loop import shutdown_background_loop
+    from parallel_build.worker import init_worker, picklable_settings, transform
+    from prefetch.planner import PrefetchPlanner
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    init_worker(list(sys.path), picklable_settings(settings))
+    planner = PrefetchPlanner()
+    sources = relative_sources(settings)
+    processed = 0
+
+    run = wait_for_run(build)
+    shard_count = build.shard_count(run)
+
+    try:
+        while not build.is_complete(run):
+            if build.current_run() != run:
+                # The coordinator restarted the build
+                _log.info("Warning: The build was restarted, switching to the new run")
+                run = wait_for_run(build)
+                shard_count = build.shard_count(run)
+                continue
+
+            build.heartbeat(run, worker_id)
+            shard = build.claim(run, worker_id)
+            if shard is None:
+                # Remaining shards are leased; wait for them to finish or expire
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            shard_sources = [
+                source for source in sources if shard_of(source, shard_count) == shard
+            ]
+            _log.info(f"Processing shard {shard} ({len(shard_sources)} articles)")
+            absolute_sources = [
+                os.path.join(settings["PATH"], source) for source in shard_sources
+            ]
+            planner.plan(settings, absolute_sources)
+
+            # Generation can outlast a lease, so renew it while waiting
+            lost = False
+            while not planner.wait_all(timeout=LEASE_SECONDS / 4):
+                build.heartbeat(run, worker_id)
+                if not build.renew(run, shard, worker_id):
+                    lost = True
+                    break
+
+            for source, source_path in zip(shard_sources, absolute_sources):
+                if lost or not build.renew(run, shard, worker_id):
+                    _log.info(f"Warning: Lost the lease of shard {shard}")
+                    lost = True
+                    break
+                build.heartbeat(run, worker_id)
+                output_path = transformed_path(shared_dir, source)
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = output_path.with_name(f"{output_path.name}.{worker_id}.tmp")
+                temp_path.write_text(transform(source_path), encoding="utf-8")
+                os.replace(temp_path, output_path)
+
+            planner.shutdown()
+            if not lost:
+                build.complete(run, shard, len(shard_sources))
+                processed += len(shard_sources)
+    finally:
+        shutdown_background_loop()
+    return processed
+
+
+def coordinate(
+    build: ShardedBuild,
+    settings_path: str,
+    shared_dir: Path,
+    shard_count: int,
+    output_path: str | None = None,
+    idle_timeout: float = IDLE_TIMEOUT,
+) -> None:
+    """
+    Start a build, wait for the workers and render the site.
+
+    Args:
+        build: State of the build
+        settings_path: Pelican settings file
+        shared_dir: Shared directory with the transformed content
+        shard_count: Number of shards
+        output_path: Pelican output directory (default: from the settings)
+        idle_timeout: Seconds to wait without any live worker before giving up
+
+    Raises:
+        TimeoutError: If no worker was alive for idle_timeout seconds
+    """
+    from parallel_build.worker import COORDINATING_PLUGINS
+    from pelican import Pelican
+    from pelican.settings import read_settings
+    from tqdm import tqdm
+
+    settings = read_settings(settings_path)
+    run = build.start(shard_count, len(relative_sources(settings)))
+    idle_since = time.monotonic()
+
+    with tqdm(total=shard_count, desc="Sharded build", unit="shard") as pbar:
+        while not build.is_complete(run):
+            progress = build.progress(run)
+            pbar.update(progress["shards_done"] - pbar.n)
+            pbar.set_postfix(
+                workers=progress["workers"],
+                leased=progress["shards_leased"],
+                articles=f"{progress['articles_done']}/{progress['articles']}",
+            )
+            if progress["workers"] or progress["shards_leased"]:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > idle_timeout:
+                raise TimeoutError(
+                    f"No sharded build worker for {idle_timeout:.0f} seconds "
+                    f"({progress['shards_done']}/{shard_count} shards done)"
+                )
+            time.sleep(POLL_INTERVAL)
+        pbar.update(shard_count - pbar.n)
+
+    # parallel_build hands the transformed content to Pelican, and the content
+    # plugins skip it
+    override: dict[str, Any] = {
+        "SHARDED_BUILD_DIR": str(shared_dir),
+        "PARALLEL_BUILD": False,
+        "PLUGINS": ["parallel_build"]
+        + [
+            plugin
+            for plugin in settings["PLUGINS"]
+            if plugin not in COORDINATING_PLUGINS
+        ],
+    }
+    if output_path:
+        override["OUTPUT_PATH"] = os.path.abspath(output_path)
+    Pelican(read_settings(settings_path, override=override)).run()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded multi-machine site builds")
+    parser.add_argument(
+        "command", choices=["coordinate", "work"], help="Role of this machine"
+    )
+    parser.add_argument(
+        "--settings", default="pelicanconf.py", help="Pelican settings file"
+    )
+    parser.add_argument(
+        "--shared-dir",
+        type=Path,
+        required=True,
+        help="Directory on shared storage for the transformed content",
+    )
+    parser.add_argument("--build-id", default="site", help="Name of the build")
+    parser.add_argument(
+        "--redis-url",
+        default=DEFAULT_REDIS_URL,
+        help="Redis server coordinating the build",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=DEFAULT_SHARD_COUNT,
+        help="Number of shards (coordinator only)",
+    )
+    parser.add_argument("--output", help="Pelican output directory (coordinator only)")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=IDLE_TIMEOUT,
+        help="Seconds without any live worker before giving up (coordinator only)",
+    )
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        default=1,
+        help="Worker nodes sharing the provider quotas (worker only)",
+    )
+    args = parser.parse_args()
+
+    from pelican.settings import read_settings
+
+    settings = read_settings(args.settings)
+    # Plugins are imported from the plugin paths, as in a Pelican build
+    sys.path[:0] = [
+        os.path.abspath(path) for path in settings.get("PLUGIN_PATHS", [])
+    ]
+    build = ShardedBuild(
+        redis.Redis.from_url(args.redis_url, decode_responses=True), args.build_id
+    )
+    if args.command == "coordinate":
+        try:
+            coordinate(
+                build,
+                args.settings,
+                args.shared_dir,
+                args.shards,
+                args.output,
+                args.idle_timeout,
+            )
+        except TimeoutError as e:
+            parser.exit(1, f"{e}\n")
+    else:
+        if args.nodes > 1:
+            share_quotas(args.nodes)
+        count = run_worker(build, settings, args.shared_dir)
+        print(f"Processed {count} articles")
@@ -0,0 +1,53 @@
+"""Placeholder for SITEURL in the output of the content plugins.
+
+Plugins write media URLs as ``__SITEURL__/audio/...`` instead of baking in the
+build's SITEURL. The placeholder is replaced in each output file right after
+Pelican writes it, so processed content, processors and their caches don't
+depend on SITEURL and can be shared between development and production
+builds.
+"""
+
+import logging
+from typing import Any
+
+_log = logging.getLogger(__name__)
+
+SITEURL_PLACEHOLDER = "__SITEURL__"
+
+
+def resolve_site_url(text: str, siteurl: str) -> str:
+    """
+    Replace the SITEURL placeholder.
+
+    Args:
+        text: Text with placeholders, e.g. an article's HTML
+        siteurl: The SITEURL from Pelican settings
+
+    Returns:
+        The text with the placeholders replaced by the SITEURL
+    """
+    return text.replace(SITEURL_PLACEHOLDER, siteurl)
+
+
+def resolve_written_file(path: str, context: dict[str, Any] | None = None, **_kwargs):
+    """
+    Replace the SITEURL placeholder in a file Pelican just wrote.
+
+    Connected to the content_written and feed_written signals.
+
+    Args:
+        path: Path of the written file
+        context: Template context of the file, with the SITEURL (relative to
+            the file with RELATIVE_URLS)
+    """
+    siteurl = (context or {}).get("SITEURL", "")
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        _log.exception(f"Error reading {path} to resolve SITEURL")
+        return
+    if SITEURL_PLACEHOLDER not in text:
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(resolve_site_url(text, siteurl))
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from pathlib import Path
 
 from google.genai import Client
 from google.genai.types import GenerateImagesConfig
 
+from media_index import get_media_index
+from scheduler import get_scheduler
 from tools import load_google_api_key
 
 _log = logging.getLogger(__name__)
@@ -31,7 +34,7 @@ class TTI:
             output_file = Path(output_file)
 
         # Check if image already exists
-        if output_file.exists():
+        if get_media_index().exists(output_file):
             _log.info(
                 f"Image file already exists at {output_file} - skipping generation"
             )
@@ -40,14 +43,17 @@ class TTI:
         # Generate new image using native async API
         _log.info(f"Generating new image for '{prompt}'")
 
-        result = await self.client.aio.models.generate_images(
-            model=self.model,
-            prompt=prompt,
-            config=GenerateImagesConfig(
-                number_of_images=1,
-                output_mime_type="image/jpeg",
-                aspect_ratio="1:1",
-                image_size="1K",
+        result = await get_scheduler().run(
+            "imagen",
+            lambda: self.client.aio.models.generate_images(
+                model=self.model,
+                prompt=prompt,
+                config=GenerateImagesConfig(
+                    number_of_images=1,
+                    output_mime_type="image/jpeg",
+                    aspect_ratio="1:1",
+                    image_size="1K",
+                ),
             ),
         )
 
@@ -61,7 +67,9 @@ class TTI:
         for _, generated_image in enumerate(result.generated_images):
             if generated_image.image is None:
                 continue
-            generated_image.image.save(str(output_file))
+            # Writing the file is blocking I/O - keep it off the event loop
+            await asyncio.to_thread(generated_image.image.save, str(output_file))
+            get_media_index().add(output_file)
             return
 
 
@@ -1,15 +1,31 @@
 import asyncio
+import hashlib
 import logging
 import mimetypes
-import re
-import struct
 import tempfile
+from dataclasses import asdict, dataclass
 from pathlib import Path
+from typing import Any
 
-import fugashi
+import numpy as np
 from ffmpeg import FFmpeg
 from google.genai import Client, types
 
+from audio import (
+    PostProcessConfig,
+    SplitConfig,
+    array_to_wav,
+    clip_key,
+    get_audio_metadata,
+    pcm_to_array,
+    post_process,
+    split_at_silences,
+    waveform_metadata,
+    wav_to_array,
+)
+from media_index import get_media_index
+from morphology import count_morae, to_hiragana
+from scheduler import get_scheduler
 from tools import load_google_api_key
 
 _log = logging.getLogger(__name__)
@@ -17,57 +33,489 @@ _log = logging.getLogger(__name__)
 _DEFAULT_MODEL = "gemini-2.5-flash-preview-tts"
 _DEFAULT_VOICE = "Zephyr"
 
+# Lossless masters live outside content/ so they are never copied to the site
+DEFAULT_MASTERS_DIR = Path(__file__).parent.parent / "data" / "audio_masters"
+MASTER_SUFFIX = ".flac"
+
+DEFAULT_POST_PROCESS = PostProcessConfig()
+
+DEFAULT_SPLIT = SplitConfig()
+
+# Limits for packing short utterances into one batched request
+BATCH_MAX_UTTERANCES = 12
+BATCH_MAX_CHARS = 400
+# Instruction prepended to batched requests; the pauses are what the split relies
+# on. If it's read out, the first clip is too long and the batch is regenerated
+BATCH_PROMPT = (
+    "Read each of the following lines on its own, "
+    "with a two second pause after every line:\n"
+)
+
+# Per-turn dialogue masters are cached here, keyed by voice and text
+TURNS_DIR_NAME = "turns"
+# Silence inserted between dialogue turns
+DEFAULT_TURN_GAP_MS = 400
+# Silence between clips packed into a sprite; absorbs encoder priming and seek jitter
+DEFAULT_SPRITE_GAP_MS = 300
+
+
+@dataclass(frozen=True)
+class AudioEncoding:
+    """A single rung of the encoding ladder rendered from a lossless master."""
+
+    suffix: str
+    mime_type: str
+    codec: str
+    bitrate: str
+
+
+# Encodings rendered for every clip, in order of preference for <source> elements.
+# The last entry keeps the historical .aac filename so existing links stay valid.
+AUDIO_LADDER: tuple[AudioEncoding, ...] = (
+    AudioEncoding(".opus", "audio/ogg; codecs=opus", "libopus", "24k"),
+    AudioEncoding(".aac", "audio/aac", "aac", "48k"),
+)
+
+
+def master_path_for(
+    output: Path, masters_dir: Path = DEFAULT_MASTERS_DIR
+) -> Path:
+    """Get the lossless master path for an encoded output file.
+
+    Masters are grouped by the output's parent directory name (e.g. "tts" or
+    "wordbank") and share the output's stem.
+
+    Args:
+        output: Path of an encoded clip (any rung of the ladder)
+        masters_dir: Root directory for lossless masters
+
+    Returns:
+        Path to the FLAC master for the clip
+    """
+    return masters_dir / output.parent.name / f"{output.stem}{MASTER_SUFFIX}"
+
+
+def variant_paths(
+    output: Path, ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER
+) -> list[tuple[Path, AudioEncoding]]:
+    """List the encoded files that make up the ladder for a clip.
+
+    Args:
+        output: Path of the clip's primary output file
+        ladder: Encodings to render
+
+    Returns:
+        List of (path, encoding) tuples in ladder order
+    """
+    return [(output.with_suffix(encoding.suffix), encoding) for encoding in ladder]
+
+
+def audio_sources(
+    output: Path, ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER
+) -> list[tuple[str, str]]:
+    """List the encoded variants of a clip that exist on disk.
+
+    Args:
+        output: Path of the clip's primary output file
+        ladder: Encodings to look for
+
+    Returns:
+        List of (filename, mime_type) tuples in ladder order
+    """
+    media_index = get_media_index()
+    return [
+        (path.name, encoding.mime_type)
+        for path, encoding in variant_paths(output, ladder)
+        if media_index.exists(path)
+    ]
+
+
+def encode_ladder(
+    source: Path, output: Path, ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER
+) -> None:
+    """Render every rung of the ladder from a source file (blocking).
+
+    Args:
+        source: Audio file to encode from, normally the FLAC master
+        output: Path of the clip's primary output file
+        ladder: Encodings to render
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    for path, encoding in variant_paths(output, ladder):
+        ffmpeg_converter = (
+            FFmpeg()
+            .option("y")
+            .input(str(source))
+            .output(
+                str(path), {"codec:a": encoding.codec, "b:a": encoding.bitrate}
+            )
+        )
+        ffmpeg_converter.execute()
+        get_media_index().add(path)
+
+
+def write_master(source: Path, master: Path) -> None:
+    """Losslessly store a source file as a FLAC master (blocking).
+
+    Args:
+        source: WAV (or other decodable) audio file
+        master: Destination FLAC path
+    """
+    master.parent.mkdir(parents=True, exist_ok=True)
+    ffmpeg_converter = (
+        FFmpeg()
+        .option("y")
+        .input(str(source))
+        .output(str(master), {"codec:a": "flac"})
+    )
+    ffmpeg_converter.execute()
+    get_media_index().add(master)
+
+
+def read_master(master: Path) -> tuple[np.ndarray, int]:
+    """Decode a FLAC master into float32 samples (blocking).
+
+    Args:
+        master: FLAC master path
+
+    Returns:
+        Tuple of (samples, sample_rate)
+    """
+    ffmpeg_decoder = (
+        FFmpeg()
+        .input(str(master))
+        .output("pipe:1", {"f": "wav", "codec:a": "pcm_s16le", "ac": 1})
+    )
+    return wav_to_array(ffmpeg_decoder.execute())
+
+
+def build_sprite(
+    clips: list[Path],
+    output: Path,
+    gap_ms: int = DEFAULT_SPRITE_GAP_MS,
+    masters_dir: Path = DEFAULT_MASTERS_DIR,
+    ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER,
+) -> list[dict[str, float]]:
+    """Concatenate clips into one encoded audio sprite (blocking).
+
+    Each clip is decoded from its lossless master when available, falling back
+    to the encoded clip itself. The sprite is rendered with the full ladder.
+
+    Args:
+        clips: Primary output paths of the clips, in sprite order
+        output: Path of the sprite's primary output file
+        gap_ms: Silence between clips in milliseconds
+        masters_dir: Root directory for lossless masters
+        ladder: Encodings to render
+
+    Returns:
+        Offset table: one {"start", "end"} dict per clip, in seconds
+    """
+    parts: list[np.ndarray] = []
+    segments: list[dict[str, float]] = []
+    sample_rate = None
+    position = 0
+
+    for clip in clips:
+        master = master_path_for(clip, masters_dir)
+        samples, clip_rate = read_master(master if master.exists() else clip)
+        if sample_rate is None:
+            sample_rate = clip_rate
+        elif clip_rate != sample_rate:
+            raise RuntimeError(f"Sprite clips have mixed sample rates: {clip.name}")
+
+        if parts:
+            gap = np.zeros(int(sample_rate * gap_ms / 1000), dtype=np.float32)
+            parts.append(gap)
+            position += len(gap)
+        segments.append(
+            {
+                "start": round(position / sample_rate, 3),
+                "end": round((position + len(samples)) / sample_rate, 3),
+            }
+        )
+        parts.append(samples)
+        position += len(samples)
+
+    if sample_rate is None:
+        raise ValueError("Cannot build a sprite without clips")
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
+        temp_wav.write(array_to_wav(np.concatenate(parts), sample_rate))
+        temp_wav_path = Path(temp_wav.name)
+
+    try:
+        encode_ladder(temp_wav_path, output, ladder)
+    finally:
+        temp_wav_path.unlink()
+
+    return segments
+
+
+def index_directory(
+    audio_dir: Path,
+    masters_dir: Path = DEFAULT_MASTERS_DIR,
+    ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER,
+) -> int:
+    """Record duration and waveform peaks for clips that don't have them yet.
+
+    Clips are decoded from their lossless master when available, falling back
+    to the encoded clip. No TTS requests are made.
+
+    Args:
+        audio_dir: Directory with encoded clips (e.g. content/audio/tts)
+        masters_dir: Root directory for lossless masters
+        ladder: Encoding ladder; its last rung is the primary output
+
+    Returns:
+        Number of clips indexed
+    """
+    metadata = get_audio_metadata()
+    count = 0
+    for output in sorted(audio_dir.glob(f"*{ladder[-1].suffix}")):
+        entry = metadata.get(clip_key(output)) or {}
+        if "peaks" in entry:
+            continue
+
+        master = master_path_for(output, masters_dir)
+        samples, sample_rate = read_master(master if master.exists() else output)
+        metadata.update(clip_key(output), waveform_metadata(samples, sample_rate))
+        count += 1
+
+    metadata.flush()
+    _log.info(f"Indexed {count} clips in {audio_dir}")
+    return count
+
+
+def reencode_directory(
+    audio_dir: Path,
+    masters_dir: Path = DEFAULT_MASTERS_DIR,
+    ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER,
+    bootstrap_missing: bool = False,
+) -> int:
+    """Re-render the encoding ladder for every clip in an audio directory.
+
+    No TTS requests are made - all encodings come from the lossless masters.
+
+    Args:
+        audio_dir: Directory with encoded clips (e.g. content/audio/tts)
+        masters_dir: Root directory for lossless masters
+        ladder: Encodings to render
+        bootstrap_missing: If True, clips without a master get one decoded from
+            their existing encoded file before re-encoding. Useful once for clips
+            generated before masters were kept.
+
+    Returns:
+        Number of clips re-encoded
+    """
+    primary_suffix = ladder[-1].suffix
+    count = 0
+    for output in sorted(audio_dir.glob(f"*{primary_suffix}")):
+        master = master_path_for(output, masters_dir)
+        if not master.exists():
+            if not bootstrap_missing:
+                _log.info(f"No master for {output.name} - skipping")
+                continue
+            _log.info(f"Bootstrapping master for {output.name} from encoded file")
+            write_master(output, master)
+
+        encode_ladder(master, output, ladder)
+        count += 1
+
+    _log.info(f"Re-encoded {count} clips in {audio_dir}")
+    return count
+
 
 class TTS:
-    def __init__(self, model: str | None = None) -> None:
+    def __init__(
+        self,
+        model: str | None = None,
+        ladder: tuple[AudioEncoding, ...] = AUDIO_LADDER,
+        masters_dir: Path | None = None,
+        post_process: PostProcessConfig | None = DEFAULT_POST_PROCESS,
+        split: SplitConfig = DEFAULT_SPLIT,
+    ) -> None:
+        """Initialize the TTS client.
+
+        Args:
+            model: Gemini TTS model name
+            ladder: Encodings rendered from each clip's lossless master
+            masters_dir: Root directory for FLAC masters
+            post_process: Silence trimming / loudness normalization thresholds,
+                or None to keep the generated audio untouched
+            split: Silence thresholds for splitting batched requests
+        """
         self.model = model or _DEFAULT_MODEL
+        self.ladder = ladder
+        self.masters_dir = masters_dir or DEFAULT_MASTERS_DIR
+        self.post_process = post_process
+        self.split = split
+        self.metadata = get_audio_metadata()
         self.client = Client(
             api_key=load_google_api_key(),
         )
-        self.tagger = fugashi.Tagger()  # type: ignore
 
     async def generate(self, content: str, output: Path, voice: str = _DEFAULT_VOICE):
-        """Generate TTS audio and save as AAC format.
+        """Generate TTS audio, keep a lossless master and render the encoding ladder.
 
         Converts any kanji in the input text to hiragana before generating speech.
 
         Args:
             content: The text to convert to speech
-            output: Path where the AAC audio file should be saved
+            output: Path of the primary output file; other encodings are written
+                next to it with their own suffixes
         """
-        # Convert kanji to hiragana before generating speech
-        hiragana_content = self._kanji_to_hiragana(content)
+        samples, sample_rate = await self._synthesize(content, voice, output)
+        await self._write_outputs(samples, sample_rate, output)
 
-        _log.info(f"Generating TTS for hiragana content: {hiragana_content}")
-        # Generate audio using Gemini TTS
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_text(text=hiragana_content),
-                ],
-            ),
-        ]
-        generate_content_config = types.GenerateContentConfig(
-            temperature=1,
-            response_modalities=[
-                "audio",
-            ],
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
-                )
-            ),
+    async def generate_batch(
+        self, items: list[tuple[str, Path]], voice: str = _DEFAULT_VOICE
+    ) -> None:
+        """Generate many short utterances with as few API calls as possible.
+
+        Utterances are packed into requests of up to ``BATCH_MAX_UTTERANCES``
+        lines with an explicit pause between lines. Each response is split at
+        its pauses and every piece is stored as its own clip. If a response
+        doesn't split into exactly one piece per line, or a piece's length is
+        far off its line's mora count, that batch falls back to one request
+        per utterance.
+
+        Args:
+            items: List of (text, output) tuples
+            voice: Prebuilt voice name used for every utterance
+        """
+        batches: list[list[tuple[str, Path]]] = []
+        batch_chars = 0
+        for text, output in items:
+            if (
+                not batches
+                or len(batches[-1]) >= BATCH_MAX_UTTERANCES
+                or batch_chars + len(text) > BATCH_MAX_CHARS
+            ):
+                batches.append([])
+                batch_chars = 0
+            batches[-1].append((text, output))
+            batch_chars += len(text)
+
+        _log.info(
+            f"Generating {len(items)} utterances in {len(batches)} batched requests..."
         )
+        await asyncio.gather(*(self._generate_batch(batch, voice) for batch in batches))
 
-        # Collect all audio chunks using native async API
-        audio_data = None
-        mime_type = None
+    async def generate_dialogue_turns(
+        self,
+        speaker_cfg: dict[str, str],
+        dialogue: list[tuple[str, str]],
+        output: Path | str,
+        gap_ms: int = DEFAULT_TURN_GAP_MS,
+    ) -> list[dict[str, Any]]:
+        """Generate dialogue audio turn by turn and join the turns into one clip.
+
+        Each (voice, text) turn is synthesized with a single-speaker request and
+        cached as its own lossless master, so editing one line of a dialogue only
+        costs one API call. Turns are joined with ``gap_ms`` of silence and the
+        resulting timing table is stored in the audio metadata index.
 
+        Args:
+            speaker_cfg: Mapping from speaker name to voice name
+            dialogue: List of tuples with (speaker_name, text) for each dialogue turn
+            output: Path of the primary output file
+            gap_ms: Silence between turns in milliseconds
+
+        Returns:
+            Timing table: one {"speaker", "start", "end"} dict per turn, in seconds
+        """
+        if isinstance(output, str):
+            output = Path(output)
+
+        # Synthesize each distinct turn once, even if a line is repeated
+        unique_turns = list(
+            dict.fromkeys((speaker_cfg[speaker], text) for speaker, text in dialogue)
+        )
+        turn_audio = dict(
+            zip(
+                unique_turns,
+                await asyncio.gather(
+                    *(self._turn_audio(voice, text) for voice, text in unique_turns)
+                ),
+            )
+        )
+
+        sample_rates = {sample_rate for _, sample_rate in turn_audio.values()}
+        if len(sample_rates) != 1:
+            raise RuntimeError(
+                f"Dialogue turns have mixed sample rates: {sample_rates}"
+            )
+        sample_rate = sample_rates.pop()
+
+        gap = np.zeros(int(sample_rate * gap_ms / 1000), dtype=np.float32)
+        parts: list[np.ndarray] = []
+        timings: list[dict[str, Any]] = []
+        position = 0
+        for speaker, text in dialogue:
+            samples, _ = turn_audio[(speaker_cfg[speaker], text)]
+            if parts:
+                parts.append(gap)
+                position += len(gap)
+            timings.append(
+                {
+                    "speaker": speaker,
+                    "start": round(position / sample_rate, 3),
+                    "end": round((position + len(samples)) / sample_rate, 3),
+                }
+            )
+            parts.append(samples)
+            position += len(samples)
+
+        await self._write_outputs(np.concatenate(parts), sample_rate, output)
+        self.metadata.update(
+            clip_key(output), {"sample_rate": sample_rate, "turns": timings}
+        )
+        return timings
+
+    async def reencode(self, output: Path | str) -> None:
+        """Re-render the encoding ladder for a clip from its lossless master.
+
+        Args:
+            output: Path of the clip's primary output file
+
+        Raises:
+            FileNotFoundError: If the clip has no lossless master
+        """
+        if isinstance(output, str):
+            output = Path(output)
+
+        master = master_path_for(output, self.masters_dir)
+        if not get_media_index().exists(master):
+            raise FileNotFoundError(f"No lossless master for {output} at {master}")
+
+        await asyncio.to_thread(encode_ladder, master, output, self.ladder)
+
+    async def _stream_audio(
+        self, contents: list[types.Content], config: types.GenerateContentConfig
+    ) -> tuple[bytes, str]:
+        """Request audio from Gemini TTS and return the first inline audio chunk.
+
+        Args:
+            contents: Request contents
+            config: Generation config with speech settings
+
+        Returns:
+            Tuple of (audio_data, mime_type)
+        """
+        return await get_scheduler().run(
+            "gemini-tts", lambda: self._read_audio_stream(contents, config)
+        )
+
+    async def _read_audio_stream(
+        self, contents: list[types.Content], config: types.GenerateContentConfig
+    ) -> tuple[bytes, str]:
+        """Make one streaming TTS request and return its first inline audio chunk."""
+        # Collect all audio chunks using native async API
         stream = await self.client.aio.models.generate_content_stream(
             model=self.model,
             contents=contents,
-            config=generate_content_config,
+            config=config,
         )
         async for chunk in stream:
             if (
@@ -81,98 +529,94 @@ class TTS:
                 and chunk.candidates[0].content.parts[0].inline_data.data
             ):
                 inline_data = chunk.candidates[0].content.parts[0].inline_data
-                audio_data = inline_data.data
-                mime_type = inline_data.mime_type
-                break
+                if inline_data.data is not None and inline_data.mime_type is not None:
+                    return inline_data.data, inline_data.mime_type
 
-        if audio_data is None or mime_type is None:
-            raise RuntimeError("No audio data generated")
+        raise RuntimeError("No audio data generated")
 
-        # Convert to WAV format first if needed
-        file_extension = mimetypes.guess_extension(mime_type)
-        if file_extension is None:
-            wav_data = self._convert_to_wav(audio_data, mime_type)
-        else:
-            wav_data = audio_data
+    async def _synthesize(
+        self, content: str, voice: str, output: Path | None = None
+    ) -> tuple[np.ndarray, int]:
+        """Generate single-speaker speech and return post-processed samples.
 
-        # Write WAV to temporary file and convert to AAC
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-            temp_wav.write(wav_data)
-            temp_wav_path = temp_wav.name
+        Converts any kanji in the input text to hiragana before generating speech.
 
-        try:
-            # Convert WAV to AAC using ffmpeg - run in thread pool since it's blocking
-            def _convert_audio():
-                ffmpeg_converter = (
-                    FFmpeg()
-                    .option("y")
-                    .input(temp_wav_path)
-                    .output(str(output), {"codec:a": "aac", "b:a": "128k"})
-                )
-                ffmpeg_converter.execute()
+        Args:
+            content: The text to convert to speech
+            voice: Prebuilt voice name
+            output: Clip the audio is generated for; used to record post-processing
+                stats in the metadata index
 
-            await asyncio.to_thread(_convert_audio)
-        finally:
-            # Clean up temporary WAV file
-            Path(temp_wav_path).unlink()
+        Returns:
+            Tuple of (samples, sample_rate)
+        """
+        # Convert kanji to hiragana before generating speech
+        hiragana_content = to_hiragana(content)
 
-    async def generate_dialogue(
-        self,
-        speaker_cfg: dict[str, str],
-        dialogue: list[tuple[str, str]],
-        output: Path | str,
-    ):
-        """Generate multi-speaker dialogue audio and save as AAC format.
+        samples, sample_rate = await self._request_speech(hiragana_content, voice)
+        return self._post_process(samples, sample_rate, output), sample_rate
 
-        Converts any kanji in the dialogue text to hiragana before generating speech.
+    async def _generate_batch(self, batch: list[tuple[str, Path]], voice: str) -> None:
+        """Generate one batched request and store each utterance as its own clip.
 
         Args:
-            speaker_cfg: Mapping from speaker name to voice name (e.g., {"Speaker 1": "Zephyr"})
-            dialogue: List of tuples with (speaker_name, text) for each dialogue turn
-            output: Path where the AAC audio file should be saved
+            batch: List of (text, output) tuples
+            voice: Prebuilt voice name
         """
-        # Convert output to Path if it's a string
-        if isinstance(output, str):
-            output = Path(output)
-
-        # Sanitize speaker names (remove spaces and special characters)
-        sanitized_speaker_map = {
-            speaker: self._sanitize_speaker_name(speaker)
-            for speaker in speaker_cfg.keys()
-        }
+        if len(batch) == 1:
+            text, output = batch[0]
+            await self.generate(text, output, voice)
+            return
+
+        # One utterance per line - line breaks inside a snippet would add pauses
+        lines = [" ".join(to_hiragana(text).split()) for text, _ in batch]
+        samples, sample_rate = await self._request_speech(
+            BATCH_PROMPT + "\n".join(lines), voice
+        )
 
-        # Build the dialogue text with sanitized speaker labels
-        dialogue_lines = []
-        for speaker, text in dialogue:
-            # Convert kanji to hiragana for each dialogue line
-            hiragana_text = self._kanji_to_hiragana(text)
-            sanitized_speaker = sanitized_speaker_map[speaker]
-            dialogue_lines.append(f"{sanitized_speaker}: {hiragana_text}")
-
-        dialogue_text = "\n".join(dialogue_lines)
-        _log.info(f"Generating multi-speaker TTS for dialogue:\n{dialogue_text}")
-
-        # Configure speaker voice configs with sanitized names
-        speaker_voice_configs = []
-        for speaker_name, voice_name in speaker_cfg.items():
-            sanitized_name = sanitized_speaker_map[speaker_name]
-            speaker_voice_configs.append(
-                types.SpeakerVoiceConfig(
-                    speaker=sanitized_name,
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=voice_name
-                        )
-                    ),
+        # Clip lengths must follow the lines' lengths, or clips would be misassigned
+        weights = [max(1, count_morae(line)) for line in lines]
+        segments = split_at_silences(
+            samples, sample_rate, len(batch), self.split, weights
+        )
+        if segments is None:
+            _log.info(
+                f"Batched audio didn't split into {len(batch)} utterances of the "
+                "expected lengths - generating them individually"
+            )
+            await asyncio.gather(
+                *(self.generate(text, output, voice) for text, output in batch)
+            )
+            return
+
+        await asyncio.gather(
+            *(
+                self._write_outputs(
+                    self._post_process(segment, sample_rate, output),
+                    sample_rate,
+                    output,
                 )
+                for (_, output), segment in zip(batch, segments)
             )
+        )
+
+    async def _request_speech(self, text: str, voice: str) -> tuple[np.ndarray, int]:
+        """Request single-speaker speech and decode it without post-processing.
 
-        # Generate audio using Gemini TTS with multi-speaker config
+        Args:
+            text: Text to speak, already converted to hiragana
+            voice: Prebuilt voice name
+
+        Returns:
+            Tuple of (samples, sample_rate)
+        """
+        _log.info(f"Generating TTS for hiragana content: {text}")
+        # Generate audio using Gemini TTS
         contents = [
             types.Content(
                 role="user",
                 parts=[
-                    types.Part.from_text(text=dialogue_text),
+                    types.Part.from_text(text=text),
                 ],
             ),
         ]
@@ -182,105 +626,122 @@ class TTS:
                 "audio",
             ],
             speech_config=types.SpeechConfig(
-                multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                    speaker_voice_configs=speaker_voice_configs
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
                 )
             ),
         )
 
-        # Collect all audio chunks using native async API
-        audio_data = None
-        mime_type = None
-
-        stream = await self.client.aio.models.generate_content_stream(
-            model=self.model,
-            contents=contents,
-            config=generate_content_config,
+        audio_data, mime_type = await self._stream_audio(
+            contents, generate_content_config
         )
-        async for chunk in stream:
-            if (
-                chunk.candidates is None
-                or chunk.candidates[0].content is None
-                or chunk.candidates[0].content.parts is None
-            ):
-                continue
-            if (
-                chunk.candidates[0].content.parts[0].inline_data
-                and chunk.candidates[0].content.parts[0].inline_data.data
-            ):
-                inline_data = chunk.candidates[0].content.parts[0].inline_data
-                audio_data = inline_data.data
-                mime_type = inline_data.mime_type
-                break
+        return self._decode_audio(audio_data, mime_type)
 
-        if audio_data is None or mime_type is None:
-            raise RuntimeError("No audio data generated")
+    async def _turn_audio(self, voice: str, text: str) -> tuple[np.ndarray, int]:
+        """Get the samples for a single dialogue turn, synthesizing it if uncached.
 
-        # Convert to WAV format first if needed
-        file_extension = mimetypes.guess_extension(mime_type)
-        if file_extension is None:
-            wav_data = self._convert_to_wav(audio_data, mime_type)
-        else:
-            wav_data = audio_data
+        Args:
+            voice: Prebuilt voice name
+            text: The turn's text
 
-        # Write WAV to temporary file and convert to AAC
+        Returns:
+            Tuple of (samples, sample_rate)
+        """
+        turn_hash = hashlib.md5(f"{voice}:{text}".encode("utf-8")).hexdigest()
+        master = self.masters_dir / TURNS_DIR_NAME / f"{turn_hash}{MASTER_SUFFIX}"
+
+        if get_media_index().exists(master):
+            _log.info(f"Using cached dialogue turn: {text[:30]}")
+            return await asyncio.to_thread(read_master, master)
+
+        samples, sample_rate = await self._synthesize(text, voice)
+        await self._store_master(samples, sample_rate, master)
+        return samples, sample_rate
+
+    def _post_process(
+        self, samples: np.ndarray, sample_rate: int, output: Path | None
+    ) -> np.ndarray:
+        """Trim silence and normalize loudness while the PCM is in memory.
+
+        Args:
+            samples: Decoded samples
+            sample_rate: Sample rate in Hz
+            output: Clip to record stats for in the metadata index, if any
+
+        Returns:
+            Processed samples, or the input when post-processing is disabled
+        """
+        if self.post_process is None:
+            return samples
+
+        samples, stats = post_process(samples, sample_rate, self.post_process)
+        _log.info(
+            f"Post-processed audio: {stats.original_duration:.2f}s -> "
+            f"{stats.duration:.2f}s, gain {stats.gain_db:+.1f} dB"
+        )
+        if output is not None:
+            self.metadata.update(clip_key(output), asdict(stats))
+        return samples
+
+    async def _store_master(
+        self, samples: np.ndarray, sample_rate: int, master: Path
+    ) -> None:
+        """Write samples to a FLAC master.
+
+        Args:
+            samples: Samples to store
+            sample_rate: Sample rate in Hz
+            master: Destination FLAC path
+        """
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
-            temp_wav.write(wav_data)
-            temp_wav_path = temp_wav.name
+            temp_wav.write(array_to_wav(samples, sample_rate))
+            temp_wav_path = Path(temp_wav.name)
 
         try:
-            # Convert WAV to AAC using ffmpeg - run in thread pool since it's blocking
-            def _convert_audio():
-                ffmpeg_converter = (
-                    FFmpeg()
-                    .option("y")
-                    .input(temp_wav_path)
-                    .output(str(output), {"codec:a": "aac", "b:a": "128k"})
-                )
-                ffmpeg_converter.execute()
-
-            await asyncio.to_thread(_convert_audio)
+            # ffmpeg is blocking - run it in the thread pool
+            await asyncio.to_thread(write_master, temp_wav_path, master)
         finally:
             # Clean up temporary WAV file
-            Path(temp_wav_path).unlink()
+            temp_wav_path.unlink()
+
+    async def _write_outputs(
+        self, samples: np.ndarray, sample_rate: int, output: Path
+    ) -> None:
+        """Store a clip's FLAC master and render the encoding ladder from it.
 
-    def _convert_to_wav(self, audio_data: bytes, mime_type: str) -> bytes:
-        """Generates a WAV file header for the given audio data and parameters.
+        Args:
+            samples: Final samples of the clip
+            sample_rate: Sample rate in Hz
+            output: Path of the clip's primary output file
+        """
+        master = master_path_for(output, self.masters_dir)
+        await self._store_master(samples, sample_rate, master)
+        await asyncio.to_thread(encode_ladder, master, output, self.ladder)
+
+        # Record duration and waveform peaks while the PCM is still in memory
+        self.metadata.update(clip_key(output), waveform_metadata(samples, sample_rate))
+
+    def _decode_audio(
+        self, audio_data: bytes, mime_type: str
+    ) -> tuple[np.ndarray, int]:
+        """Decode API audio into float32 samples.
+
+        Gemini returns raw PCM (e.g. "audio/L16;rate=24000"), which has no file
+        extension; anything with a known extension is expected to be WAV.
 
         Args:
-            audio_data: The raw audio data as a bytes object.
-            mime_type: Mime type of the audio data.
+            audio_data: Raw audio returned by the API
+            mime_type: Mime type of the audio data
 
         Returns:
-            A bytes object representing the WAV file header.
+            Tuple of (samples, sample_rate)
         """
+        if mimetypes.guess_extension(mime_type) is not None:
+            return wav_to_array(audio_data)
+
         parameters = self._parse_audio_mime_type(mime_type)
-        bits_per_sample = parameters["bits_per_sample"]
-        sample_rate = parameters["rate"]
-        num_channels = 1
-        data_size = len(audio_data)
-        bytes_per_sample = bits_per_sample // 8
-        block_align = num_channels * bytes_per_sample
-        byte_rate = sample_rate * block_align
-        chunk_size = 36 + data_size
-
-        header = struct.pack(
-            "<4sI4s4sIHHIIHH4sI",
-            b"RIFF",  # ChunkID
-            chunk_size,  # ChunkSize (total file size - 8 bytes)
-            b"WAVE",  # Format
-            b"fmt ",  # Subchunk1ID
-            16,  # Subchunk1Size (16 for PCM)
-            1,  # AudioFormat (1 for PCM)
-            num_channels,  # NumChannels
-            sample_rate,  # SampleRate
-            byte_rate,  # ByteRate
-            block_align,  # BlockAlign
-            bits_per_sample,  # BitsPerSample
-            b"data",  # Subchunk2ID
-            data_size,  # Subchunk2Size (size of audio data)
-        )
-        return header + audio_data
+        samples = pcm_to_array(audio_data, parameters["bits_per_sample"])
+        return samples, parameters["rate"]
 
     def _parse_audio_mime_type(self, mime_type: str) -> dict[str, int]:
         """Parses bits per sample and rate from an audio MIME type string.
@@ -314,136 +775,51 @@ class TTS:
 
         return {"bits_per_sample": bits_per_sample, "rate": rate}
 
-    def _sanitize_speaker_name(self, name: str) -> str:
-        """Sanitize speaker name for Google TTS API.
-
-        Removes spaces and special characters that might cause issues.
-
-        Args:
-            name: Original speaker name
-
-        Returns:
-            Sanitized speaker name with only alphanumeric characters
-        """
-        # Replace spaces with underscores and keep only alphanumeric characters
-        sanitized = re.sub(r"[^a-zA-Z0-9]", "_", name)
-        # Remove consecutive underscores
-        sanitized = re.sub(r"_+", "_", sanitized)
-        # Remove leading/trailing underscores
-        sanitized = sanitized.strip("_")
-        return sanitized if sanitized else "Speaker"
-
-    def _kanji_to_hiragana(self, text: str) -> str:
-        """Convert kanji in text to hiragana.
-
-        Args:
-            text: Text containing kanji characters
-
-        Returns:
-            Text with kanji converted to hiragana readings
-        """
-        if not text.strip():
-            return text
-
-        # Pattern to match Japanese text (hiragana, katakana, kanji, Japanese punctuation)
-        japanese_pattern = re.compile(
-            r"[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF\u3400-\u4DBF\u3000-\u303F]+"
-        )
-
-        output = []
-        last_end = 0
-
-        for match in japanese_pattern.finditer(text):
-            # Add any non-Japanese text before this match
-            if match.start() > last_end:
-                output.append(text[last_end : match.start()])
-
-            # Process the Japanese segment
-            japanese_segment = match.group()
-            output.append(self._process_japanese_segment(japanese_segment))
-
-            last_end = match.end()
-
-        # Add any remaining non-Japanese text
-        if last_end < len(text):
-            output.append(text[last_end:])
-
-        return "".join(output)
-
-    def _process_japanese_segment(self, text: str) -> str:
-        """Process a Japanese text segment to convert kanji to hiragana.
-
-        Args:
-            text: Japanese text string (hiragana, katakana, kanji)
-
-        Returns:
-            Text with kanji converted to hiragana readings
-        """
-        # Parse text with morphological analyzer
-        words = self.tagger(text)
-
-        output = []
-        for word in words:
-            orig = word.surface  # Original text
-
-            # Get katakana reading and convert to hiragana
-            kana = word.feature.kana if hasattr(word.feature, "kana") else None
-
-            if kana:
-                hira = self._katakana_to_hiragana(kana)
-            else:
-                # No reading available, use original text
-                hira = orig
-
-            # Check if this segment contains kanji
-            if self._contains_kanji(orig):
-                # Use hiragana reading
-                output.append(hira)
-            else:
-                # No kanji - preserve as-is
-                output.append(orig)
-
-        return "".join(output)
-
-    def _katakana_to_hiragana(self, text: str) -> str:
-        """Convert katakana characters to hiragana.
-
-        Args:
-            text: String containing katakana characters
-
-        Returns:
-            String with katakana converted to hiragana
-        """
-        hiragana = []
-        for char in text:
-            code = ord(char)
-            # Katakana range: U+30A0 to U+30FF
-            # Hiragana range: U+3040 to U+309F
-            # Offset is 0x60 (96)
-            if 0x30A0 <= code <= 0x30FF:
-                hiragana.append(chr(code - 0x60))
-            else:
-                hiragana.append(char)
-        return "".join(hiragana)
-
-    def _contains_kanji(self, text: str) -> bool:
-        """Check if text contains any kanji characters.
-
-        Kanji Unicode ranges:
-        - CJK Unified Ideographs: U+4E00 to U+9FFF
-        - CJK Unified Ideographs Extension A: U+3400 to U+4DBF
-
-        Args:
-            text: String to check
-
-        Returns:
-            True if text contains kanji, False otherwise
-        """
-        kanji_pattern = re.compile(r"[\u4E00-\u9FFF\u3400-\u4DBF]")
-        return bool(kanji_pattern.search(text))
-
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gemini TTS utilities")
+    subparsers = parser.add_subparsers(dest="command")
+    reencode_parser = subparsers.add_parser(
+        "reencode", help="Re-render the encoding ladder from lossless masters"
+    )
+    reencode_parser.add_argument(
+        "audio_dirs",
+        nargs="*",
+        type=Path,
+        default=[
+            Path(__file__).parent.parent / "content" / "audio" / "tts",
+            Path(__file__).parent.parent / "content" / "audio" / "wordbank",
+        ],
+        help="Directories with encoded clips",
+    )
+    reencode_parser.add_argument(
+        "--bootstrap",
+        action="store_true",
+        help="Create masters from existing encoded files where missing",
+    )
+    index_parser = subparsers.add_parser(
+        "index", help="Record duration and waveform peaks for existing clips"
+    )
+    index_parser.add_argument(
+        "audio_dirs",
+        nargs="*",
+        type=Path,
+        default=reencode_parser.get_default("audio_dirs"),
+        help="Directories with encoded clips",
+    )
+    args = parser.parse_args()
+
+    if args.command == "reencode":
+        for audio_dir in args.audio_dirs:
+            reencode_directory(audio_dir, bootstrap_missing=args.bootstrap)
+        raise SystemExit(0)
+
+    if args.command == "index":
+        for audio_dir in args.audio_dirs:
+            index_directory(audio_dir)
+        raise SystemExit(0)
 
     async def main():
         tts = TTS()
@@ -457,7 +833,7 @@ if __name__ == "__main__":
 
         # Test multi-speaker dialogue generation
         _log.info("\nTesting multi-speaker dialogue TTS...")
-        await tts.generate_dialogue(
+        await tts.generate_dialogue_turns(
             speaker_cfg={
                 "Student": "Puck",
                 "Teacher": "Zephyr",
@@ -471,6 +847,7 @@ if __name__ == "__main__":
             output=Path("dialogue.aac"),
         )
 
+        await tts.metadata.save()
         _log.info("\nGenerated files: sample.aac, dialogue.aac")
 
     asyncio.run(main())
@@ -1,8 +1,8 @@
 import asyncio
-import hashlib
-import json
 import logging
-from dataclasses import asdict, dataclass
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 import marvin
@@ -10,17 +10,45 @@ from google import genai  # type: ignore
 from pydantic_ai.models.google import GoogleModel
 from pydantic_ai.providers.google import GoogleProvider
 
+from image_hashes import get_image_hashes
+from media_index import get_media_index
+from scheduler import PRIORITY_HIGH, get_scheduler
 from tools import load_google_api_key
 from tti import TTI
 from tts import TTS
+from wordbank_similarity import SimilarityIndex, normalize_translation
+from wordbank_storage import (
+    JsonlWordbankStorage,
+    SqliteWordbankStorage,
+    open_storage,
+    record_hash,
+)
 
 _log = logging.getLogger(__name__)
 
 IMG_FORMAT = "jpg"
 AUDIO_FORMAT = "aac"
 
+_ROOT_DIR = Path(__file__).parent.parent.absolute()
+IMAGE_DIR = _ROOT_DIR / "content" / "images" / "wordbank"
+AUDIO_DIR = _ROOT_DIR / "content" / "audio" / "wordbank"
+
+# Default wordbank file for each storage engine
+DEFAULT_DATA_PATHS = {
+    "jsonl": _ROOT_DIR / "data" / "wordbank.jsonl",
+    "sqlite": _ROOT_DIR / "data" / "wordbank.sqlite3",
+}
+
+# Words per multi-item LLM request in propagate_many
+PROPAGATE_BATCH_MAX_WORDS = 20
+# Batched requests made for a word before falling back to a request of its own
+PROPAGATE_MAX_ATTEMPTS = 2
 
-@dataclass
+# A word to propagate: (word, en_translation, description)
+WordEntry = tuple[str, str, str]
+
+
+@dataclass(slots=True)
 class WordbankWordDetails:
     en_translation: str
     word: str
@@ -28,13 +56,49 @@ class WordbankWordDetails:
     examples: list[str]
     description: str
     image_description: str
+    # MD5 hash of word + translation, truncated to 12 characters
+    # This gives us an ASCII-safe unique identifier for filenames. It's computed
+    # once, so derive changed pairs with dataclasses.replace instead of assigning.
+    hash: str = field(init=False, repr=False, compare=False)
 
-    @property
-    def hash(self):
-        # Create MD5 hash from word + translation, truncated to 12 characters
-        # This gives us an ASCII-safe unique identifier for filenames
-        combined = f"{self.word}:{self.en_translation}"
-        return hashlib.md5(combined.encode("utf-8")).hexdigest()[:12]
+    def __post_init__(self):
+        self.hash = record_hash(self.word, self.en_translation)
+
+    @classmethod
+    def from_dict(cls, record: dict) -> "WordbankWordDetails":
+        """
+        Build details from a stored record.
+
+        Args:
+            record: Record from the wordbank storage
+
+        Returns:
+            WordbankWordDetails object
+        """
+        return cls(
+            record["en_translation"],
+            record["word"],
+            record["language_code"],
+            record["examples"],
+            record["description"],
+            record["image_description"],
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Convert the details to a storage record.
+
+        Returns:
+            Record with the word's fields, without the derived hash
+        """
+        return {
+            "en_translation": self.en_translation,
+            "word": self.word,
+            "language_code": self.language_code,
+            "examples": self.examples,
+            "description": self.description,
+            "image_description": self.image_description,
+        }
 
     @property
     def image_file(self) -> str:
@@ -45,6 +109,56 @@ class WordbankWordDetails:
         return f"{self.hash}.{AUDIO_FORMAT}"
 
 
+def image_path(details: WordbankWordDetails) -> Path:
+    """
+    Get the image file shown for a word, following image aliases.
+
+    Args:
+        details: The word details
+
+    Returns:
+        Path to the word's image, or to the image it was aliased to
+    """
+    return IMAGE_DIR / get_image_hashes().resolve(details.image_file)
+
+
+def media_flags(details: WordbankWordDetails) -> tuple[bool, bool]:
+    """
+    Check which of a word's media files exist.
+
+    Args:
+        details: The word details
+
+    Returns:
+        Tuple of (has_image, has_audio)
+    """
+    media_index = get_media_index()
+    return (
+        media_index.exists(image_path(details)),
+        media_index.exists(AUDIO_DIR / details.audio_file),
+    )
+
+
+def refresh_media_flags(storage: SqliteWordbankStorage) -> int:
+    """
+    Update the stored media completeness flags from the files on disk.
+
+    Args:
+        storage: SQLite wordbank storage
+
+    Returns:
+        Number of records whose flags were updated
+    """
+    records = storage.get_all()
+    for record in records:
+        details = WordbankWordDetails.from_dict(record)
+        has_image, has_audio = media_flags(details)
+        storage.set_media_flags(
+            details.word, details.en_translation, has_image, has_audio
+        )
+    return len(records)
+
+
 def _create_default_agent() -> marvin.Agent:
     """Create the default Google Gemini agent."""
     google_api_key = load_google_api_key()
@@ -59,40 +173,64 @@ class WordBank:
     """
     Manages a wordbank for language learning flashcards.
 
-    The wordbank stores word details in a JSONL file with in-memory caching
-    and uses an LLM agent to generate complete flashcard data from minimal input.
+    The wordbank stores word details in a storage engine from
+    ``wordbank_storage`` and uses an LLM agent to generate complete flashcard
+    data from minimal input. By default this is the append-only JSONL record
+    log; a SQLite database adds indexed lookups and media completeness queries.
     """
 
     def __init__(
         self,
         data_path: str | None = None,
         agent: marvin.Agent | None = None,
+        storage: str = "jsonl",
+        reuse_similar_images: bool = False,
     ):
         """
         Initialize the WordBank.
 
         Args:
-            data_path: Path to the JSONL file. If None, uses default path.
+            data_path: Path to the wordbank file. The suffix selects the storage
+                       engine (".jsonl" or a SQLite file such as ".sqlite3").
+                       If None, uses the default path for ``storage``.
             agent: Marvin agent for LLM operations. If None, a new agent will be created
                    per request to enable true concurrent execution.
+            storage: Storage engine used with the default path ("jsonl" or "sqlite")
+            reuse_similar_images: If True, a newly generated image that is
+                         near-identical to an existing one is dropped and the
+                         word is aliased to the existing image
         """
         if data_path is None:
-            self.data_path = (
-                Path(__file__).parent.parent / "data" / "wordbank.jsonl"
-            ).absolute()
+            self.data_path = DEFAULT_DATA_PATHS[storage]
         else:
             self.data_path = Path(data_path).absolute()
+        self.storage: JsonlWordbankStorage | SqliteWordbankStorage = open_storage(
+            self.data_path
+        )
 
         # Store agent as optional - if None, we'll create per-request agents for concurrency
         self._agent = agent
         self.imagen = genai.Client(api_key=load_google_api_key())
         self.tts = TTS()
         self.tti = TTI()
-        self._cache: dict[tuple[str, str], WordbankWordDetails] | None = None
+        self.reuse_similar_images = reuse_similar_images
+        # Image hash lookups run in worker threads, one at a time
+        self._image_hashes_lock = threading.Lock()
+        # Whether the image hash index was refreshed in the current batch
+        self._image_hashes_fresh = False
+        # Translations of the stored words, built on first use
+        self._similarity: SimilarityIndex | None = None
+        # Details built from stored records, with the record each was built from.
+        # They share the record's strings and lists, so only the slotted object
+        # and its hash are extra, and the hash is computed once per record.
+        self._details: dict[
+            tuple[str, str], tuple[dict, WordbankWordDetails]
+        ] = {}
+        # (candidate, existing) pairs flagged as likely duplicates
+        self.likely_duplicates: list[tuple[tuple[str, str], tuple[str, str]]] = []
 
     def get_all(self) -> list["WordbankWordDetails"]:
-        data = self._load()
-        return list(data.values())
+        return [self._to_details(record) for record in self.storage.get_all()]
 
     def contains(self, word: str, en_translation: str) -> bool:
         """
@@ -105,8 +243,7 @@ class WordBank:
         Returns:
             True if the pair exists, False otherwise
         """
-        wordbank = self._load()
-        return (word, en_translation) in wordbank
+        return self.storage.get(word, en_translation) is not None
 
     def get(self, word: str, en_translation: str) -> WordbankWordDetails | None:
         """
@@ -119,8 +256,57 @@ class WordBank:
         Returns:
             WordbankWordDetails if found, None otherwise
         """
-        wordbank = self._load()
-        return wordbank.get((word, en_translation))
+        record = self.storage.get(word, en_translation)
+        return self._to_details(record) if record else None
+
+    def find(
+        self,
+        word_hash: str | None = None,
+        reading: str | None = None,
+        language_code: str | None = None,
+    ) -> list[WordbankWordDetails]:
+        """
+        Find words by media hash, hiragana reading or language.
+
+        Args:
+            word_hash: Hash used in the word's media filenames
+            reading: Hiragana reading of the word
+            language_code: Language code, e.g. "ja"
+
+        Returns:
+            Words matching every given criterion
+        """
+        records = self.storage.find(
+            word_hash=word_hash, reading=reading, language_code=language_code
+        )
+        return [self._to_details(record) for record in records]
+
+    def find_missing_media(
+        self, image: bool = False, audio: bool = False
+    ) -> list[WordbankWordDetails]:
+        """
+        Find words whose image and/or audio hasn't been generated.
+
+        SQLite storage answers from its media index; with JSONL storage every
+        word is checked against the media directories.
+
+        Args:
+            image: Include words without an image
+            audio: Include words without audio
+
+        Returns:
+            Words missing any of the requested media
+        """
+        if isinstance(self.storage, SqliteWordbankStorage):
+            records = self.storage.find_missing_media(image=image, audio=audio)
+            return [self._to_details(record) for record in records]
+
+        missing = []
+        for details in self.get_all():
+            has_image, has_audio = media_flags(details)
+            if (image and not has_image) or (audio and not has_audio):
+                missing.append(details)
+        return missing
 
     def upsert(self, details: WordbankWordDetails) -> None:
         """
@@ -129,10 +315,89 @@ class WordBank:
         Args:
             details: The word details to upsert
         """
-        wordbank = self._load()
-        key = (details.word, details.en_translation)
-        wordbank[key] = details
-        self._save()
+        has_image, has_audio = (
+            media_flags(details) if self.storage.indexes_media else (False, False)
+        )
+        record = details.to_dict()
+        self.storage.upsert(record, has_image=has_image, has_audio=has_audio)
+        self._details[(details.word, details.en_translation)] = (record, details)
+        if self._similarity is not None:
+            self._similarity.add(details.word, details.en_translation)
+
+    def _to_details(self, record: dict) -> WordbankWordDetails:
+        """
+        Get the details of a stored record, reusing the ones built before.
+
+        The JSONL engine hands out the same record until it changes, so the
+        identity check usually decides; SQLite records are compared by value.
+
+        Args:
+            record: Record from the wordbank storage
+
+        Returns:
+            WordbankWordDetails object
+        """
+        key = (record["word"], record["en_translation"])
+        cached = self._details.get(key)
+        if cached is not None and (cached[0] is record or cached[0] == record):
+            return cached[1]
+
+        details = WordbankWordDetails.from_dict(record)
+        self._details[key] = (record, details)
+        return details
+
+    def find_existing(
+        self, word: str, en_translation: str
+    ) -> WordbankWordDetails | None:
+        """
+        Find stored details to reuse for a word-translation pair.
+
+        Besides the exact pair, an entry for the same word whose translation
+        only differs in case, punctuation or a leading article is reused, so
+        "猫/a cat" doesn't pay for a second image of "猫/cat". Translations that
+        are merely similar are flagged in ``likely_duplicates`` and not reused.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+
+        Returns:
+            WordbankWordDetails if found, None otherwise
+        """
+        existing = self.get(word, en_translation)
+        if existing is not None:
+            return existing
+
+        if self._similarity is None:
+            self._similarity = SimilarityIndex()
+            for record in self.storage.get_all():
+                self._similarity.add(record["word"], record["en_translation"])
+
+        match = self._similarity.match(word, en_translation)
+        if match is None:
+            return None
+        if not match.exact:
+            _log.info(
+                f"Warning: '{word}' ({en_translation}) is a likely duplicate of "
+                f"'{match.word}' ({match.en_translation}), score {match.score:.2f}"
+            )
+            self.likely_duplicates.append(
+                ((word, en_translation), (match.word, match.en_translation))
+            )
+            return None
+
+        _log.info(
+            f"Reusing '{match.word}' ({match.en_translation}) for ({en_translation})"
+        )
+        return self.get(match.word, match.en_translation)
+
+    def compact(self) -> None:
+        """Compact the underlying storage (JSONL snapshot or WAL checkpoint)."""
+        self.storage.compact()
+
+    def close(self) -> None:
+        """Sync and close the underlying storage."""
+        self.storage.close()
 
     async def _generate_word_details(
         self, word: str, en_translation: str, description: str
@@ -151,8 +416,8 @@ class WordBank:
         Returns:
             Complete WordbankWordDetails object
         """
-        # Check if we already have this word in the database
-        existing = self.get(word, en_translation)
+        # Check if we already have this word (or a duplicate of it) in the database
+        existing = self.find_existing(word, en_translation)
 
         # If we have existing data with an image description, use it
         if existing and existing.image_description:
@@ -169,16 +434,18 @@ class WordBank:
         agent = self._agent if self._agent is not None else _create_default_agent()
 
         # Use the agent to generate the structured output asynchronously
-        result = await agent.run_async(
-            prompt, result_type=WordbankWordDetails, handlers=[]
+        # Details block the word's image and audio, so they go first
+        result = await get_scheduler().run(
+            "gemini-pro",
+            lambda: agent.run_async(
+                prompt, result_type=WordbankWordDetails, handlers=[]
+            ),
+            priority=PRIORITY_HIGH,
         )
 
         _log.info(f"Got result from agent: {result}")
         # Ensure the word and en_translation match the input
-        result.word = word
-        result.en_translation = en_translation
-
-        return result
+        return replace(result, word=word, en_translation=en_translation)
 
     async def propagate(
         self, word: str, en_translation: str, description: str
@@ -205,12 +472,226 @@ class WordBank:
             Complete WordbankWordDetails object
         """
         result = await self._generate_word_details(word, en_translation, description)
+        return await self._complete(result)
+
+    async def propagate_many(
+        self,
+        words: list[WordEntry],
+        on_complete: Callable[[tuple[str, str], WordbankWordDetails], None]
+        | None = None,
+    ) -> list[WordbankWordDetails | None]:
+        """
+        Generate complete word details for many words at once.
+
+        Words already in the database, or duplicates of stored words, are
+        reused as in ``propagate``. The rest
+        are sent to the LLM in multi-item requests of up to
+        ``PROPAGATE_BATCH_MAX_WORDS`` words. Each returned item must match one
+        of the requested word-translation pairs; words missing from a response
+        are retried, and after ``PROPAGATE_MAX_ATTEMPTS`` batched attempts get
+        a request of their own. Image and audio generation for a word starts as
+        soon as its details arrive. A word whose generation fails is logged and
+        skipped, so it doesn't fail the other words.
 
+        Args:
+            words: List of (word, en_translation, description) tuples
+            on_complete: Called once per input (word, en_translation) pair with
+                its details once their media is done. A reused duplicate is
+                reported under the input pair, not the stored entry's.
+
+        Returns:
+            Complete WordbankWordDetails for each input word, in input order,
+            or None for words whose generation failed. A reused duplicate
+            keeps the stored entry's translation.
+        """
+        tasks: dict[tuple[str, str], asyncio.Task] = {}
+        # Rescan the images once per batch, not once per generated image
+        self._image_hashes_fresh = False
+        # Input pair -> pair of the details used for it
+        resolved: dict[tuple[str, str], tuple[str, str]] = {}
+
+        # Pair of the details used -> input pairs resolved to them
+        inputs: dict[tuple[str, str], list[tuple[str, str]]] = {}
+
+        def notify(details: WordbankWordDetails) -> None:
+            key = (details.word, details.en_translation)
+            for pair in inputs.get(key, [key]):
+                on_complete(pair, details)
+
+        def schedule(details: WordbankWordDetails) -> None:
+            key = (details.word, details.en_translation)
+            if key not in tasks:
+                tasks[key] = asyncio.create_task(
+                    self._complete(details, notify if on_complete else None)
+                )
+
+        pending: dict[tuple[str, str], WordEntry] = {}
+        # Pending pairs by normalized translation, to catch duplicates in the input
+        pending_normalized: dict[tuple[str, str], tuple[str, str]] = {}
+        for word, en_translation, description in words:
+            key = (word, en_translation)
+            if key in resolved or key in pending:
+                continue
+            normalized = (word, normalize_translation(en_translation))
+            if normalized in pending_normalized:
+                resolved[key] = pending_normalized[normalized]
+                continue
+
+            existing = self.find_existing(word, en_translation)
+            if existing and existing.image_description:
+                schedule(existing)
+                resolved[key] = (existing.word, existing.en_translation)
+            else:
+                pending[key] = (word, en_translation, description)
+                pending_normalized[normalized] = key
+
+        # Complete before any media task runs, so notify sees every input
+        for pair in dict.fromkeys((word, en) for word, en, _ in words):
+            inputs.setdefault(resolved.get(pair, pair), []).append(pair)
+
+        try:
+            if pending:
+                _log.info(f"Generating new data for {len(pending)} words using LLM")
+                await self._generate_many_details(list(pending.values()), schedule)
+        finally:
+            # Media generation already started for the words that got details
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+            await self.tts.metadata.save()
+
+        details_by_key: dict[tuple[str, str], WordbankWordDetails] = {}
+        for (word, en_translation), result in zip(tasks, results):
+            if isinstance(result, BaseException):
+                _log.error(
+                    f"Error generating media for '{word}' ({en_translation}): "
+                    f"{result}"
+                )
+            else:
+                details_by_key[(word, en_translation)] = result
+        return [
+            details_by_key.get(resolved.get((word, en), (word, en)))
+            for word, en, _ in words
+        ]
+
+    async def _complete(
+        self,
+        details: WordbankWordDetails,
+        on_complete: Callable[[WordbankWordDetails], None] | None = None,
+    ) -> WordbankWordDetails:
+        """
+        Generate a word's image and audio, then store its details.
+
+        Args:
+            details: The word details
+            on_complete: Called with the details once they are stored
+
+        Returns:
+            The stored word details
+        """
         # Run image and audio generation concurrently
-        await asyncio.gather(self._generate_img(result), self._generate_audio(result))
+        await asyncio.gather(self._generate_img(details), self._generate_audio(details))
+
+        self.upsert(details)
+        if on_complete is not None:
+            on_complete(details)
+        return details
+
+    async def _generate_many_details(
+        self,
+        words: list[WordEntry],
+        on_details: Callable[[WordbankWordDetails], None],
+    ) -> None:
+        """
+        Generate details for words missing from the database in batched requests.
+
+        Args:
+            words: List of (word, en_translation, description) tuples
+            on_details: Called with each word's details as they arrive
+        """
+        pending = words
+        for attempt in range(PROPAGATE_MAX_ATTEMPTS):
+            if not pending:
+                return
+            if attempt:
+                _log.info(f"Retrying {len(pending)} words missing from LLM responses")
+
+            chunks = [
+                pending[i : i + PROPAGATE_BATCH_MAX_WORDS]
+                for i in range(0, len(pending), PROPAGATE_BATCH_MAX_WORDS)
+            ]
+            missing = await asyncio.gather(
+                *(self._generate_details_batch(chunk, on_details) for chunk in chunks)
+            )
+            pending = [entry for chunk_missing in missing for entry in chunk_missing]
+
+        # Last resort for words the batched requests kept dropping
+        results = await asyncio.gather(
+            *(self._generate_word_details(*entry) for entry in pending),
+            return_exceptions=True,
+        )
+        for (word, en_translation, _), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                _log.error(
+                    f"Error generating details for '{word}' ({en_translation}): "
+                    f"{result}"
+                )
+            else:
+                on_details(result)
+
+    async def _generate_details_batch(
+        self,
+        words: list[WordEntry],
+        on_details: Callable[[WordbankWordDetails], None],
+    ) -> list[WordEntry]:
+        """
+        Generate details for several words with a single LLM request.
+
+        Args:
+            words: List of (word, en_translation, description) tuples
+            on_details: Called with the details of each valid returned item
+
+        Returns:
+            The words with no valid item in the response
+        """
+        entries = "\n".join(
+            f"{i}. Word: {word} | English translation: {en_translation} "
+            f"| Context/Description: {description}"
+            for i, (word, en_translation, description) in enumerate(words, 1)
+        )
+        prompt = FLASHCARD_BATCH_GENERATION_PROMPT.format(
+            count=len(words), entries=entries
+        )
 
-        self.upsert(result)
-        return result
+        # Create a new agent per request for true concurrency, or use the shared one if provided
+        agent = self._agent if self._agent is not None else _create_default_agent()
+
+        try:
+            items = await get_scheduler().run(
+                "gemini-pro",
+                lambda: agent.run_async(
+                    prompt, result_type=list[WordbankWordDetails], handlers=[]
+                ),
+                priority=PRIORITY_HIGH,
+            )
+        except Exception as e:
+            _log.info(f"Warning: Batched generation of {len(words)} words failed: {e}")
+            return words
+
+        remaining = {(word, en): (word, en, descr) for word, en, descr in words}
+        for item in items:
+            key = (item.word, item.en_translation)
+            if key not in remaining:
+                _log.info(
+                    f"Warning: Ignoring unrequested item '{item.word}' "
+                    f"({item.en_translation})"
+                )
+                continue
+            if not item.examples or not item.image_description:
+                _log.info(f"Warning: Ignoring incomplete item for '{item.word}'")
+                continue
+            del remaining[key]
+            on_details(item)
+
+        return list(remaining.values())
 
     async def _generate_img(self, details: WordbankWordDetails):
         """
@@ -223,16 +704,10 @@ class WordBank:
             details: The word details to generate an image for
         """
         # Determine the file name
-        output_file = (
-            Path(__file__).parent.parent.absolute()
-            / "content"
-            / "images"
-            / "wordbank"
-            / details.image_file
-        )
+        output_file = IMAGE_DIR / details.image_file
 
-        # Check if image already exists
-        if details.image_file and output_file.exists():
+        # Check if image already exists (or the word reuses another word's image)
+        if details.image_file and get_media_index().exists(image_path(details)):
             _log.info(
                 f"Image file already exists at {output_file} - skipping generation"
             )
@@ -243,6 +718,40 @@ class WordBank:
         prompt = IMG_GEN_PROMPT.format(word_descr=details.image_description)
         await self.tti.generate(prompt, output_file)
 
+        if self.reuse_similar_images and get_media_index().exists(output_file):
+            # Hashing reads images with PIL; keep it off the event loop
+            await asyncio.to_thread(self._alias_similar_image, output_file)
+
+    def _alias_similar_image(self, image_file: Path) -> None:
+        """
+        Replace a new image with an existing near-identical one, if any.
+
+        Args:
+            image_file: Path to the newly generated image
+        """
+        image_hashes = get_image_hashes()
+        # Under the lock, so two new images never get aliased to each other
+        with self._image_hashes_lock:
+            if self._image_hashes_fresh:
+                image_hashes.add(image_file)
+            else:
+                # Picks up this image and those written by other processes
+                image_hashes.refresh()
+                self._image_hashes_fresh = True
+            matches = image_hashes.find_similar(image_file)
+            if not matches:
+                return
+
+            target, distance = matches[0]
+            _log.info(
+                f"Image {image_file.name} is near-identical to {target} "
+                f"(distance {distance}) - reusing it"
+            )
+            image_hashes.set_alias(image_file.name, target)
+            image_file.unlink()
+            image_hashes.discard(image_file)
+            get_media_index().discard(image_file)
+
     async def _generate_audio(self, details: WordbankWordDetails):
         """
         Generate audio pronunciation for the word.
@@ -254,16 +763,10 @@ class WordBank:
             details: The word details to generate audio for
         """
         # Determine the file name
-        output_file = (
-            Path(__file__).parent.parent.absolute()
-            / "content"
-            / "audio"
-            / "wordbank"
-            / details.audio_file
-        )
+        output_file = AUDIO_DIR / details.audio_file
 
         # Check if audio already exists
-        if details.audio_file and output_file.exists():
+        if details.audio_file and get_media_index().exists(output_file):
             _log.info(
                 f"Audio file already exists at {output_file} - skipping generation"
             )
@@ -289,39 +792,6 @@ class WordBank:
             _log.info(f"Warning: Failed to generate audio for '{details.word}': {e}")
             _log.info("Continuing without audio file...")
 
-    def _load(self) -> dict[tuple[str, str], WordbankWordDetails]:
-        """Load all wordbank data from JSONL file into memory."""
-        if self._cache is not None:
-            return self._cache
-
-        self._cache = {}
-
-        if not self.data_path.exists():
-            self.data_path.parent.mkdir(parents=True, exist_ok=True)
-            return self._cache
-
-        with open(self.data_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    data = json.loads(line)
-                    details = WordbankWordDetails(**data)
-                    key = (details.word, details.en_translation)
-                    self._cache[key] = details
-
-        return self._cache
-
-    def _save(self) -> None:
-        """Save all wordbank data to JSONL file."""
-        if self._cache is None:
-            return
-
-        self.data_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(self.data_path, "w", encoding="utf-8") as f:
-            for details in self._cache.values():
-                json.dump(asdict(details), f, ensure_ascii=False)
-                f.write("\n")
-
 
 # Prompt template for generating flashcard details
 FLASHCARD_GENERATION_PROMPT = """You are creating flashcard materials for language learners.
@@ -356,6 +826,37 @@ Remember: This is for a flashcard learning system. The word + English translatio
 Provide the complete details as a structured response."""
 
 
+# Prompt template for generating flashcard details for several words at once
+FLASHCARD_BATCH_GENERATION_PROMPT = """You are creating flashcard materials for language learners.
+
+Generate complete flashcard details for each of the following {count} Japanese words. Each line gives the word, its English translation and a context/description narrowing down the meaning:
+
+{entries}
+
+For every word, follow these requirements:
+
+1. **Description**: The meaning focuses on the specific sense indicated by the English translation and context. If the provided description is insufficient or unclear, expand it to be more complete and helpful for learners. The description should clearly explain this particular meaning of the word.
+
+2. **Examples**: Generate 2-3 natural example sentences that demonstrate how this word is used in this specific meaning. The examples should:
+   - Be realistic and practical for learners
+   - Show the word in different contexts
+   - Be at an appropriate difficulty level for intermediate learners
+   - Use the word in its original language (not translated)
+
+3. **Image Description**: Create a description of a scene that would help learners memorize this specific meaning of the word. This description will be used to generate an image using AI image diffusion systems. The description should:
+   - Focus on the essence and meaning rather than artistic style
+   - Describe a clear, memorable scene that represents the concept
+   - Be concrete and visual
+   - Help distinguish this meaning from other meanings of the word
+   - Be detailed enough for image generation (2-4 sentences)
+   - Avoid style instructions (like "photorealistic" or "cartoon") - focus only on content
+   - If the word is noun, minimise the amount of other objects in the description not to dillute the message
+
+Remember: This is for a flashcard learning system. Each word + English translation + description together represent ONE specific meaning, not all possible meanings of the word.
+
+Return exactly one item per listed word, with the word and English translation copied unchanged from the list. Provide the complete details as a structured list."""
+
+
 IMG_GEN_PROMPT = """{word_descr}
 Generate the image as a colourful illustration, with minimal amount of details. 
 
@@ -371,6 +872,60 @@ AUDIO_GEN_PROMPT = (
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wordbank storage utilities")
+    subparsers = parser.add_subparsers(dest="command")
+    import_parser = subparsers.add_parser(
+        "import", help="Import a JSONL wordbank into a SQLite database"
+    )
+    import_parser.add_argument(
+        "--jsonl", type=Path, default=DEFAULT_DATA_PATHS["jsonl"], help="JSONL file"
+    )
+    import_parser.add_argument(
+        "--db", type=Path, default=DEFAULT_DATA_PATHS["sqlite"], help="SQLite file"
+    )
+    export_parser = subparsers.add_parser(
+        "export", help="Export a SQLite database as a JSONL wordbank"
+    )
+    export_parser.add_argument(
+        "--db", type=Path, default=DEFAULT_DATA_PATHS["sqlite"], help="SQLite file"
+    )
+    export_parser.add_argument(
+        "--jsonl", type=Path, default=DEFAULT_DATA_PATHS["jsonl"], help="JSONL file"
+    )
+    missing_parser = subparsers.add_parser(
+        "missing-media", help="List words without an image or audio"
+    )
+    missing_parser.add_argument(
+        "--db", type=Path, default=DEFAULT_DATA_PATHS["sqlite"], help="SQLite file"
+    )
+    missing_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-check the media files on disk before querying",
+    )
+    args = parser.parse_args()
+
+    if args.command == "import":
+        db = SqliteWordbankStorage(args.db)
+        count = db.import_jsonl(args.jsonl)
+        refresh_media_flags(db)
+        print(f"Imported {count} words into {args.db}")
+        raise SystemExit(0)
+
+    if args.command == "export":
+        count = SqliteWordbankStorage(args.db).export_jsonl(args.jsonl)
+        print(f"Exported {count} words to {args.jsonl}")
+        raise SystemExit(0)
+
+    if args.command == "missing-media":
+        db = SqliteWordbankStorage(args.db, import_from=DEFAULT_DATA_PATHS["jsonl"])
+        if args.refresh:
+            refresh_media_flags(db)
+        for record in db.find_missing_media(image=True, audio=True):
+            print(f"{record['word']}\t{record['en_translation']}")
+        raise SystemExit(0)
 
     async def main():
         temp_wordbank = WordBank(data_path="./test_data.jsonl")
@@ -378,5 +933,6 @@ if __name__ == "__main__":
 
         for itm in temp_wordbank.get_all():
             _log.info(itm)
+        temp_wordbank.close()
 
     asyncio.run(main())
@@ -0,0 +1,221 @@
+"""Bulk vocabulary ingestion into the wordbank, outside of site builds.
+
+Reads a word list (CSV, TSV or JSONL) and propagates every entry with
+``WordBank.propagate_many``: details, image and audio requests go through the
+shared scheduler, which keeps each provider within its quota. Each finished word is
+appended to a checkpoint file, so an interrupted run resumes where it stopped.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+from pathlib import Path
+
+from tqdm import tqdm
+
+from scheduler import get_scheduler
+from wordbank import WordBank, WordEntry
+
+_log = logging.getLogger(__name__)
+
+# Words handed to propagate_many at a time; a failure only loses one chunk
+DEFAULT_CHUNK_SIZE = 100
+
+# Scheduler provider behind each --<kind>-concurrency option
+CONCURRENCY_PROVIDERS = {"llm": "gemini-pro", "image": "imagen", "audio": "gemini-tts"}
+
+# Column names accepted for each field of a word entry
+_FIELDS = ("word", "en_translation", "description")
+
+
+def read_word_list(path: Path) -> list[WordEntry]:
+    """
+    Read a word list.
+
+    CSV and TSV files have one entry per row with the columns ``word``,
+    ``en_translation`` and an optional ``description``. Without a header row
+    the columns are taken in that order. JSONL files have one object per line
+    with the same keys.
+
+    Args:
+        path: Path to a .csv, .tsv or .jsonl file
+
+    Returns:
+        List of (word, en_translation, description) tuples
+
+    Raises:
+        ValueError: If the file type isn't supported
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    elif suffix in (".csv", ".tsv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            lines = list(csv.reader(f, delimiter="\t" if suffix == ".tsv" else ","))
+        if lines and lines[0][:2] == list(_FIELDS[:2]):
+            header, lines = lines[0], lines[1:]
+        else:
+            header = list(_FIELDS)
+        rows = [dict(zip(header, line)) for line in lines if any(line)]
+    else:
+        raise ValueError(f"Unsupported word list type: {path.suffix}")
+
+    entries = []
+    for row in rows:
+        word = row.get("word", "").strip()
+        en_translation = row.get("en_translation", "").strip()
+        if not word or not en_translation:
+            _log.info(f"Warning: Skipping incomplete entry {row}")
+            continue
+        entries.append((word, en_translation, row.get("description", "").strip()))
+    return entries
+
+
+class Checkpoint:
+    """Append-only record of the word-translation pairs already ingested."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize the checkpoint, loading any previous progress.
+
+        Args:
+            path: Path to the checkpoint file
+        """
+        self.path = path
+        self.done: set[tuple[str, str]] = set()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        word, en_translation = json.loads(line)
+                    except ValueError:
+                        # Torn last line from an interrupted run
+                        continue
+                    self.done.add((word, en_translation))
+
+    def mark(self, word: str, en_translation: str) -> None:
+        """
+        Record a finished word.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+        """
+        self.done.add((word, en_translation))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps([word, en_translation], ensure_ascii=False) + "\n")
+
+
+async def ingest(
+    wordbank: WordBank,
+    entries: list[WordEntry],
+    checkpoint: Checkpoint,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Propagate word entries that aren't in the checkpoint yet.
+
+    Args:
+        wordbank: Wordbank to fill
+        entries: List of (word, en_translation, description) tuples
+        checkpoint: Progress of previous runs
+        chunk_size: Words handed to ``propagate_many`` at a time
+
+    Returns:
+        Number of words ingested in this run
+    """
+    pending = [entry for entry in entries if entry[:2] not in checkpoint.done]
+    _log.info(f"{len(entries) - len(pending)} of {len(entries)} words already ingested")
+
+    ingested = 0
+
+    with tqdm(
+        total=len(entries),
+        initial=len(entries) - len(pending),
+        desc="Ingesting wordbank entries",
+        unit="word",
+    ) as pbar:
+
+        def on_complete(pair, details):
+            nonlocal ingested
+            # The input pair: a reused duplicate's details carry the stored one
+            checkpoint.mark(*pair)
+            ingested += 1
+            pbar.update(1)
+
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i : i + chunk_size]
+            try:
+                await wordbank.propagate_many(chunk, on_complete=on_complete)
+            except Exception as e:
+                # The unfinished words stay out of the checkpoint for the next run
+                _log.info(
+                    f"Warning: Failed to ingest a chunk of {len(chunk)} words: {e}"
+                )
+
+        elapsed = pbar.format_dict["elapsed"]
+
+    rate = ingested / elapsed * 60 if elapsed else 0.0
+    print(f"Ingested {ingested} words in {elapsed:.0f}s ({rate:.1f} words/min)")
+    for (word, en_translation), (_, existing) in wordbank.likely_duplicates:
+        print(f"Likely duplicate: {word} ({en_translation}) ~ ({existing})")
+    return ingested
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Bulk-ingest a word list into the wordbank"
+    )
+    parser.add_argument(
+        "word_list", type=Path, help="CSV, TSV or JSONL file with words to ingest"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Progress file (default: the word list path with .checkpoint appended)",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["jsonl", "sqlite"],
+        default="jsonl",
+        help="Wordbank storage engine",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Words propagated at a time",
+    )
+    parser.add_argument(
+        "--reuse-similar-images",
+        action="store_true",
+        help="Alias words to existing near-identical images instead of new ones",
+    )
+    for kind, provider in CONCURRENCY_PROVIDERS.items():
+        parser.add_argument(
+            f"--{kind}-concurrency",
+            type=int,
+            help=f"Maximum concurrent {kind} requests (default: {provider} limit)",
+        )
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or args.word_list.with_name(
+        f"{args.word_list.name}.checkpoint"
+    )
+    checkpoint = Checkpoint(checkpoint_path)
+    for kind, provider in CONCURRENCY_PROVIDERS.items():
+        limit = getattr(args, f"{kind}_concurrency")
+        if limit is not None:
+            get_scheduler().configure(provider, concurrency=limit)
+    wordbank = WordBank(
+        storage=args.storage, reuse_similar_images=args.reuse_similar_images
+    )
+    try:
+        entries = read_word_list(args.word_list)
+        asyncio.run(ingest(wordbank, entries, checkpoint, args.chunk_size))
+    finally:
+        wordbank.close()
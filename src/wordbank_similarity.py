@@ -0,0 +1,142 @@
+"""Near-duplicate detection for wordbank entries.
+
+The wordbank keys entries on the exact (word, en_translation) pair, so
+"猫/cat", "猫/a cat" and "猫/Cat" would each pay for their own details, image
+and audio. This index compares a candidate against the existing entries for
+the same word: an identical normalized translation is the same entry, and
+translations with similar character n-grams are likely duplicates.
+"""
+
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+# Character n-gram sizes used for the translation vectors
+NGRAM_SIZES = (2, 3)
+# Number of hashed n-gram buckets per vector
+VECTOR_DIM = 2048
+# Cosine similarity from which two translations are a likely duplicate
+DUPLICATE_THRESHOLD = 0.55
+
+# Leading words that don't change the meaning of a translation
+_FILLER_PREFIX = re.compile(r"^(?:(?:a|an|the|to)\s+)+")
+_PUNCTUATION = re.compile(r"[^\w\s'-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_translation(text: str) -> str:
+    """Normalize an English translation for comparison.
+
+    Case, punctuation, surrounding whitespace and leading articles or an
+    infinitive "to" are ignored.
+
+    Args:
+        text: English translation
+
+    Returns:
+        Normalized translation
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+    return _FILLER_PREFIX.sub("", text)
+
+
+def ngram_vector(text: str) -> np.ndarray:
+    """Embed text as a unit vector of hashed character n-gram counts.
+
+    Args:
+        text: Normalized translation
+
+    Returns:
+        Vector of length ``VECTOR_DIM`` with unit L2 norm (zero for empty text)
+    """
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    padded = f" {text} "
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            # crc32 is stable across processes, unlike hash()
+            vector[zlib.crc32(padded[i : i + n].encode("utf-8")) % VECTOR_DIM] += 1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True)
+class SimilarityMatch:
+    """An existing entry resembling a candidate."""
+
+    word: str
+    en_translation: str
+    # Cosine similarity of the translations' n-gram vectors
+    score: float
+    # The normalized translations are identical
+    exact: bool
+
+
+class SimilarityIndex:
+    """Translation vectors of the existing entries, grouped by word."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._translations: dict[str, list[str]] = {}
+        self._normalized: dict[str, list[str]] = {}
+        # One row per translation of the word
+        self._vectors: dict[str, np.ndarray] = {}
+
+    def add(self, word: str, en_translation: str) -> None:
+        """
+        Add an entry to the index.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+        """
+        translations = self._translations.setdefault(word, [])
+        if en_translation in translations:
+            return
+
+        normalized = normalize_translation(en_translation)
+        translations.append(en_translation)
+        self._normalized.setdefault(word, []).append(normalized)
+        vector = ngram_vector(normalized)[np.newaxis]
+        vectors = self._vectors.get(word)
+        self._vectors[word] = (
+            vector if vectors is None else np.concatenate([vectors, vector])
+        )
+
+    def match(self, word: str, en_translation: str) -> SimilarityMatch | None:
+        """
+        Find the existing entry most similar to a candidate.
+
+        Only entries for the same word are compared, and the candidate's own
+        exact pair is never returned.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+
+        Returns:
+            The best match at or above ``DUPLICATE_THRESHOLD``, None otherwise
+        """
+        vectors = self._vectors.get(word)
+        if vectors is None:
+            return None
+
+        normalized = normalize_translation(en_translation)
+        scores = vectors @ ngram_vector(normalized)
+        translations = self._translations[word]
+        for i, existing in enumerate(translations):
+            # Never match the candidate itself
+            if existing == en_translation:
+                scores[i] = -1.0
+            elif self._normalized[word][i] == normalized:
+                return SimilarityMatch(word, existing, 1.0, exact=True)
+
+        best = int(np.argmax(scores))
+        if scores[best] < DUPLICATE_THRESHOLD:
+            return None
+        return SimilarityMatch(
+            word, translations[best], float(scores[best]), exact=False
+        )
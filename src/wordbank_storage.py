@@ -0,0 +1,655 @@
+"""Storage engines for the wordbank.
+
+Both engines store word records as plain dicts (the JSON form of
+``WordbankWordDetails``) keyed by ``(word, en_translation)``:
+
+- ``JsonlWordbankStorage``: an append-only JSONL record log, loaded into memory
+  on first use. This is the format checked into the repository.
+- ``SqliteWordbankStorage``: an embedded SQLite database in WAL mode with
+  indexes for lookups by hash, reading and language, and for media
+  completeness. It doesn't need a full parse at startup and imports and
+  exports the JSONL format.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import morphology
+
+_log = logging.getLogger(__name__)
+
+# Appended records are fsynced in batches of this many lines
+FSYNC_BATCH = 32
+# The log is compacted once obsolete lines outnumber live records (and it has at
+# least this many lines), so small banks aren't rewritten over and over
+COMPACT_MIN_LINES = 256
+
+# File suffixes that select the SQLite engine in ``open_storage``
+SQLITE_SUFFIXES = {".sqlite3", ".sqlite", ".db"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    word TEXT NOT NULL,
+    en_translation TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    reading TEXT NOT NULL,
+    language_code TEXT NOT NULL,
+    has_image INTEGER NOT NULL DEFAULT 0,
+    has_audio INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    PRIMARY KEY (word, en_translation)
+);
+CREATE INDEX IF NOT EXISTS words_hash ON words (hash);
+CREATE INDEX IF NOT EXISTS words_reading ON words (reading);
+CREATE INDEX IF NOT EXISTS words_language ON words (language_code);
+CREATE INDEX IF NOT EXISTS words_media ON words (has_image, has_audio);
+"""
+
+Record = dict[str, Any]
+
+
+def record_key(record: Record) -> tuple[str, str]:
+    """
+    Get the primary key of a word record.
+
+    Args:
+        record: Word record
+
+    Returns:
+        Tuple of (word, en_translation)
+    """
+    return record["word"], record["en_translation"]
+
+
+def record_hash(word: str, en_translation: str) -> str:
+    """
+    Compute the ASCII-safe identifier used in a word's media filenames.
+
+    Args:
+        word: The word in the target language
+        en_translation: The English translation
+
+    Returns:
+        MD5 of "word:en_translation", truncated to 12 characters
+    """
+    combined = f"{word}:{en_translation}"
+    return hashlib.md5(combined.encode("utf-8")).hexdigest()[:12]
+
+
+def read_jsonl(path: Path) -> dict[tuple[str, str], Record]:
+    """
+    Read a JSONL record log, keeping the last record for each key.
+
+    Unreadable lines (a torn write at the end of the log) are skipped.
+
+    Args:
+        path: Path to the JSONL file
+
+    Returns:
+        Dict mapping (word, en_translation) to the latest record
+    """
+    records: dict[tuple[str, str], Record] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                _log.info("Warning: Skipping unreadable wordbank record")
+                continue
+            # Later records supersede earlier ones
+            records[record_key(record)] = record
+    return records
+
+
+def write_jsonl(path: Path, records: list[Record]) -> None:
+    """
+    Atomically write records as a JSONL snapshot with one line per record.
+
+    Args:
+        path: Destination JSONL file
+        records: Records to write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            json.dump(record, f, ensure_ascii=False)
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class JsonlWordbankStorage:
+    """
+    Append-only JSONL record log with an in-memory last-writer-wins index.
+
+    Every upsert appends one line. ``compact`` rewrites the log as a clean
+    snapshot; it also runs automatically once obsolete lines outnumber live
+    records.
+
+    Writes are safe across processes: they hold an advisory lock on a
+    ``.lock`` sidecar file, merge the records other processes appended since
+    the last read, and compaction replaces the log atomically via a temp file.
+    """
+
+    # Media completeness is not recorded in the JSONL format
+    indexes_media = False
+
+    def __init__(self, path: Path | str):
+        """
+        Initialize the storage.
+
+        Args:
+            path: Path to the JSONL file
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._records: dict[tuple[str, str], Record] | None = None
+        # Append handle for the record log, opened on first write
+        self._log_file = None
+        # Handle of the lock file, opened on first write
+        self._lock_file = None
+        # flock only excludes other processes; threads share the handle
+        self._thread_lock = threading.Lock()
+        # Number of lines in the log, including obsolete ones
+        self._log_lines = 0
+        # Appended lines not yet fsynced
+        self._unsynced = 0
+        # Byte offset up to which the log has been read, and the inode it was read
+        # from; another process's compaction replaces the file with a new inode
+        self._read_offset = 0
+        self._inode: int | None = None
+        # The log ends with a partial line (a crashed writer)
+        self._torn_tail = False
+
+    def get(self, word: str, en_translation: str) -> Record | None:
+        """
+        Get the record for a word-translation pair.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+
+        Returns:
+            Record if found, None otherwise
+        """
+        return self._load().get((word, en_translation))
+
+    def get_all(self) -> list[Record]:
+        """
+        Get all records.
+
+        Returns:
+            List of records
+        """
+        return list(self._load().values())
+
+    def find(
+        self,
+        word_hash: str | None = None,
+        reading: str | None = None,
+        language_code: str | None = None,
+    ) -> list[Record]:
+        """
+        Find records by hash, reading or language (linear scan).
+
+        Args:
+            word_hash: Record hash as used in media filenames
+            reading: Hiragana reading of the word
+            language_code: Language code, e.g. "ja"
+
+        Returns:
+            Records matching every given criterion
+        """
+        matches = []
+        for record in self._load().values():
+            if language_code is not None and record["language_code"] != language_code:
+                continue
+            if word_hash is not None and record_hash(*record_key(record)) != word_hash:
+                continue
+            if reading is not None and morphology.reading(record["word"]) != reading:
+                continue
+            matches.append(record)
+        return matches
+
+    def upsert(
+        self, record: Record, has_image: bool = False, has_audio: bool = False
+    ) -> None:
+        """
+        Insert or update a record.
+
+        Args:
+            record: Record to store
+            has_image: Ignored - media completeness isn't stored in JSONL
+            has_audio: Ignored - media completeness isn't stored in JSONL
+        """
+        with self._locked():
+            records = self._load()
+            self._read_new_records()
+
+            key = record_key(record)
+            if records.get(key) == record:
+                return
+
+            records[key] = record
+            self._append(record)
+
+            obsolete = self._log_lines - len(records)
+            if self._log_lines >= COMPACT_MIN_LINES and obsolete > len(records):
+                self._compact()
+
+    def refresh(self) -> None:
+        """Merge records that other processes appended since the last read."""
+        with self._locked():
+            self._load()
+            self._read_new_records()
+
+    def compact(self) -> None:
+        """Rewrite the record log as a snapshot with one line per word."""
+        with self._locked():
+            self._load()
+            self._read_new_records()
+            self._compact()
+
+    def sync(self) -> None:
+        """Flush appended records to stable storage."""
+        if self._log_file is not None and self._unsynced:
+            self._log_file.flush()
+            os.fsync(self._log_file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync and close the record log and the lock file."""
+        if self._log_file is not None:
+            self.sync()
+            self._log_file.close()
+            self._log_file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cross-process write lock."""
+        with self._thread_lock:
+            if self._lock_file is None:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                self._lock_file = open(self.lock_path, "a")
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> dict[tuple[str, str], Record]:
+        """Load the record log into memory on first use."""
+        if self._records is None:
+            self._records = {}
+            self._read_new_records()
+        return self._records
+
+    def _read_new_records(self) -> None:
+        """Merge the complete lines appended to the log since the last read.
+
+        If the log was replaced (compacted by another process), it is re-read
+        from the start.
+        """
+        assert self._records is not None
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._inode:
+                self._records.clear()
+                self._log_lines = 0
+                self._read_offset = 0
+                self._inode = inode
+            f.seek(self._read_offset)
+            data = f.read()
+
+        # A partial last line is left for later - it's either being written or torn
+        end = data.rfind(b"\n") + 1
+        self._torn_tail = end < len(data)
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                _log.info("Warning: Skipping unreadable wordbank record")
+                continue
+            # Later records supersede earlier ones
+            self._records[record_key(record)] = record
+            self._log_lines += 1
+        self._read_offset += end
+
+    def _append(self, record: Record) -> None:
+        """Append one record to the log, fsyncing every FSYNC_BATCH lines.
+
+        Must be called with the lock held, right after ``_read_new_records``.
+        """
+        if self._log_file is not None and (
+            os.fstat(self._log_file.fileno()).st_ino != self._inode
+        ):
+            # The log was replaced by a compaction since the handle was opened
+            self.sync()
+            self._log_file.close()
+            self._log_file = None
+        if self._log_file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._log_file = open(self.path, "ab")
+            self._inode = os.fstat(self._log_file.fileno()).st_ino
+
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        if self._torn_tail:
+            # Terminate the torn line so the record starts on its own line
+            line = b"\n" + line
+            self._torn_tail = False
+        self._log_file.write(line)
+        # Flushing hands the line to the OS; only the fsync is batched
+        self._log_file.flush()
+        self._read_offset = os.fstat(self._log_file.fileno()).st_size
+        self._log_lines += 1
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_BATCH:
+            self.sync()
+
+    def _compact(self) -> None:
+        """Write the snapshot and swap it in. Must be called with the lock held."""
+        assert self._records is not None
+        if self._log_file is not None:
+            self.sync()
+            self._log_file.close()
+            self._log_file = None
+        write_jsonl(self.path, list(self._records.values()))
+
+        _log.info(
+            f"Compacted wordbank log from {self._log_lines} to "
+            f"{len(self._records)} lines"
+        )
+        stat = os.stat(self.path)
+        self._inode = stat.st_ino
+        self._read_offset = stat.st_size
+        self._log_lines = len(self._records)
+        self._torn_tail = False
+
+
+class SqliteWordbankStorage:
+    """
+    SQLite database in WAL mode with indexed lookups.
+
+    Each record is stored as JSON next to the indexed columns, so the schema
+    doesn't have to follow every field of ``WordbankWordDetails``.
+    """
+
+    # Media completeness flags are stored and indexed
+    indexes_media = True
+
+    def __init__(self, path: Path | str, import_from: Path | str | None = None):
+        """
+        Open (or create) the database.
+
+        Args:
+            path: Path to the SQLite file
+            import_from: JSONL file to import when the database is new
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists()
+
+        # Pelican hooks and async workers may run on different threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode, NORMAL only risks the last commits on power loss, never corruption
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        if is_new and import_from is not None and Path(import_from).exists():
+            count = self.import_jsonl(import_from)
+            _log.info(f"Imported {count} words from {import_from}")
+
+    def get(self, word: str, en_translation: str) -> Record | None:
+        """
+        Get the record for a word-translation pair.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+
+        Returns:
+            Record if found, None otherwise
+        """
+        row = self._query_one(
+            "SELECT data FROM words WHERE word = ? AND en_translation = ?",
+            (word, en_translation),
+        )
+        return json.loads(row[0]) if row else None
+
+    def get_all(self) -> list[Record]:
+        """
+        Get all records.
+
+        Returns:
+            List of records, in insertion order
+        """
+        return self._query_records("SELECT data FROM words ORDER BY rowid", ())
+
+    def find(
+        self,
+        word_hash: str | None = None,
+        reading: str | None = None,
+        language_code: str | None = None,
+    ) -> list[Record]:
+        """
+        Find records by hash, reading or language (indexed lookups).
+
+        Args:
+            word_hash: Record hash as used in media filenames
+            reading: Hiragana reading of the word
+            language_code: Language code, e.g. "ja"
+
+        Returns:
+            Records matching every given criterion
+        """
+        conditions = []
+        params: list[str] = []
+        for column, value in (
+            ("hash", word_hash),
+            ("reading", reading),
+            ("language_code", language_code),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query_records(
+            f"SELECT data FROM words{where} ORDER BY rowid", tuple(params)
+        )
+
+    def find_missing_media(
+        self, image: bool = False, audio: bool = False
+    ) -> list[Record]:
+        """
+        Find records whose image and/or audio hasn't been generated.
+
+        Args:
+            image: Include records without an image
+            audio: Include records without audio
+
+        Returns:
+            Records missing any of the requested media
+        """
+        conditions = []
+        if image:
+            conditions.append("has_image = 0")
+        if audio:
+            conditions.append("has_audio = 0")
+        if not conditions:
+            return []
+
+        return self._query_records(
+            f"SELECT data FROM words WHERE {' OR '.join(conditions)} ORDER BY rowid",
+            (),
+        )
+
+    def upsert(
+        self, record: Record, has_image: bool = False, has_audio: bool = False
+    ) -> None:
+        """
+        Insert or update a record.
+
+        Args:
+            record: Record to store
+            has_image: Whether the word's image exists
+            has_audio: Whether the word's audio exists
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO words (
+                    word, en_translation, hash, reading, language_code,
+                    has_image, has_audio, data
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (word, en_translation) DO UPDATE SET
+                    hash = excluded.hash,
+                    reading = excluded.reading,
+                    language_code = excluded.language_code,
+                    has_image = excluded.has_image,
+                    has_audio = excluded.has_audio,
+                    data = excluded.data
+                """,
+                self._row(record, has_image, has_audio),
+            )
+
+    def set_media_flags(
+        self, word: str, en_translation: str, has_image: bool, has_audio: bool
+    ) -> None:
+        """
+        Update the media completeness flags of a record.
+
+        Args:
+            word: The word in the target language
+            en_translation: The English translation
+            has_image: Whether the word's image exists
+            has_audio: Whether the word's audio exists
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE words SET has_image = ?, has_audio = ? "
+                "WHERE word = ? AND en_translation = ?",
+                (int(has_image), int(has_audio), word, en_translation),
+            )
+
+    def import_jsonl(self, path: Path | str) -> int:
+        """
+        Import records from a JSONL file, replacing existing ones with the same key.
+
+        Media flags of imported records start as missing; use
+        ``WordBank.refresh_media_flags`` to set them from disk.
+
+        Args:
+            path: Path to the JSONL file
+
+        Returns:
+            Number of records imported
+        """
+        records = read_jsonl(Path(path))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO words (
+                    word, en_translation, hash, reading, language_code,
+                    has_image, has_audio, data
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (self._row(record, False, False) for record in records.values()),
+            )
+        return len(records)
+
+    def export_jsonl(self, path: Path | str) -> int:
+        """
+        Export all records as a JSONL snapshot.
+
+        Args:
+            path: Destination JSONL file
+
+        Returns:
+            Number of records exported
+        """
+        records = self.get_all()
+        write_jsonl(Path(path), records)
+        return len(records)
+
+    def compact(self) -> None:
+        """Checkpoint the WAL into the main database file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def sync(self) -> None:
+        """Nothing to do - every upsert is committed."""
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(record: Record, has_image: bool, has_audio: bool) -> tuple:
+        """Build the column values for a record."""
+        return (
+            record["word"],
+            record["en_translation"],
+            record_hash(*record_key(record)),
+            morphology.reading(record["word"]),
+            record["language_code"],
+            int(has_image),
+            int(has_audio),
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    def _query_one(self, sql: str, params: tuple) -> tuple | None:
+        """Run a query and return its first row."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _query_records(self, sql: str, params: tuple) -> list[Record]:
+        """Run a query selecting the data column and decode the records."""
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+def open_storage(
+    path: Path | str,
+) -> JsonlWordbankStorage | SqliteWordbankStorage:
+    """
+    Open the storage engine matching a file's suffix.
+
+    A new SQLite database imports the JSONL file next to it, if any.
+
+    Args:
+        path: Path to a ".jsonl" file or a SQLite file (".sqlite3", ".sqlite", ".db")
+
+    Returns:
+        Storage engine instance
+    """
+    path = Path(path)
+    if path.suffix in SQLITE_SUFFIXES:
+        return SqliteWordbankStorage(path, import_from=path.with_suffix(".jsonl"))
+    return JsonlWordbankStorage(path)
@@ -0,0 +1,172 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from audio import (
+    AudioMetadataIndex,
+    PostProcessConfig,
+    SplitConfig,
+    array_to_pcm,
+    array_to_wav,
+    clip_key,
+    compute_peaks,
+    pcm_to_array,
+    post_process,
+    split_at_silences,
+    trim_silence,
+    wav_to_array,
+)
+
+SAMPLE_RATE = 24000
+
+
+@pytest.fixture
+def config():
+    """Default post-processing config."""
+    return PostProcessConfig()
+
+
+@pytest.fixture
+def padded_tone():
+    """0.5s of silence, 1s of a quiet 440 Hz tone, then 0.5s of silence."""
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    tone = (0.05 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    silence = np.zeros(SAMPLE_RATE // 2, dtype=np.float32)
+    return np.concatenate([silence, tone, silence])
+
+
+def test_pcm_round_trip():
+    """Test converting samples to PCM and back."""
+    samples = np.array([0.0, 0.5, -0.5, 1.0, -1.0], dtype=np.float32)
+    result = pcm_to_array(array_to_pcm(samples))
+    assert np.allclose(result, samples, atol=1e-4)
+
+
+def test_wav_round_trip(padded_tone):
+    """Test wrapping samples in WAV and reading them back."""
+    samples, rate = wav_to_array(array_to_wav(padded_tone, SAMPLE_RATE))
+    assert rate == SAMPLE_RATE
+    assert len(samples) == len(padded_tone)
+
+
+def test_trim_silence_keeps_padding(padded_tone, config):
+    """Test that trimming removes silence but keeps the configured padding."""
+    start, end = trim_silence(padded_tone, SAMPLE_RATE, config)
+    padding = int(SAMPLE_RATE * config.padding_ms / 1000)
+
+    assert start == pytest.approx(SAMPLE_RATE // 2 - padding, abs=SAMPLE_RATE // 100)
+    assert end == pytest.approx(
+        SAMPLE_RATE // 2 + SAMPLE_RATE + padding, abs=SAMPLE_RATE // 100
+    )
+
+
+def test_trim_silence_all_silent(config):
+    """Test that a silent clip is left untouched."""
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    assert trim_silence(silence, SAMPLE_RATE, config) == (0, SAMPLE_RATE)
+
+
+def test_post_process_normalizes_loudness(padded_tone, config):
+    """Test that voiced audio is brought to the target loudness."""
+    processed, stats = post_process(padded_tone, SAMPLE_RATE, config)
+
+    rms_db = 20 * np.log10(np.sqrt(np.mean(processed[np.abs(processed) > 0] ** 2)))
+    assert stats.duration < stats.original_duration
+    assert stats.gain_db > 0
+    assert rms_db == pytest.approx(config.target_rms_db, abs=1.0)
+
+
+def test_post_process_respects_peak_ceiling(config):
+    """Test that gain never pushes peaks above the ceiling."""
+    clicks = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    clicks[::2400] = 0.9
+    processed, stats = post_process(clicks, SAMPLE_RATE, config)
+
+    assert stats.peak_db <= config.peak_ceiling_db + 0.01
+    assert np.abs(processed).max() <= 1.0
+
+
+def test_split_at_silences(padded_tone):
+    """Test that a batched recording is cut into one clip per utterance."""
+    gap = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    batch = np.concatenate([padded_tone, gap, padded_tone, gap, padded_tone])
+    segments = split_at_silences(batch, SAMPLE_RATE, 3, SplitConfig())
+
+    assert segments is not None
+    assert len(segments) == 3
+    assert sum(len(segment) for segment in segments) == len(batch)
+    assert all(np.abs(segment).max() > 0.01 for segment in segments)
+
+
+def test_split_at_silences_count_mismatch(padded_tone):
+    """Test that a recording with the wrong number of pauses is rejected."""
+    gap = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    batch = np.concatenate([padded_tone, gap, padded_tone])
+
+    assert split_at_silences(batch, SAMPLE_RATE, 3, SplitConfig()) is None
+
+
+def test_split_at_silences_length_mismatch(padded_tone):
+    """Test that clips whose lengths don't fit their utterances are rejected."""
+    gap = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    batch = np.concatenate([padded_tone, gap, padded_tone, gap, padded_tone])
+
+    config = SplitConfig()
+
+    # Three equal clips fit three lines of similar length...
+    assert split_at_silences(batch, SAMPLE_RATE, 3, config, [4, 5, 4]) is not None
+    # ...but not a single mora next to two long lines
+    assert split_at_silences(batch, SAMPLE_RATE, 3, config, [1, 30, 30]) is None
+
+    # Three seconds of spoken instruction glued onto the first line
+    t = np.arange(3 * SAMPLE_RATE) / SAMPLE_RATE
+    instruction = (0.05 * np.sin(2 * np.pi * 330 * t)).astype(np.float32)
+    batch = np.concatenate([instruction, batch])
+    assert split_at_silences(batch, SAMPLE_RATE, 3, config, [4, 5, 4]) is None
+
+
+def test_compute_peaks_shape(padded_tone):
+    """Test that the waveform overview is normalized and follows the envelope."""
+    peaks = compute_peaks(padded_tone, n_bins=8)
+
+    assert len(peaks) == 8
+    assert max(peaks) == 1.0
+    assert peaks[0] == 0.0 and peaks[-1] == 0.0
+
+
+def test_metadata_index_persistence():
+    """Test that clip metadata persists across index instances."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "audio_metadata.json"
+        key = clip_key(Path("content/audio/tts/abc.aac"))
+
+        first = AudioMetadataIndex(path)
+        first.update(key, {"duration": 1.5})
+        first.update(key, {"gain_db": 3.0})
+        # Updates are buffered until flushed
+        assert first.get(key) == {"duration": 1.5, "gain_db": 3.0}
+        assert AudioMetadataIndex(path).get(key) is None
+        first.flush()
+
+        assert key == "tts/abc"
+        assert AudioMetadataIndex(path).get(key) == {"duration": 1.5, "gain_db": 3.0}
+
+
+def test_metadata_index_concurrent_instances():
+    """Test that indexes loaded before each other's updates keep both entries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "audio_metadata.json"
+        first = AudioMetadataIndex(path)
+        second = AudioMetadataIndex(path)
+        assert first.get("tts/a") is None and second.get("tts/b") is None
+
+        first.update("tts/a", {"duration": 1.0})
+        first.flush()
+        second.update("tts/b", {"duration": 2.0})
+        asyncio.run(second.save())
+
+        assert AudioMetadataIndex(path).get("tts/a") == {"duration": 1.0}
+        assert second.get("tts/a") == {"duration": 1.0}
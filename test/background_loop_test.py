@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from background_loop import BackgroundLoop
+
+
+@pytest.fixture
+def background_loop():
+    """Background loop that is shut down after the test."""
+    background_loop = BackgroundLoop()
+    yield background_loop
+    background_loop.shutdown()
+
+
+def test_run_returns_result(background_loop):
+    """Test that run executes the coroutine on the background thread."""
+
+    async def thread_name():
+        return threading.current_thread().name
+
+    assert background_loop.run(thread_name()) == "background-loop"
+
+
+def test_submitted_work_overlaps(background_loop):
+    """Test that coroutines submitted from different callers run concurrently."""
+
+    async def sleep():
+        await asyncio.sleep(0.1)
+
+    start = time.monotonic()
+    futures = [background_loop.submit(sleep()) for _ in range(5)]
+    for future in futures:
+        future.result()
+
+    assert time.monotonic() - start < 0.3
+
+
+def test_run_from_inside_loop_raises(background_loop):
+    """Test that blocking on the loop from one of its own tasks fails fast."""
+
+    async def nested():
+        async def inner():
+            return 1
+
+        background_loop.run(inner())
+
+    with pytest.raises(RuntimeError):
+        background_loop.run(nested())
+
+
+def test_shutdown_cancels_and_restarts(background_loop):
+    """Test that shutdown cancels pending work and the loop restarts on use."""
+
+    async def forever():
+        await asyncio.sleep(3600)
+
+    async def answer():
+        return 42
+
+    pending = background_loop.submit(forever())
+    background_loop.shutdown()
+
+    assert pending.cancelled()
+    assert background_loop.run(answer()) == 42
@@ -0,0 +1,78 @@
+import pytest
+
+from content_cache import ContentCache, build_key, code_fingerprint, data_fingerprint
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Content directory with an article and a media file, and its settings."""
+    content = tmp_path / "content"
+    (content / "audio").mkdir(parents=True)
+    (content / "audio" / "clip.aac").write_bytes(b"audio")
+    (content / "article.md").write_text("Title: Test\n\nこんにちは\n", encoding="utf-8")
+    settings = {
+        "PATH": str(content),
+        "PLUGIN_PATHS": [],
+        "STATIC_PATHS": ["audio"],
+        "SITEURL": "",
+        "GENERATE_CONTENT": False,
+    }
+    return content, settings
+
+
+def test_round_trip(tmp_path, site):
+    """Test that output is only served for an unchanged source."""
+    content, settings = site
+    source_path = content / "article.md"
+    cache = ContentCache(tmp_path / "cache", build_key(settings))
+
+    key = cache.key(source_path)
+    assert cache.get(source_path, key) is None
+    cache.put(source_path, key, "<p>こんにちは</p>")
+    assert cache.get(source_path, key) == "<p>こんにちは</p>"
+
+    source_path.write_text("Title: Test\n\nさようなら\n", encoding="utf-8")
+    assert cache.key(source_path) != key
+    assert cache.get(source_path, cache.key(source_path)) is None
+
+
+def test_build_key(site):
+    """Test that settings and media changes invalidate all articles."""
+    content, settings = site
+    key = build_key(settings)
+    assert build_key(dict(settings)) == key
+    assert build_key({**settings, "SITEURL": "https://example.com"}) == key
+    assert build_key({**settings, "GENERATE_CONTENT": True}) != key
+
+    plugins = {**settings, "PLUGINS": ["output_cache", "tts_filter"]}
+    plugins_key = build_key(plugins)
+    # Plugins that don't touch _content, like cache_busting, don't count
+    published = {**plugins, "PLUGINS": ["tts_filter", "cache_busting"]}
+    assert build_key(published) == plugins_key
+    assert build_key({**plugins, "PLUGINS": ["tts_filter", "wordspan"]}) != plugins_key
+
+    (content / "audio" / "clip2.aac").write_bytes(b"audio")
+    assert build_key(settings) != key
+
+
+def test_fingerprints(tmp_path):
+    """Test which file changes the fingerprints notice."""
+    (tmp_path / "plugin").mkdir()
+    (tmp_path / "plugin" / "__init__.py").write_text("x = 1\n")
+    code = code_fingerprint([tmp_path])
+    (tmp_path / "plugin" / "__pycache__").mkdir()
+    (tmp_path / "plugin" / "__pycache__" / "a.pyc").write_bytes(b"\0")
+    assert code_fingerprint([tmp_path]) == code
+    (tmp_path / "plugin" / "__init__.py").write_text("x = 2\n")
+    assert code_fingerprint([tmp_path]) != code
+
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "wordbank.jsonl").write_text("{}\n")
+    fingerprint = data_fingerprint([], data)
+    (data / "wordbank.jsonl.lock").write_text("")
+    (data / "llm_cache.db-wal").write_bytes(b"\0")
+    (data / "llm_cache.db-shm").write_bytes(b"\0")
+    assert data_fingerprint([], data) == fingerprint
+    (data / "wordbank.jsonl").write_text('{"word": "犬"}\n')
+    assert data_fingerprint([], data) != fingerprint
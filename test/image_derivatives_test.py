@@ -0,0 +1,59 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_derivatives import (
+    DERIVATIVE_WIDTHS,
+    ImageDerivatives,
+    block_mean,
+    supported_formats,
+)
+
+
+@pytest.fixture
+def image_dir():
+    """Directory with one 1024px generated-style JPEG."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "wordbank"
+        path.mkdir()
+        Image.new("RGB", (1024, 1024), (200, 80, 40)).save(path / "abc.jpg")
+        yield path
+
+
+def test_ensure_renders_every_width_and_format(image_dir):
+    """Test that derivatives are rendered once and recorded in the manifest."""
+    derivatives = ImageDerivatives(image_dir.parent / "manifest.json", max_workers=1)
+    source = image_dir / "abc.jpg"
+    try:
+        asyncio.run(derivatives.ensure([source]))
+        variants = derivatives.variants(source)
+        mtimes = [(image_dir / v["file"]).stat().st_mtime_ns for v in variants]
+
+        asyncio.run(derivatives.ensure([source]))
+    finally:
+        derivatives.shutdown()
+
+    assert len(variants) == len(DERIVATIVE_WIDTHS) * len(supported_formats())
+    assert {v["width"] for v in variants} == set(DERIVATIVE_WIDTHS)
+    assert all((image_dir / v["file"]).exists() for v in variants)
+    # Unchanged source - nothing re-rendered
+    assert [(image_dir / v["file"]).stat().st_mtime_ns for v in variants] == mtimes
+    reloaded = ImageDerivatives(image_dir.parent / "manifest.json")
+    assert reloaded.variants(source) == variants
+    assert reloaded.placeholder(source).startswith("data:image/png;base64,")
+
+
+def test_block_mean():
+    """Test that the placeholder downsampling averages equal pixel blocks."""
+    pixels = np.zeros((16, 16, 3), dtype=np.float32)
+    pixels[:8, :8] = 255
+
+    result = block_mean(pixels, size=2)
+
+    assert result.shape == (2, 2, 3)
+    assert result[0, 0].tolist() == [255, 255, 255]
+    assert result[1, 1].tolist() == [0, 0, 0]
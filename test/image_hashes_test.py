@@ -0,0 +1,74 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_hashes import ImageHashIndex, dhash, hamming_distances, phash
+
+
+def gradient_image(flip: bool = False, size: int = 256) -> Image.Image:
+    """Horizontal gradient with a dark square, optionally mirrored."""
+    pixels = np.tile(np.linspace(0, 255, size, dtype=np.float32), (size, 1))
+    pixels[size // 4 : size // 2, size // 4 : size // 2] = 0
+    if flip:
+        pixels = pixels[:, ::-1]
+    return Image.fromarray(pixels.astype(np.uint8), "L").convert("RGB")
+
+
+@pytest.fixture
+def image_dir():
+    """Directory with two near-identical images and a different one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "wordbank"
+        path.mkdir()
+        gradient_image().save(path / "a.jpg", quality=95)
+        gradient_image(size=512).save(path / "b.jpg", quality=60)
+        gradient_image(flip=True).save(path / "c.jpg", quality=95)
+        yield path
+
+
+def test_hashes_survive_rescaling():
+    """Test that resizing barely changes the hashes while mirroring does."""
+    original, resized = gradient_image(), gradient_image(size=512)
+    mirrored = gradient_image(flip=True)
+    hashes = np.array(
+        [(dhash(image), phash(image)) for image in (resized, mirrored)],
+        dtype=np.uint64,
+    )
+    query = np.array([dhash(original), phash(original)], dtype=np.uint64)
+
+    distances = hamming_distances(hashes, query)
+
+    assert distances[0].max() <= 4
+    assert distances[1].min() > 20
+
+
+def test_index_groups_and_aliases(image_dir):
+    """Test near-duplicate lookups, grouping and alias resolution."""
+    index = ImageHashIndex(image_dir, image_dir.parent / "hashes.json")
+
+    assert index.refresh() == 3
+    assert index.refresh() == 0
+    assert [name for name, _ in index.find_similar(image_dir / "a.jpg")] == ["b.jpg"]
+    assert index.duplicate_groups() == [["a.jpg", "b.jpg"]]
+
+    index.set_alias("b.jpg", "a.jpg")
+    reloaded = ImageHashIndex(image_dir, image_dir.parent / "hashes.json")
+    assert reloaded.resolve("b.jpg") == "a.jpg"
+    assert reloaded.resolve("c.jpg") == "c.jpg"
+
+
+def test_index_add_and_discard(image_dir):
+    """Test that added and discarded images are looked up without a rescan."""
+    index = ImageHashIndex(image_dir, image_dir.parent / "hashes.json")
+    index.refresh()
+    gradient_image(size=384).save(image_dir / "d.jpg", quality=80)
+
+    index.add(image_dir / "d.jpg")
+    assert "d.jpg" in [name for name, _ in index.find_similar(image_dir / "a.jpg")]
+
+    (image_dir / "d.jpg").unlink()
+    index.discard(image_dir / "d.jpg")
+    assert [name for name, _ in index.find_similar(image_dir / "a.jpg")] == ["b.jpg"]
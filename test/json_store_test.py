@@ -0,0 +1,37 @@
+import multiprocessing
+
+from json_store import read_json, update_json
+
+
+def add_keys(path, prefix: str, count: int) -> None:
+    """Add keys to a JSON file one update at a time."""
+    for i in range(count):
+        update_json(path, lambda data: data.update({f"{prefix}{i}": i}))
+
+
+def test_update_json_merges(tmp_path):
+    """Test that updates apply to the file's current contents."""
+    path = tmp_path / "store.json"
+    assert read_json(path) == {}
+
+    update_json(path, lambda data: data.update({"a": 1}))
+    result = update_json(path, lambda data: data.update({"b": 2}))
+
+    assert result == {"a": 1, "b": 2}
+    assert read_json(path) == result
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_update_json_across_processes(tmp_path):
+    """Test that concurrent writers from several processes lose no updates."""
+    path = tmp_path / "store.json"
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=add_keys, args=(path, f"p{n}-", 25)) for n in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert len(read_json(path)) == 100
@@ -0,0 +1,42 @@
+import tempfile
+from pathlib import Path
+
+from media_index import MediaIndex
+
+
+def test_exists_reflects_initial_scan():
+    """Test that files present at scan time are found and others aren't."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "abc.aac").write_bytes(b"")
+        index = MediaIndex()
+
+        assert index.exists(Path(tmpdir) / "abc.aac")
+        assert not index.exists(Path(tmpdir) / "abc.opus")
+        assert not index.exists(Path(tmpdir) / "missing" / "abc.aac")
+
+
+def test_add_and_discard():
+    """Test that written and removed files update the index without a rescan."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "abc.aac"
+        index = MediaIndex()
+        assert not index.exists(path)
+
+        # Written after the scan - only visible once registered
+        path.write_bytes(b"")
+        assert not index.exists(path)
+        index.add(path)
+        assert index.exists(path)
+
+        index.discard(path)
+        assert not index.exists(path)
+
+
+def test_equivalent_paths_share_a_listing():
+    """Test that differently spelled paths to one directory hit the same listing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "sub").mkdir()
+        index = MediaIndex()
+        index.add(Path(tmpdir) / "sub" / "abc.jpg")
+
+        assert index.exists(Path(tmpdir) / "sub" / ".." / "sub" / "abc.jpg")
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from morphology import (
+    contains_kanji,
+    count_morae,
+    is_japanese_word,
+    katakana_to_hiragana,
+    parse,
+    reading,
+    to_hiragana,
+)
+
+
+def test_katakana_to_hiragana():
+    """Test converting katakana while leaving other characters alone."""
+    assert katakana_to_hiragana("テレビとabc") == "てれびとabc"
+
+
+def test_contains_kanji():
+    """Test kanji detection."""
+    assert contains_kanji("日本語")
+    assert not contains_kanji("にほんご")
+    assert not contains_kanji("English")
+
+
+def test_count_morae():
+    """Test that small kana merge and punctuation isn't counted."""
+    assert count_morae("きょうは、がっこう。") == 7
+    assert count_morae("コーヒー") == 4
+    assert count_morae("OK 日本") == 6
+
+
+def test_is_japanese_word():
+    """Test that punctuation alone is not a word."""
+    assert is_japanese_word("です")
+    assert not is_japanese_word("。")
+
+
+def test_reading():
+    """Test building the full hiragana reading of a word."""
+    assert reading("勉強") == "べんきょう"
+
+
+def test_to_hiragana_keeps_non_kanji_text():
+    """Test that only kanji words are replaced by their readings."""
+    assert to_hiragana("Hello 勉強します") == "Hello べんきょうします"
+
+
+def test_parse_is_memoized():
+    """Test that repeated parses return the cached tokens."""
+    assert parse("日本語を勉強します") is parse("日本語を勉強します")
+
+
+def test_parse_from_several_threads():
+    """Test that concurrent parses each get their own text's tokens."""
+    texts = [f"{i}人で日本語を勉強します" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(parse, texts))
+    assert ["".join(token.surface for token in tokens) for tokens in results] == texts
@@ -0,0 +1,13 @@
+from types import SimpleNamespace
+
+from plugin_chain import is_processed, mark_processed
+
+
+def test_mark_processed():
+    """Test that only marked content objects count as processed."""
+    content = SimpleNamespace(_content="<p>text</p>")
+    assert not is_processed(content)
+
+    mark_processed(content)
+    assert is_processed(content)
+    assert not is_processed(SimpleNamespace(_content="<p>text</p>"))
@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+
+from scheduler import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    ProviderLimits,
+    Scheduler,
+    TokenBucket,
+    is_retryable,
+)
+
+
+class StatusError(Exception):
+    """Error carrying an HTTP status code, like the Google client's errors."""
+
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+@pytest.fixture
+def fast_limits():
+    """Limits that never make a test wait for tokens or backoff."""
+    return ProviderLimits(
+        rate=1000.0, burst=1000, concurrency=2, max_retries=2, base_delay=0.001
+    )
+
+
+def test_concurrency_cap(fast_limits):
+    """Test that no more jobs than the provider's concurrency run at once."""
+    scheduler = Scheduler({"test": fast_limits})
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def run_all():
+        await asyncio.gather(*[scheduler.run("test", job) for _ in range(6)])
+
+    asyncio.run(run_all())
+
+    assert peak == 2
+    assert scheduler.stats()["test"]["completed"] == 6
+
+
+def test_priority_order():
+    """Test that waiting jobs start in priority order."""
+    scheduler = Scheduler({"test": ProviderLimits(rate=1000.0, burst=1000)})
+    scheduler.configure("test", concurrency=1)
+    started = []
+
+    def job(name):
+        async def run():
+            started.append(name)
+            await asyncio.sleep(0.01)
+
+        return run
+
+    async def run_all():
+        blocker = asyncio.create_task(scheduler.run("test", job("blocker")))
+        await asyncio.sleep(0.005)
+        await asyncio.gather(
+            scheduler.run("test", job("low"), priority=PRIORITY_LOW),
+            scheduler.run("test", job("normal")),
+            scheduler.run("test", job("high"), priority=PRIORITY_HIGH),
+        )
+        await blocker
+
+    asyncio.run(run_all())
+
+    assert started == ["blocker", "high", "normal", "low"]
+
+
+def test_rate_limited_jobs_start_in_turn():
+    """Test that jobs waiting for tokens are handed on one at a time, in order."""
+    scheduler = Scheduler({"test": ProviderLimits(rate=50.0, burst=1)})
+    started = []
+
+    def job(i):
+        async def run():
+            started.append(i)
+
+        return run
+
+    async def run_all():
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+        await asyncio.gather(*[scheduler.run("test", job(i)) for i in range(5)])
+        return loop.time() - begin
+
+    elapsed = asyncio.run(run_all())
+
+    assert started == [0, 1, 2, 3, 4]
+    # One token up front, then one every 20 ms
+    assert 0.06 <= elapsed < 1.0
+
+
+def test_cancelled_waiter_hands_on_its_turn(fast_limits):
+    """Test that cancelling the first waiting job wakes the one behind it."""
+    scheduler = Scheduler({"test": fast_limits})
+    scheduler.configure("test", concurrency=1)
+    release = None
+
+    async def blocker():
+        await release.wait()
+
+    async def job():
+        return "ok"
+
+    async def run_all():
+        nonlocal release
+        release = asyncio.Event()
+        running = asyncio.create_task(scheduler.run("test", blocker))
+        await asyncio.sleep(0.005)
+        first = asyncio.create_task(scheduler.run("test", job))
+        second = asyncio.create_task(scheduler.run("test", job))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        release.set()
+        await running
+        return await asyncio.wait_for(second, timeout=1.0)
+
+    assert asyncio.run(run_all()) == "ok"
+    assert scheduler.stats()["test"]["waiting"] == 0
+
+
+def test_retries_rate_limited_requests(fast_limits):
+    """Test that a 429 is retried and drains the provider's bucket."""
+    scheduler = Scheduler({"test": fast_limits})
+    attempts = 0
+
+    async def job():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise StatusError(429)
+        return "ok"
+
+    assert asyncio.run(scheduler.run("test", job)) == "ok"
+    assert attempts == 2
+    assert scheduler.stats()["test"]["retried"] == 1
+
+
+def test_gives_up_after_max_retries(fast_limits):
+    """Test that a persistently failing request raises its last error."""
+    scheduler = Scheduler({"test": fast_limits})
+    attempts = 0
+
+    async def job():
+        nonlocal attempts
+        attempts += 1
+        raise StatusError(503)
+
+    with pytest.raises(StatusError):
+        asyncio.run(scheduler.run("test", job))
+    assert attempts == 3
+    assert scheduler.stats()["test"]["failed"] == 1
+
+
+def test_non_retryable_error_raises_immediately(fast_limits):
+    """Test that client errors are not retried."""
+    scheduler = Scheduler({"test": fast_limits})
+    attempts = 0
+
+    async def job():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("invalid response")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run("test", job))
+    assert attempts == 1
+    assert scheduler.stats()["test"]["running"] == 0
+
+
+def test_is_retryable():
+    """Test the classification of request errors."""
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(500))
+    assert not is_retryable(StatusError(400))
+    assert is_retryable(TimeoutError())
+
+    try:
+        try:
+            raise StatusError(429)
+        except StatusError as e:
+            raise RuntimeError("agent failed") from e
+    except RuntimeError as wrapped:
+        assert is_retryable(wrapped)
+
+
+def test_token_bucket():
+    """Test that a bucket allows a burst and then reports the wait for a token."""
+    bucket = TokenBucket(rate=10.0, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.1
+
+    bucket.drain()
+    assert bucket.reserve() > 0
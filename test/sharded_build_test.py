@@ -0,0 +1,97 @@
+import uuid
+from collections import Counter
+
+import pytest
+import redis
+
+import sharded_build
+from sharded_build import ShardedBuild, shard_of, transformed_path, wait_for_run
+
+
+@pytest.fixture
+def build():
+    """Build state in a local Redis server; skipped if none is running."""
+    client = redis.Redis(decode_responses=True, socket_connect_timeout=1)
+    try:
+        client.ping()
+    except redis.RedisError:
+        pytest.skip("Redis is not available")
+
+    build = ShardedBuild(client, f"test-{uuid.uuid4().hex}")
+    yield build
+    keys = list(client.scan_iter(f"{build.prefix}:*"))
+    if keys:
+        client.delete(*keys)
+
+
+def test_shard_of_is_stable():
+    """Test that shards depend only on the path and cover all shards."""
+    paths = [f"articles/lesson_{i}.md" for i in range(1000)]
+    shards = [shard_of(path, 8) for path in paths]
+
+    assert shards == [shard_of(path, 8) for path in paths]
+    assert shard_of("a\\b.md", 8) == shard_of("a\\b.md", 8)
+    counts = Counter(shards)
+    assert set(counts) == set(range(8))
+    assert min(counts.values()) > 80
+
+
+def test_transformed_path(tmp_path):
+    """Test that transformed content mirrors the source layout."""
+    assert transformed_path(tmp_path, "pages/about.md") == (
+        tmp_path / "content" / "pages" / "about.md.html"
+    )
+
+
+def test_leases(build):
+    """Test that shards are leased once and the run completes."""
+    run = build.start(shard_count=2, article_count=3)
+    assert build.current_run() == run
+
+    first = build.claim(run, "worker-1")
+    second = build.claim(run, "worker-2")
+    assert {first, second} == {0, 1}
+    assert build.claim(run, "worker-3") is None
+    assert build.renew(run, first, "worker-1")
+    assert not build.renew(run, first, "worker-2")
+
+    build.complete(run, first, 2)
+    assert not build.is_complete(run)
+    build.complete(run, second, 1)
+    assert build.is_complete(run)
+    assert build.progress(run)["articles_done"] == 3
+
+
+def test_restart_uses_new_keys(build):
+    """Test that a new run doesn't inherit the state of the previous one."""
+    previous = build.start(shard_count=1, article_count=1)
+    build.complete(previous, build.claim(previous, "worker-1"), 1)
+
+    run = build.start(shard_count=1, article_count=1)
+    assert run != previous
+    assert build.is_complete(previous)
+    assert not build.is_complete(run)
+    assert build.claim(run, "worker-1") == 0
+
+
+class StubBuild:
+    """Build whose current run changes from a finished one to a new one."""
+
+    def __init__(self):
+        """Initialize with the finished run as current."""
+        self.runs = iter(["finished", "finished", "new"])
+
+    def current_run(self):
+        """Get the next current run."""
+        return next(self.runs)
+
+    def is_complete(self, run):
+        """Only the finished run is complete."""
+        return run == "finished"
+
+
+def test_wait_for_run_skips_finished_run(monkeypatch):
+    """Test that a worker started before a rebuild waits for the new run."""
+    monkeypatch.setattr(sharded_build, "POLL_INTERVAL", 0)
+
+    assert wait_for_run(StubBuild()) == "new"
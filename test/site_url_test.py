@@ -0,0 +1,34 @@
+from site_url import SITEURL_PLACEHOLDER, resolve_site_url, resolve_written_file
+
+
+def test_resolve_site_url():
+    """Test that every placeholder is replaced by the SITEURL."""
+    html = (
+        f'<source src="{SITEURL_PLACEHOLDER}/audio/tts/a.opus">'
+        f'<img src="{SITEURL_PLACEHOLDER}/images/audio-speaker.svg">'
+    )
+
+    assert resolve_site_url(html, "https://example.com") == (
+        '<source src="https://example.com/audio/tts/a.opus">'
+        '<img src="https://example.com/images/audio-speaker.svg">'
+    )
+    assert resolve_site_url(html, "") == (
+        '<source src="/audio/tts/a.opus"><img src="/images/audio-speaker.svg">'
+    )
+
+
+def test_resolve_written_file(tmp_path):
+    """Test that written files get the SITEURL of their context."""
+    page = tmp_path / "lesson.html"
+    page.write_text(f'<img src="{SITEURL_PLACEHOLDER}/images/犬.jpg">', encoding="utf-8")
+    untouched = tmp_path / "index.html"
+    untouched.write_text("<p>犬</p>", encoding="utf-8")
+    mtime = untouched.stat().st_mtime_ns
+
+    resolve_written_file(str(page), context={"SITEURL": "https://example.com"})
+    resolve_written_file(str(untouched), context={"SITEURL": "https://example.com"})
+
+    assert page.read_text(encoding="utf-8") == (
+        '<img src="https://example.com/images/犬.jpg">'
+    )
+    assert untouched.stat().st_mtime_ns == mtime
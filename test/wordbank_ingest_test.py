@@ -0,0 +1,39 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from wordbank_ingest import Checkpoint, read_word_list
+
+
+@pytest.mark.parametrize(
+    "name,content",
+    [
+        ("words.csv", "word,en_translation,description\n猫,cat,pet\n犬,dog,\n"),
+        ("words.tsv", "猫\tcat\tpet\n犬\tdog\n"),
+        (
+            "words.jsonl",
+            '{"word": "猫", "en_translation": "cat", "description": "pet"}\n'
+            '{"word": "犬", "en_translation": "dog"}\n',
+        ),
+    ],
+)
+def test_read_word_list(name, content):
+    """Test reading word lists in each supported format."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / name
+        path.write_text(content, encoding="utf-8")
+
+        assert read_word_list(path) == [("猫", "cat", "pet"), ("犬", "dog", "")]
+
+
+def test_checkpoint_resume():
+    """Test that finished words survive a restart, ignoring a torn last line."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "words.csv.checkpoint"
+        Checkpoint(path).mark("猫", "cat")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(["犬", "dog"], ensure_ascii=False)[:5])
+
+        assert Checkpoint(path).done == {("猫", "cat")}
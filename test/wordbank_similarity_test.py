@@ -0,0 +1,53 @@
+import pytest
+
+from wordbank_similarity import SimilarityIndex, normalize_translation
+
+
+@pytest.fixture
+def index():
+    """Index with a few translations of one word."""
+    index = SimilarityIndex()
+    for translation in ["cat", "to eat", "hand"]:
+        index.add("X", translation)
+    return index
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("Cat", "cat"),
+        ("a cat", "cat"),
+        ("  The  Cat! ", "cat"),
+        ("to eat", "eat"),
+        ("o'clock", "o'clock"),
+    ],
+)
+def test_normalize_translation(text, expected):
+    """Test that case, punctuation and leading articles are ignored."""
+    assert normalize_translation(text) == expected
+
+
+@pytest.mark.parametrize(
+    "translation,expected,exact",
+    [
+        ("A Cat", "cat", True),
+        ("eat", "to eat", True),
+        ("hands", "hand", False),
+        ("dog", None, None),
+    ],
+)
+def test_match(index, translation, expected, exact):
+    """Test exact and likely duplicates against the stored translations."""
+    match = index.match("X", translation)
+
+    if expected is None:
+        assert match is None
+    else:
+        assert match.en_translation == expected
+        assert match.exact == exact
+
+
+def test_match_other_word_or_self(index):
+    """Test that other words and the candidate's own entry never match."""
+    assert index.match("Y", "cat") is None
+    assert index.match("X", "cat") is None
@@ -0,0 +1,157 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from wordbank_storage import (
+    JsonlWordbankStorage,
+    SqliteWordbankStorage,
+    open_storage,
+    record_hash,
+)
+
+
+@pytest.fixture
+def cat_record():
+    """A wordbank record as stored by the engines."""
+    return {
+        "en_translation": "cat",
+        "word": "猫",
+        "language_code": "ja",
+        "examples": ["猫が好きです。"],
+        "description": "A common domestic pet animal",
+        "image_description": "A cute cat sitting on a windowsill",
+    }
+
+
+@pytest.fixture
+def dog_record():
+    """Another wordbank record."""
+    return {
+        "en_translation": "dog",
+        "word": "犬",
+        "language_code": "ja",
+        "examples": ["犬を飼っています。"],
+        "description": "A loyal companion",
+        "image_description": "A friendly dog playing in a park",
+    }
+
+
+@pytest.fixture
+def sqlite_storage():
+    """Create a temporary SQLite storage."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = SqliteWordbankStorage(Path(tmpdir) / "wordbank.sqlite3")
+        yield storage
+        storage.close()
+
+
+def test_open_storage_selects_engine_by_suffix():
+    """Test that the file suffix selects the storage engine."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jsonl = open_storage(Path(tmpdir) / "wordbank.jsonl")
+        sqlite = open_storage(Path(tmpdir) / "wordbank.sqlite3")
+
+        assert isinstance(jsonl, JsonlWordbankStorage)
+        assert isinstance(sqlite, SqliteWordbankStorage)
+        sqlite.close()
+
+
+def test_sqlite_upsert_and_get(sqlite_storage, cat_record):
+    """Test that upserts replace the record with the same key."""
+    sqlite_storage.upsert(cat_record)
+    sqlite_storage.upsert({**cat_record, "description": "Updated"})
+
+    assert sqlite_storage.get("猫", "cat")["description"] == "Updated"
+    assert sqlite_storage.get("猫", "kitten") is None
+    assert len(sqlite_storage.get_all()) == 1
+
+
+@pytest.mark.parametrize("engine", ["jsonl", "sqlite3"])
+def test_find(engine, cat_record, dog_record):
+    """Test lookups by hash, reading and language in both engines."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = open_storage(Path(tmpdir) / f"wordbank.{engine}")
+        storage.upsert(cat_record)
+        storage.upsert(dog_record)
+
+        assert storage.find(word_hash=record_hash("猫", "cat")) == [cat_record]
+        assert storage.find(reading="いぬ") == [dog_record]
+        assert len(storage.find(language_code="ja")) == 2
+        assert storage.find(language_code="fr") == []
+        storage.close()
+
+
+def test_sqlite_missing_media(sqlite_storage, cat_record, dog_record):
+    """Test that media completeness flags are queryable."""
+    sqlite_storage.upsert(cat_record, has_image=True, has_audio=True)
+    sqlite_storage.upsert(dog_record, has_image=True, has_audio=False)
+
+    assert sqlite_storage.find_missing_media(audio=True) == [dog_record]
+    assert sqlite_storage.find_missing_media(image=True) == []
+
+    sqlite_storage.set_media_flags("猫", "cat", has_image=False, has_audio=True)
+    assert sqlite_storage.find_missing_media(image=True) == [cat_record]
+
+
+def test_sqlite_jsonl_round_trip(cat_record, dog_record):
+    """Test importing and exporting the JSONL format."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "wordbank.jsonl"
+        records = [cat_record, dog_record, {**cat_record, "description": "v2"}]
+        source.write_text(
+            "\n".join(json.dumps(record, ensure_ascii=False) for record in records),
+            encoding="utf-8",
+        )
+
+        # A new database imports the JSONL file next to it
+        storage = open_storage(Path(tmpdir) / "wordbank.sqlite3")
+        assert storage.get("猫", "cat")["description"] == "v2"
+
+        exported = Path(tmpdir) / "exported.jsonl"
+        assert storage.export_jsonl(exported) == 2
+        assert JsonlWordbankStorage(exported).get_all() == storage.get_all()
+        storage.close()
+
+
+def test_jsonl_concurrent_writers_merge(cat_record, dog_record):
+    """Test that two writers on one log see each other's records."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "wordbank.jsonl"
+        first = JsonlWordbankStorage(path)
+        second = JsonlWordbankStorage(path)
+        first.get_all()
+        second.get_all()
+
+        first.upsert(cat_record)
+        second.upsert(dog_record)
+        first.refresh()
+        first.close()
+        second.close()
+
+        assert {r["word"] for r in first.get_all()} == {"猫", "犬"}
+        assert {r["word"] for r in JsonlWordbankStorage(path).get_all()} == {
+            "猫",
+            "犬",
+        }
+
+
+def test_jsonl_append_after_foreign_compaction(cat_record, dog_record):
+    """Test that a writer follows the log after another one compacts it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "wordbank.jsonl"
+        first = JsonlWordbankStorage(path)
+        second = JsonlWordbankStorage(path)
+
+        first.upsert(cat_record)
+        second.upsert({**cat_record, "description": "Updated"})
+        second.compact()
+        first.upsert(dog_record)
+        first.close()
+        second.close()
+
+        reloaded = JsonlWordbankStorage(path)
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+        assert reloaded.get("猫", "cat")["description"] == "Updated"
+        assert reloaded.get("犬", "dog") is not None
@@ -1,5 +1,7 @@
+import asyncio
 import json
 import tempfile
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
@@ -288,3 +290,189 @@ def test_cache_consistency(temp_wordbank, sample_word_details):
     result = temp_wordbank.get("猫", "cat")
     assert result.description == "Updated"
     assert result.image_uuid == "uuid"
+
+
+def test_details_built_once_per_record(sample_word_details):
+    """Test that lookups reuse details until the stored record changes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_path = Path(tmpdir) / "wb.jsonl"
+        WordBank(data_path=str(data_path)).upsert(sample_word_details)
+        wordbank = WordBank(data_path=str(data_path))
+
+        first = wordbank.get("猫", "cat")
+        assert wordbank.get("猫", "cat") is first
+        assert wordbank.get_all()[0] is first
+        assert wordbank.find(word_hash=first.hash) == [first]
+
+        wordbank.upsert(replace(sample_word_details, description="Updated"))
+        assert wordbank.get("猫", "cat").description == "Updated"
+
+
+def test_upsert_appends_one_line_per_change(temp_wordbank, sample_word_details):
+    """Test that upserts append records instead of rewriting the file."""
+    temp_wordbank.upsert(sample_word_details)
+    temp_wordbank.upsert(sample_word_details)  # Unchanged - nothing appended
+
+    updated = replace(sample_word_details, description="Updated")
+    temp_wordbank.upsert(updated)
+
+    with open(temp_wordbank.data_path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+
+    assert len(lines) == 2
+    assert json.loads(lines[-1])["description"] == "Updated"
+
+
+def test_log_last_record_wins_after_reload(sample_word_details):
+    """Test that reloading the log keeps the latest record for each word."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_path = Path(tmpdir) / "test_wordbank.jsonl"
+        wb1 = WordBank(data_path=str(data_path), agent=None)
+        wb1.upsert(sample_word_details)
+        wb1.upsert(
+            replace(sample_word_details, description="v2")
+        )
+        wb1.close()
+
+        wb2 = WordBank(data_path=str(data_path), agent=None)
+        result = wb2.get("猫", "cat")
+        assert result is not None
+        assert result.description == "v2"
+        assert len(wb2.get_all()) == 1
+
+
+def test_compact(temp_wordbank, sample_word_details, another_word_details):
+    """Test that compaction leaves one line per word."""
+    temp_wordbank.upsert(sample_word_details)
+    temp_wordbank.upsert(
+        replace(sample_word_details, description="v2")
+    )
+    temp_wordbank.upsert(another_word_details)
+
+    temp_wordbank.compact()
+    # Appends continue on the compacted log
+    temp_wordbank.upsert(
+        replace(another_word_details, description="v2")
+    )
+
+    with open(temp_wordbank.data_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    assert len(records) == 3
+    assert records[0]["description"] == "v2"
+
+
+def test_torn_last_line_is_skipped(sample_word_details, another_word_details):
+    """Test that a partially written record doesn't break loading or appending."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_path = Path(tmpdir) / "test_wordbank.jsonl"
+        line = json.dumps(sample_word_details.to_dict(), ensure_ascii=False)
+        data_path.write_text(line + "\n" + line[:20], encoding="utf-8")
+
+        wb1 = WordBank(data_path=str(data_path), agent=None)
+        assert wb1.contains("猫", "cat")
+        wb1.upsert(another_word_details)
+        wb1.close()
+
+        wb2 = WordBank(data_path=str(data_path), agent=None)
+        assert wb2.contains("猫", "cat")
+        assert wb2.contains("犬", "dog")
+
+
+class FakeBatchAgent:
+    """Agent stub answering batched requests from canned items."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    async def run_async(self, prompt, result_type, handlers):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+def test_details_hash_and_record_round_trip(sample_word_details):
+    """Test that the precomputed hash follows the pair and isn't stored."""
+    record = sample_word_details.to_dict()
+    renamed = replace(sample_word_details, en_translation="kitty")
+
+    assert "hash" not in record
+    assert WordbankWordDetails.from_dict(record) == sample_word_details
+    assert sample_word_details.image_file == f"{sample_word_details.hash}.jpg"
+    assert renamed.hash != sample_word_details.hash
+
+
+def test_propagate_many_retries_missing_items(
+    sample_word_details, another_word_details, monkeypatch
+):
+    """Test that batched generation validates items and retries only the missing."""
+    stray = replace(another_word_details, word="狗")
+    agent = FakeBatchAgent([[sample_word_details, stray], [another_word_details]])
+
+    async def no_media(details):
+        pass
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wordbank = WordBank(data_path=str(Path(tmpdir) / "wb.jsonl"), agent=agent)
+        monkeypatch.setattr(wordbank, "_generate_img", no_media)
+        monkeypatch.setattr(wordbank, "_generate_audio", no_media)
+        words = [("犬", "dog", "pet"), ("猫", "cat", "pet"), ("犬", "dog", "pet")]
+
+        results = asyncio.run(wordbank.propagate_many(words))
+
+        assert [details.word for details in results] == ["犬", "猫", "犬"]
+        assert len(agent.prompts) == 2
+        assert "猫" not in agent.prompts[1]
+        assert wordbank.contains("犬", "dog") and not wordbank.contains("狗", "dog")
+
+
+def test_propagate_many_skips_failed_words(sample_word_details, monkeypatch):
+    """Test that a word failing its last-resort request doesn't fail the others."""
+    agent = FakeBatchAgent([[sample_word_details], [], []])
+
+    async def no_media(details):
+        pass
+
+    async def failing_details(word, en_translation, description):
+        raise RuntimeError("invalid response")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wordbank = WordBank(data_path=str(Path(tmpdir) / "wb.jsonl"), agent=agent)
+        monkeypatch.setattr(wordbank, "_generate_img", no_media)
+        monkeypatch.setattr(wordbank, "_generate_audio", no_media)
+        monkeypatch.setattr(wordbank, "_generate_word_details", failing_details)
+
+        results = asyncio.run(
+            wordbank.propagate_many([("猫", "cat", "pet"), ("犬", "dog", "pet")])
+        )
+
+        assert results == [sample_word_details, None]
+        assert wordbank.contains("猫", "cat") and not wordbank.contains("犬", "dog")
+
+
+def test_propagate_many_reuses_duplicates(sample_word_details, monkeypatch):
+    """Test that translation variants of a stored word don't trigger generation."""
+    agent = FakeBatchAgent([])
+
+    async def no_media(details):
+        pass
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        wordbank = WordBank(data_path=str(Path(tmpdir) / "wb.jsonl"), agent=agent)
+        monkeypatch.setattr(wordbank, "_generate_img", no_media)
+        monkeypatch.setattr(wordbank, "_generate_audio", no_media)
+        wordbank.upsert(sample_word_details)
+
+        completed = []
+        results = asyncio.run(
+            wordbank.propagate_many(
+                [("猫", "a Cat", "pet"), ("猫", "Cat.", "pet")],
+                on_complete=lambda pair, details: completed.append(pair),
+            )
+        )
+
+        assert [details.en_translation for details in results] == ["cat", "cat"]
+        # Reported under the input pairs, e.g. for the ingestion checkpoint
+        assert sorted(completed) == [("猫", "Cat."), ("猫", "a Cat")]
+        assert agent.prompts == []
+        assert not wordbank.contains("猫", "a Cat")
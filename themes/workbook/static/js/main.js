@@ -9,6 +9,9 @@ import { initFlashcardQuiz } from './modules/flashcard-quiz.js';
 import { initWordSpanTooltips } from './modules/wordspan.js';
 import { initRealtimeCall, makeCall, endCall, clearStoredApiKey } from './modules/realtime-call.js';
 import { initDialoguePractice } from './modules/dialogue-practice.js';
+import { initDialogueAudio } from './modules/dialogue-audio.js';
+import { initTtsSprites } from './modules/tts-sprite.js';
+import { initAudioPlayers } from './modules/audio-players.js';
 
 // Initialize all features when DOM is ready
 document.addEventListener('DOMContentLoaded', () => {
@@ -18,6 +21,9 @@ document.addEventListener('DOMContentLoaded', () => {
     initWordSpanTooltips();
     initRealtimeCall();
     initDialoguePractice();
+    initDialogueAudio();
+    initTtsSprites();
+    initAudioPlayers();
 });
 
 // Export realtime call functions for global access
@@ -0,0 +1,96 @@
+/**
+ * Audio Players JavaScript
+ * Shows duration and waveform of TTS players from their build-time hints,
+ * so players with preload="none" don't have to fetch audio to lay out
+ */
+
+// Bar color of the played part and of the rest of the waveform
+const PLAYED_COLOR = '#C74350';
+const REMAINING_COLOR = '#CCCCCC';
+
+/**
+ * Format seconds as m:ss
+ * @param {number} seconds - Time in seconds
+ * @returns {string} Formatted time
+ */
+function formatTime(seconds) {
+    const whole = Math.max(0, Math.round(seconds));
+    const minutes = Math.floor(whole / 60);
+    return `${minutes}:${String(whole % 60).padStart(2, '0')}`;
+}
+
+/**
+ * Draw the waveform overview with the played part highlighted
+ * @param {HTMLCanvasElement} canvas - Canvas to draw on
+ * @param {number[]} peaks - Peak values in [0, 1]
+ * @param {number} progress - Played fraction in [0, 1]
+ */
+function drawPeaks(canvas, peaks, progress) {
+    const ratio = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth;
+    const height = canvas.clientHeight;
+    canvas.width = width * ratio;
+    canvas.height = height * ratio;
+
+    const context = canvas.getContext('2d');
+    context.scale(ratio, ratio);
+    context.clearRect(0, 0, width, height);
+
+    const barWidth = width / peaks.length;
+    peaks.forEach(function(peak, i) {
+        const barHeight = Math.max(1, peak * height);
+        context.fillStyle = (i + 0.5) / peaks.length <= progress ? PLAYED_COLOR : REMAINING_COLOR;
+        context.fillRect(
+            i * barWidth + barWidth * 0.15,
+            (height - barHeight) / 2,
+            barWidth * 0.7,
+            barHeight
+        );
+    });
+}
+
+/**
+ * Initialize the waveform and duration of players with build-time hints
+ */
+export function initAudioPlayers() {
+    const players = document.querySelectorAll('audio[data-duration][data-peaks]');
+
+    players.forEach(function(audio) {
+        const duration = parseFloat(audio.dataset.duration);
+        const peaks = audio.dataset.peaks.split(',').map(parseFloat);
+        if (!duration || peaks.some(isNaN)) {
+            return;
+        }
+
+        const waveform = document.createElement('div');
+        waveform.className = 'audio-waveform';
+
+        const canvas = document.createElement('canvas');
+        canvas.setAttribute('aria-hidden', 'true');
+
+        const time = document.createElement('span');
+        time.className = 'audio-duration';
+        time.textContent = formatTime(duration);
+
+        waveform.append(canvas, time);
+        audio.before(waveform);
+
+        const progress = () => Math.min(1, audio.currentTime / duration);
+        const redraw = () => drawPeaks(canvas, peaks, progress());
+        redraw();
+
+        audio.addEventListener('timeupdate', function() {
+            time.textContent = `${formatTime(audio.currentTime)} / ${formatTime(duration)}`;
+            redraw();
+        });
+        audio.addEventListener('ended', redraw);
+        window.addEventListener('resize', redraw);
+
+        // Clicking the waveform seeks there; the audio loads on demand
+        canvas.addEventListener('click', function(e) {
+            const rect = canvas.getBoundingClientRect();
+            audio.currentTime = ((e.clientX - rect.left) / rect.width) * duration;
+            audio.play();
+        });
+    });
+}
@@ -0,0 +1,28 @@
+/**
+ * Audio Segments JavaScript
+ * Plays a time range of a shared audio element (dialogue lines, audio sprites)
+ */
+
+/**
+ * Play a segment of an audio element and pause at its end
+ * @param {HTMLAudioElement} audio - The audio element to play
+ * @param {number} start - Segment start in seconds
+ * @param {number} end - Segment end in seconds
+ */
+export function playSegment(audio, start, end) {
+    if (audio._stopAtEnd) {
+        audio.removeEventListener('timeupdate', audio._stopAtEnd);
+    }
+
+    audio._stopAtEnd = function() {
+        if (audio.currentTime >= end) {
+            audio.pause();
+            audio.removeEventListener('timeupdate', audio._stopAtEnd);
+            audio._stopAtEnd = null;
+        }
+    };
+
+    audio.addEventListener('timeupdate', audio._stopAtEnd);
+    audio.currentTime = start;
+    audio.play();
+}
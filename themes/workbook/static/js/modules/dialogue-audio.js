@@ -0,0 +1,44 @@
+/**
+ * Dialogue Audio JavaScript
+ * Plays individual dialogue lines using the build-time timing table
+ */
+
+import { playSegment } from './audio-segments.js';
+
+/**
+ * Initialize per-line playback for dialogues with timing tables
+ */
+export function initDialogueAudio() {
+    const dialogues = document.querySelectorAll('dl.dialogue[data-dialogue-id]');
+
+    dialogues.forEach(function(dialogue) {
+        const dialogueId = dialogue.dataset.dialogueId;
+        const audio = document.getElementById(`${dialogueId}-audio`);
+        const timingsScript = document.getElementById(`${dialogueId}-timings`);
+
+        if (!audio || !timingsScript) {
+            return;
+        }
+
+        const timings = JSON.parse(timingsScript.textContent);
+
+        dialogue.querySelectorAll('dd[data-turn]').forEach(function(line) {
+            const turn = timings[parseInt(line.dataset.turn, 10)];
+            if (!turn) {
+                return;
+            }
+
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'dialogue-line-play';
+            button.setAttribute('aria-label', 'Play this line');
+            button.textContent = '▶';
+            button.addEventListener('click', (e) => {
+                e.stopPropagation();
+                playSegment(audio, turn.start, turn.end);
+            });
+
+            line.prepend(button);
+        });
+    });
+}
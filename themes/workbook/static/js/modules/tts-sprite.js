@@ -0,0 +1,30 @@
+/**
+ * TTS Sprite JavaScript
+ * Plays inline TTS snippets packed into a single per-page audio sprite
+ */
+
+import { playSegment } from './audio-segments.js';
+
+/**
+ * Initialize sprite-backed inline TTS buttons
+ */
+export function initTtsSprites() {
+    const buttons = document.querySelectorAll('.tts-sprite-btn');
+
+    buttons.forEach(function(button) {
+        button.addEventListener('click', (e) => {
+            e.preventDefault();
+
+            const audio = document.getElementById(button.dataset.sprite);
+            if (!audio) {
+                return;
+            }
+
+            playSegment(
+                audio,
+                parseFloat(button.dataset.start),
+                parseFloat(button.dataset.end)
+            );
+        });
+    });
+}